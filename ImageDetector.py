@@ -6,6 +6,7 @@
 #顯示上傳的圖像：上傳的圖像會在 Streamlit 應用的一個列中顯示。如果沒有上傳圖像，則會顯示一個默認的圖像。
 
 #物件偵測：當用戶點擊“Detect Objects”按鈕後，系統會使用指定的模型對上傳或默認圖像進行物件偵測。
+#偵測結果以最低閾值快取，之後移動信心滑塊只需要過濾快取的框並重新繪圖，不會再呼叫模型。
 
 #顯示偵測結果：偵測到的物件會在 Streamlit 應用的另一個列中以繪製了邊界框的圖像形式顯示。此外，還會有一個區域顯示具體的偵測結果，如物件的位置和大小。
 
@@ -18,6 +19,9 @@ import PIL  # 導入PIL庫，用於處理圖片
 import settings  # 導入設置模組，通常包含配置信息
 import streamlit as st  # 導入streamlit庫，用於構建web應用
 import helper  # 導入輔助功能模組，可能包含額外的功能或工具
+import detection_stats  # 導入偵測統計模組，用於匯總每個類別的數量
+import upload_spool  # 導入上傳暫存模組，上傳的圖片只複製一次並在重跑之間重用
+import result_cache  # 導入結果快取模組，移動信心滑塊時不需要重新推論
 
 class ImageDetector:  # 定義一個圖像檢測類
     def __init__(self, model, accuracy):  # 初始化方法，接受一個模型和準確度作為參數
@@ -26,6 +30,7 @@ class ImageDetector:  # 定義一個圖像檢測類
 
     def detect(self):  # 定義檢測方法
         image_process = None  # 初始化一個變量，用於後續處理圖片
+        content_key = None  # 圖片內容的雜湊，用於查詢快取的偵測結果
         source_image = st.sidebar.file_uploader(
             "Upload an image", type=("jpg", "jpeg", "png", "bmp", "webp")
         )  # 在側邊欄創建一個文件上傳器，接受圖片文件
@@ -33,21 +38,28 @@ class ImageDetector:  # 定義一個圖像檢測類
         with col1:  # 第一列的內容
             try:  # 錯誤處理
                 if source_image is not None:  # 如果上傳了圖片
-                    image_process = PIL.Image.open(source_image)  # 打開並處理上傳的圖片
+                    spooled = upload_spool.spool(source_image)  # 暫存文件以內容雜湊命名
+                    image_process = PIL.Image.open(spooled)  # 從暫存文件打開上傳的圖片
+                    content_key = spooled.stem
                     st.image(image_process, caption="Uploaded Image", use_column_width=True)  # 顯示上傳的圖片
                 else:  # 如果沒有上傳圖片
                     default_image = PIL.Image.open(settings.DEFAULT_IMAGE)  # 打開默認圖片
                     st.image(default_image, caption="Default Image", use_column_width=True)  # 顯示默認圖片
                     image_process = default_image  # 將默認圖片用於後續處理
+                    content_key = result_cache.content_hash(default_image)  # 以像素內容計算雜湊
             except Exception as ex:  # 處理打開圖片時可能發生的異常
                 st.error(f"Error loading image")  # 顯示錯誤信息
                 st.error(ex)  # 顯示異常詳細信息
-        if st.sidebar.button("Detect Objects"):  # 如果側邊欄的檢測按鈕被點擊
-            detected_objects_summary_list = []  # 初始化一個列表，用於存儲檢測結果
-            res = self.model.predict(image_process, conf=self.accuracy)  # 使用模型對圖片進行預測
+        cache = result_cache.get_cache()  # 全進程共享的偵測結果快取
+        detect_clicked = st.sidebar.button("Detect Objects")  # 側邊欄的檢測按鈕
+        # 點擊後以最低閾值推論一次並快取；之後移動信心滑塊時直接過濾快取的結果，不需要再點擊也不會呼叫模型
+        if image_process is not None and (detect_clicked or cache.lookup(self.model, content_key) is not None):
+            stats = detection_stats.DetectionStats(self.model.names)  # 初始化統計，用於匯總檢測結果
+            cached = cache.get(self.model, image_process, content_key)  # 最低閾值的偵測結果（未命中時才推論）
+            res = [result_cache.filter_result(cached, self.accuracy)]  # 以向量化遮罩套用目前的閾值
             boxes = res[0].boxes  # 獲取預測結果中的邊界框
-            res_plotted = res[0].plot()[:,:,::-1]  # 獲取繪製了邊界框的圖片
-            detected_objects_summary_list.extend(res[0].boxes.cls)  # 將檢測到的對象類別添加到列表中
+            res_plotted = helper.session_annotator().draw(res[0], res[0].orig_img.copy())[:,:,::-1]  # 繪製在副本上，快取的原圖保持不變
+            stats.update(res[0].boxes.cls)  # 將檢測到的對象類別累加到統計中
             with col2:  # 第二列的內容
                 st.image(res_plotted, caption='Detected Image', use_column_width=True)  # 顯示檢測後的圖片
                 try:  # 錯誤處理
@@ -60,4 +72,4 @@ class ImageDetector:  # 定義一個圖像檢測類
                 except Exception as ex:  # 處理展示結果時可能發生的異常
                     st.write("An error occurred while processing the detection results")  # 顯示錯誤信息
             if boxes:  # 如果有檢測到對象
-                helper.sum_detections(detected_objects_summary_list, self.model)  # 使用輔助函數處理並匯總檢測結果
+                helper.sum_detections(stats, self.model)  # 使用輔助函數處理並匯總檢測結果
@@ -7,7 +7,7 @@
 #上傳和處理視頻：
 
 #使用Streamlit的側邊欄功能，提供一個用戶界面讓用戶上傳MP4格式的視頻文件。
-#上傳的視頻被保存到指定路徑（這裡是videos目錄）。
+#上傳的視頻以分塊方式複製到暫存區，以內容雜湊命名，同一次上傳在重跑之間只複製一次。
 #如果沒有上傳視頻，則使用一個預設的視頻（video_11.mp4）。
 #顯示視頻：
 
@@ -21,9 +21,12 @@
 #將檢測結果顯示在Streamlit界面上。
 #檢測結果的處理和匯總：
 
-#每次檢測物體後，將檢測到的物體類型添加到一個列表中。
-#當視頻讀取完成或讀取失敗時，釋放視頻資源並刪除非預設的臨時視頻文件。
+#每次檢測物體後，將檢測到的物體類型累加到固定大小的統計陣列中。
+#當視頻讀取完成或讀取失敗時，釋放視頻資源；暫存文件由暫存區按時間和總大小清理。
 #使用輔助函數對檢測到的物體進行匯總並展示結果。
+#勾選平行分段處理時，視頻會被切成多個分段交給多個工作進程處理，只顯示進度和匯總。
+#勾選導出時，每一幀標註好的圖像會在背景線程中寫成 MP4，完成後可以在側邊欄下載。
+#完整分析過的視頻會保存成欄式偵測索引，之後可以不執行模型直接重播、按新閾值匯總和查詢包含某些類別的時間範圍。
 #總體來說，這段代碼為用戶提供了一個界面來上傳視頻，並利用機器學習模型來進行物體檢測，然後將結果顯示給用戶。
 
 
@@ -31,11 +34,14 @@
 import PIL  # 導入PIL庫，用於圖像處理
 import settings  # 導入設置模組，可能包含配置和常量定義
 import streamlit as st  # 導入streamlit庫，用於構建web應用
-import os  # 導入os模組，用於操作系統功能，如文件路徑操作
 import cv2  # 導入OpenCV庫，用於視頻處理
-from pathlib import Path  # 從pathlib模塊導入Path類，用於處理文件路徑
-import shutil  # 導入shutil模組，用於執行高級文件操作
 import helper  # 導入輔助功能模組，可能包含額外的功能或工具
+import detection_stats  # 導入偵測統計模組，以固定記憶體累積每個類別的數量
+import track_store  # 導入軌跡統計模組，用於計算不重複物件數和停留時間
+import video_segments  # 導入平行分段模組，用多個進程處理長視頻
+import model_registry  # 導入模型註冊表模組，用於取得模型的權重路徑和執行後端
+import upload_spool  # 導入上傳暫存模組，上傳的視頻只複製一次並在重跑之間重用
+import detection_index  # 導入偵測索引模組，保存完整分析過的視頻的偵測結果
 
 class VideoDetector:  # 定義一個視頻檢測類
     def __init__(self, model, accuracy):  # 初始化方法，接受模型和準確度作為參數
@@ -48,39 +54,108 @@ class VideoDetector:  # 定義一個視頻檢測類
         with st.sidebar:  # 在Streamlit的側邊欄中
             source_vid = st.file_uploader("Upload a video", type=["mp4"])  # 創建一個文件上傳器，只接受MP4格式的視頻
         is_display_tracker, tracker = helper.display_tracker_options()  # 從輔助模組獲取跟蹤器選項
+        batch_size = helper.display_batch_options()  # 從輔助模組獲取批次推論選項
+        workers = helper.display_segment_options()  # 從輔助模組獲取平行分段處理選項
+        metrics, show_overlay = helper.display_instrumentation_options(settings.VIDEO)  # 從輔助模組獲取效能計時選項
+        export = helper.display_export_option()  # 從輔助模組獲取導出標註視頻的選項
+        rules = helper.display_ppe_option(self.model)  # 從輔助模組獲取防護裝備規則的選項
         try:  # 錯誤處理
             if source_vid is not None:  # 如果上傳了視頻
-                video_path = os.path.join("videos", source_vid.name)  # 創建視頻文件的路徑
-                with open(video_path, "wb") as video_file:  # 打開文件進行寫入
-                    video_file.write(source_vid.read())  # 將上傳的視頻寫入文件
+                video_path = str(upload_spool.spool(source_vid))  # 分塊複製到以內容雜湊命名的暫存文件（同一次上傳只複製一次）
             else:  # 如果沒有上傳視頻
-                video_path = os.path.join("videos", "video_7.mp4")  # 使用默認視頻路徑
-            st.video(video_path)  # 在Streamlit中顯示視頻
+                video_path = str(settings.DEFAULT_VIDEO)  # 使用默認視頻路徑
+            st.video(video_path)  # 在Streamlit中直接從文件路徑播放視頻
         except Exception as ex:  # 處理加載視頻時可能發生的異常
             st.error(f"Error loading video")  # 顯示錯誤信息
             st.error(ex)  # 顯示異常詳細信息
-
-        detected_objects_summary_list = []  # 初始化檢測到的對象列表
+        tracker_key = tracker if is_display_tracker else None  # 索引按是否追蹤分開保存
+        index = helper.open_video_index(video_path, self.model, tracker_key) if video_path else None  # 之前完整分析過時的偵測索引
+        replay_range = helper.display_replay_options(index, self.accuracy) if index is not None else None  # 有索引時可以不執行模型直接重播
 
         if st.sidebar.button("Detect Objects"):  # 如果側邊欄的檢測按鈕被點擊
             vid_cap = cv2.VideoCapture(video_path)  # 使用OpenCV打開視頻
-            st_frame = st.empty()  # 在Streamlit中創建一個空白的框架
-            while vid_cap.isOpened():  # 當視頻開啟時
-                success, image = vid_cap.read()  # 讀取視頻的一幀
-                if success:  # 如果讀取成功
-                    # 調用helper模組中的display_frames函數進行幀處理和顯示
-                    res = helper.display_frames(
-                        self.model,  # 使用初始化時指定的機器學習模型
-                        self.accuracy,  # 使用初始化時設定的檢測準確度
-                        st_frame,  # Streamlit的空白框架，用於顯示處理後的圖像
-                        image,  # 從視頻中讀取的當前幀
-                        is_display_tracker,  # 布爾值，決定是否顯示物體跟蹤器的結果
-                        tracker,  # 物體跟蹤器的實例，如果is_display_tracker為True則使用
-                    )
-                    detected_objects_summary_list.extend(res[0].boxes.cls)  # 添加檢測到的對象類別到列表中
-                else:  # 如果讀取失敗
-                    vid_cap.release()  # 釋放視頻資源
-                    if Path(video_path).name != "video_7.mp4":  # 如果不是默認視頻
-                        os.remove(video_path)  # 刪除臨時保存的視頻文件
-                    helper.sum_detections(detected_objects_summary_list, self.model)  # 使用輔助函數匯總檢測結果
-                    break  # 跳出循環
+            fps = vid_cap.get(cv2.CAP_PROP_FPS)
+            start_frame = replay_range[0] if replay_range is not None else 0  # 重播時從範圍的起始幀開始計算視頻時間
+            stats = detection_stats.DetectionStats(self.model.names, fps=fps, start_frame=start_frame)  # 以視頻時間統計每個類別的數量
+            tracks = track_store.TrackStore(self.model.names, fps=fps, start_frame=start_frame) if is_display_tracker else None  # 啟用追蹤器時記錄每條軌跡
+            frame_width, frame_height = int(vid_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(vid_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))  # 框以原始解析度記錄
+            exporter = helper.start_export(video_path, fps) if export and not workers else None  # 在背景線程中寫入標註視頻
+            source_name = source_vid.name if source_vid is not None else video_path  # 上傳的視頻以原始文件名記錄
+            # 把新分析的偵測和違規事件寫入事件記錄（平行分段時寫入合併後的時間軸）；重播不寫入
+            sink = helper.start_event_sink(source_name, "video", self.model, fps) if replay_range is None else None
+            compliance = helper.start_compliance(self.model, rules, fps, sink)  # 逐幀檢查防護裝備規則；平行分段時檢查合併後的時間軸
+            if replay_range is not None:  # 重播時只解碼畫面，偵測結果從索引中按幀範圍取出
+                st_frame = st.empty()
+                for res in helper.run_frame_pipeline(
+                    self.model, self.accuracy, st_frame, vid_cap, batch_size=batch_size or 1, metrics=metrics,
+                    show_overlay=show_overlay, replay_index=index, frame_range=replay_range, exporter=exporter,
+                    compliance=compliance,
+                ):
+                    stats.update(res[0].boxes.cls)
+                    if tracks is not None:
+                        tracks.update_from_result(res[0])
+                vid_cap.release()
+            elif workers:  # 啟用平行分段時不逐幀顯示，只顯示進度和匯總
+                vid_cap.release()  # 分段由工作進程各自打開
+                self.detect_segments(video_path, tracker if is_display_tracker else None, workers, stats, tracks, compliance, sink)
+            else:
+                st_frame = st.empty()  # 在Streamlit中創建一個空白的框架
+                detection_log = helper.start_video_log(video_path, self.model, vid_cap.get(cv2.CAP_PROP_FPS))  # 以最低閾值記錄，之後調整閾值不需要重新推論
+                # 解碼、推論和繪圖在流水線中重疊執行，結果按幀的順序返回
+                for res in helper.run_frame_pipeline(
+                    self.model,  # 使用初始化時指定的機器學習模型
+                    self.accuracy,  # 使用初始化時設定的檢測準確度
+                    st_frame,  # Streamlit的空白框架，用於顯示處理後的圖像
+                    vid_cap,  # 已打開的視頻，由流水線的讀取階段逐幀讀取
+                    is_display_tracker,  # 布爾值，決定是否顯示物體跟蹤器的結果
+                    tracker,  # 物體跟蹤器的實例，如果is_display_tracker為True則使用
+                    batch_size or 1,  # 每次推論的幀數，未啟用批次推論時為1
+                    metrics=metrics,  # 效能計時，未啟用時為None
+                    show_overlay=show_overlay,  # 是否在畫面上顯示每秒幀數和各階段耗時
+                    detection_log=detection_log,  # 記錄最低閾值的偵測結果
+                    exporter=exporter,  # 導出標註視頻，未啟用時為None
+                    compliance=compliance,  # 檢查防護裝備規則，未啟用時為None
+                ):
+                    stats.update(res[0].boxes.cls)  # 將這一幀的對象類別累加到統計中
+                    if tracks is not None:
+                        tracks.update_from_result(res[0])  # 將這一幀的追蹤編號累加到軌跡統計中
+                    if sink is not None:
+                        sink.record(res[0])  # 按秒匯總後交給背景寫入線程
+                vid_cap.release()  # 視頻讀取完成後釋放視頻資源
+                # 整部視頻處理完成後保存成欄式索引，之後重播、調整閾值和查詢都不需要重新推論
+                index = detection_index.save(
+                    detection_log, detection_index.index_key(video_path, self.model, tracker_key),
+                    (frame_width, frame_height), tracker_key, self.accuracy,  # 追蹤器只接收這個閾值以上的框
+                )
+            if compliance is not None:
+                compliance.finish()  # 結束仍在進行的違規，寫入事件記錄
+            if sink is not None:
+                sink.close()  # 寫入最後一個時間桶
+            helper.sum_detections(stats, self.model)  # 使用輔助函數匯總檢測結果
+            if tracks is not None:
+                helper.sum_tracks(tracks)  # 顯示不重複物件數和停留時間
+            if compliance is not None:
+                helper.sum_violations(compliance)  # 顯示防護裝備規則的違規
+        elif video_path is not None:
+            helper.display_last_video_summary(video_path, self.accuracy, self.model, index)  # 移動信心滑塊時立即以新閾值重新匯總
+        if index is not None:
+            helper.display_index_query(index, self.accuracy)  # 查詢包含某些類別的時間範圍
+        helper.display_export_download()  # 完成最近的導出並提供下載
+
+    def detect_segments(self, video_path, tracker, workers, stats, tracks, compliance=None, sink=None):  # 以平行分段處理整個視頻
+        entry = model_registry.get_registry().find(self.model)  # 工作進程以相同的權重和執行後端各自載入模型
+        model_path, backend = (entry.key[0], entry.key[3]) if entry is not None else (self.model.ckpt_path, None)
+        progress = st.progress(0.0, text="Processing segments...")  # 顯示已合併的分段比例
+
+        def on_segment(done, total):
+            progress.progress(done / total, text=f"{done}/{total} segments merged")
+
+        for _, rows in video_segments.iter_timeline(
+            video_path, model_path, self.accuracy, tracker, workers, backend=backend,
+            on_segment=on_segment,
+        ):
+            video_segments.record_rows(stats, tracks, rows)  # 按幀的順序累加到統計中
+            if compliance is not None:
+                compliance.update_rows(rows)  # 以合併後的時間軸檢查防護裝備規則，分段之間的軌跡編號已經統一
+            if sink is not None:
+                sink.record_rows(rows)  # 按秒匯總後交給背景寫入線程
@@ -2,7 +2,7 @@
 
 #初始化和管理全局狀態：
 
-#使用st.session_state來存儲和管理全局狀態（在這裡是檢測到的物體列表）。這種方法確保了應用程序在多個請求之間可以保持狀態。
+#使用st.session_state來存儲和管理全局狀態（在這裡是檢測到的物體統計）。這種方法確保了應用程序在多個請求之間可以保持狀態。
 #定義 WebcamDetector 類：
 
 #這個類用於處理攝像頭的物體檢測。
@@ -16,7 +16,7 @@
 
 #在一個循環中讀取攝像頭的每一幀圖像。
 #對每一幀圖像進行物體檢測，並選擇是否使用物體跟蹤器。
-#將檢測結果添加到st.session_state.detected_objects_summary_list中。
+#將檢測結果累加到st.session_state.detection_stats中（固定大小的統計陣列，記憶體不會隨會話時間增長）。
 
 #用戶交互：
 #提供兩個按鈕，一個用於打開攝像頭並開始檢測，另一個用於關閉攝像頭並退出檢測。
@@ -25,17 +25,26 @@
 #檢測結果的處理和匯總：
 
 #當用戶選擇退出攝像頭時，使用輔助函數匯總並顯示檢測到的物體。
-#清空全局列表以準備下一次檢測。
+#重置全局統計以準備下一次檢測。
 #總體來說，這段code提供了一個實用的界面，讓用戶可以通過Web應用來實時檢測攝像頭中的物體，並且可以隨時開始和終止檢測過程。這對於需要實時視頻監控或分析的應用程序非常有用。
 
 
 import cv2  # 導入OpenCV庫，用於處理視頻和圖像
 import streamlit as st  # 導入streamlit庫，用於構建Web應用
 import helper  # 導入輔助功能模塊，可能包含額外的功能或工具
+import settings  # 導入設置模組，包含即時來源的配置
+import detection_stats  # 導入偵測統計模組，以固定記憶體累積每個類別的數量
+import track_store  # 導入軌跡統計模組，用於計算不重複物件數和停留時間
 
 # 初始化一個全局變量以存儲狀態
-if 'detected_objects_summary_list' not in st.session_state:
-    st.session_state.detected_objects_summary_list = []  # 如果變量不存在於session_state中，則創建一個空列表
+if 'detection_stats' not in st.session_state:
+    st.session_state.detection_stats = None  # 如果變量不存在於session_state中，則先設為None，第一次檢測時建立統計
+if 'track_store' not in st.session_state:
+    st.session_state.track_store = None  # 啟用追蹤器時才建立軌跡統計
+if 'compliance' not in st.session_state:
+    st.session_state.compliance = None  # 啟用防護裝備規則時才建立合規監控器
+if 'event_sink' not in st.session_state:
+    st.session_state.event_sink = None  # 啟用事件記錄時才建立事件接收器
 
 class WebcamDetector:  # 定義一個Webcam檢測類
     def __init__(self, model, accuracy):  # 初始化方法，接受模型和準確度作為參數
@@ -45,28 +54,62 @@ class WebcamDetector:  # 定義一個Webcam檢測類
 
     def detect(self):  # 定義檢測方法
         is_display_tracker, tracker = helper.display_tracker_options()  # 從輔助模塊獲取跟蹤器選項
+        scheduler = helper.display_scheduler_options()  # 從輔助模塊獲取自適應跳幀選項
+        metrics, show_overlay = helper.display_instrumentation_options(settings.WEBCAM)  # 從輔助模塊獲取效能計時選項
+        rules = helper.display_ppe_option(self.model)  # 從輔助模塊獲取防護裝備規則的選項
         if st.sidebar.button("Turn On Webcam"):  # 如果側邊欄中的“打開攝像頭”按鈕被點擊
             try:  # 錯誤處理
                 vid_cap = cv2.VideoCapture(0)  # 使用OpenCV打開預設的攝像頭
                 st_frame = st.empty()  # 在Streamlit中創建一個空白的框架
-                while vid_cap.isOpened() and not self.quit_flag:  # 當攝像頭開啟且沒有退出標記時
-                    success, image = vid_cap.read()  # 讀取攝像頭的一幀
-                    if success:  # 如果從攝像頭成功讀取了一幀圖像
-                        # 調用helper模塊中的display_frames函數進行幀的處理和顯示
-                        res = helper.display_frames(
-                            self.model,  # 使用此類別初始化時提供的機器學習模型
-                            self.accuracy,  # 使用此類別初始化時設定的物體檢測準確度
-                            st_frame,  # 使用Streamlit的空白框架，用於在Web應用界面上顯示處理後的圖像
-                            image,  # 從攝像頭讀取到的當前幀圖像
-                            is_display_tracker,  # 布爾值，用於決定是否顯示物體跟蹤器的結果
-                            tracker,  # 物體跟蹤器的實例，如果is_display_tracker為True，則在物體檢測中使用這個跟蹤器
-                        )
-                        st.session_state.detected_objects_summary_list.extend((res[0].boxes.cls).tolist())  # 添加檢測到的對象類別到session_state列表中
-                    else:  # 如果讀取失敗
-                        vid_cap.release()  # 釋放攝像頭資源
+                st_status = st.sidebar.empty()  # 在側邊欄創建一個空白的框架，用於顯示推論幀率和跳幀比例
+                if st.session_state.detection_stats is None:
+                    st.session_state.detection_stats = detection_stats.DetectionStats(self.model.names)  # 即時來源以實際時間統計
+                if is_display_tracker and st.session_state.track_store is None:
+                    st.session_state.track_store = track_store.TrackStore(self.model.names)  # 記錄每條軌跡的停留時間
+                if st.session_state.event_sink is None:
+                    st.session_state.event_sink = helper.start_event_sink("webcam:0", "webcam", self.model)  # 把偵測和違規事件寫入事件記錄
+                if st.session_state.compliance is None:
+                    st.session_state.compliance = helper.start_compliance(self.model, rules, sink=st.session_state.event_sink)  # 檢查每一幀的防護裝備規則
+                # 讀取、推論和繪圖在流水線中重疊執行；按下“退出攝像頭”時 Streamlit 重新執行腳本，流水線會被停止
+                for res in helper.run_frame_pipeline(
+                    self.model,  # 使用此類別初始化時提供的機器學習模型
+                    self.accuracy,  # 使用此類別初始化時設定的物體檢測準確度
+                    st_frame,  # 使用Streamlit的空白框架，用於在Web應用界面上顯示處理後的圖像
+                    vid_cap,  # 已打開的攝像頭，由流水線的讀取階段逐幀讀取
+                    is_display_tracker,  # 布爾值，用於決定是否顯示物體跟蹤器的結果
+                    tracker,  # 物體跟蹤器的實例，如果is_display_tracker為True，則在物體檢測中使用這個跟蹤器
+                    queue_size=settings.LIVE_QUEUE_SIZE,  # 即時來源使用較小的佇列以降低延遲
+                    scheduler=scheduler,  # 自適應跳幀排程器，未啟用時為None
+                    metrics=metrics,  # 效能計時，未啟用時為None
+                    show_overlay=show_overlay,  # 是否在畫面上顯示每秒幀數和各階段耗時
+                    drop_when_busy=True,  # 共享的推論工作進程積壓時丟棄幀，而不是讓延遲累積
+                    compliance=st.session_state.compliance,  # 檢查防護裝備規則，未啟用時為None
+                ):
+                    st.session_state.detection_stats.update(res[0].boxes.cls)  # 將這一幀的對象類別累加到session_state的統計中
+                    if is_display_tracker:
+                        st.session_state.track_store.update_from_result(res[0])  # 將這一幀的追蹤編號累加到軌跡統計中
+                    if st.session_state.event_sink is not None:
+                        st.session_state.event_sink.record(res[0])  # 按秒匯總後交給背景寫入線程
+                    if scheduler is not None and scheduler.frames_seen % settings.RTSP_STATUS_INTERVAL == 0:
+                        st_status.caption(scheduler.status_text())  # 更新實際推論幀率和跳幀比例
+                    elif st.session_state.compliance is not None and st.session_state.compliance.frames % settings.RTSP_STATUS_INTERVAL == 0:
+                        st_status.caption(st.session_state.compliance.status_text())  # 更新目前違規中的人數
+                    if self.quit_flag:  # 如果設置了退出標記
+                        break
+                vid_cap.release()  # 釋放攝像頭資源
             except Exception as e:  # 處理攝像頭加載時可能發生的異常
                 st.sidebar.error("Error loading video: " + str(e))  # 在側邊欄顯示錯誤信息
         if st.sidebar.button('Quit Webcam'):  # 如果側邊欄中的“退出攝像頭”按鈕被點擊
             self.quit_flag = True  # 設置退出標記為True
-            helper.sum_detections(st.session_state.detected_objects_summary_list, self.model)  # 使用輔助函數匯總檢測結果
-            st.session_state.detected_objects_summary_list = []  # 清空session_state中的列表
+            if st.session_state.detection_stats is not None:
+                helper.sum_detections(st.session_state.detection_stats, self.model)  # 使用輔助函數匯總檢測結果
+            if st.session_state.track_store is not None:
+                helper.sum_tracks(st.session_state.track_store)  # 顯示不重複物件數和停留時間
+            if st.session_state.compliance is not None:
+                helper.sum_violations(st.session_state.compliance)  # 顯示防護裝備規則的違規
+            st.session_state.detection_stats = None  # 重置session_state中的統計
+            st.session_state.track_store = None  # 重置session_state中的軌跡統計
+            if st.session_state.event_sink is not None:
+                st.session_state.event_sink.close()  # 寫入最後一個時間桶
+            st.session_state.compliance = None  # 重置session_state中的合規監控器
+            st.session_state.event_sink = None  # 重置session_state中的事件接收器
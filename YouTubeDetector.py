@@ -1,37 +1,26 @@
 import cv2
 import streamlit as st
-import yt_dlp as youtube_dl
 import settings
 import helper
+import detection_stats
+import track_store
 import re
-from pathlib import Path
+import youtube_cache
+import youtube_stream
 
 class YouTubeDetector:
     def __init__(self, model, accuracy):
         self.model = model
         self.accuracy = accuracy
-        self.download_path = Path("C:/Users/lab612/Desktop/workman/Object-Detection-WebApp-main/videos")
-        self.download_path.mkdir(parents=True, exist_ok=True)  # Ensure the directory exists
 
     def clean_youtube_url(self, url):
         """Remove any time parameter (&t=...) from the YouTube URL."""
         return re.sub(r'&t=\d+s', '', url)
 
     def download_video(self, url):
-        ydl_opts = {
-            'format': 'best',  # Use the best compatible format
-            'quiet': True,
-            'outtmpl': str(self.download_path / '%(id)s.%(ext)s'),  # Set path to save the downloaded video
-            'ignoreerrors': True,
-            'retries': 3  # Retry if there are temporary issues
-        }
+        """Return a local copy of the video, downloading it only when it is not in the cache yet."""
         try:
-            with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=True)  # Download video
-                video_path = Path(ydl.prepare_filename(info_dict))  # Get path of the downloaded file
-                if not video_path.exists():
-                    raise ValueError("Failed to download video.")
-            return video_path
+            return youtube_cache.get_cache().get(url)
         except Exception as e:
             st.sidebar.error(f"Error downloading video: {str(e)}")
             return None
@@ -40,37 +29,78 @@ class YouTubeDetector:
         # Clean the URL to remove any additional parameters like &t=274s
         source_youtube = self.clean_youtube_url(st.sidebar.text_input("YouTube Video URL", settings.DEFAULT_URL))
         is_display_tracker, tracker = helper.display_tracker_options()
-        detected_objects_summary_list = []
+        batch_size = helper.display_batch_options()
+        metrics, show_overlay = helper.display_instrumentation_options(settings.YOUTUBE)
+        # Streaming starts detecting within seconds instead of waiting for the whole download
+        progressive = st.sidebar.checkbox("Stream while downloading")
+        export = helper.display_export_option()
+        rules = helper.display_ppe_option(self.model)
 
         if st.sidebar.button("Detect Objects"):
             try:
-                # Download the video locally
-                video_path = self.download_video(source_youtube)
-                if not video_path:
-                    return  # Exit if the video download fails
+                if progressive:
+                    # Decode the remote stream through a bounded read-ahead buffer while it downloads
+                    vid_cap = youtube_stream.StreamingCapture(source_youtube).start()
+                else:
+                    # Download the video locally
+                    video_path = self.download_video(source_youtube)
+                    if not video_path:
+                        return  # Exit if the video download fails
 
-                # Load the downloaded video file using cv2.VideoCapture
-                vid_cap = cv2.VideoCapture(str(video_path))
-                if not vid_cap.isOpened():
-                    st.sidebar.error("Unable to open the downloaded video. Please check if the video format is supported.")
-                    return
+                    # Load the downloaded video file using cv2.VideoCapture
+                    vid_cap = cv2.VideoCapture(str(video_path))
+                    if not vid_cap.isOpened():
+                        st.sidebar.error("Unable to open the downloaded video. Please check if the video format is supported.")
+                        return
 
                 st_frame = st.empty()
-                while vid_cap.isOpened():
-                    success, image = vid_cap.read()
-                    if success:
-                        res = helper.display_frames(
-                            self.model,
-                            self.accuracy,
-                            st_frame,
-                            image,
-                            is_display_tracker,
-                            tracker,
-                        )
-                        detected_objects_summary_list.extend(res[0].boxes.cls)
-                    else:
-                        vid_cap.release()
-                        helper.sum_detections(detected_objects_summary_list, self.model)
-                        break
+                detection_log = helper.start_video_log(source_youtube, self.model, vid_cap.get(cv2.CAP_PROP_FPS))
+                stats = detection_stats.DetectionStats(self.model.names, fps=vid_cap.get(cv2.CAP_PROP_FPS))
+                tracks = track_store.TrackStore(self.model.names, fps=vid_cap.get(cv2.CAP_PROP_FPS)) if is_display_tracker else None
+                # Annotated frames are written to MP4 on a background thread; a full queue drops frames instead of waiting
+                exporter = helper.start_export(source_youtube, vid_cap.get(cv2.CAP_PROP_FPS)) if export else None
+                # Detections and violations are aggregated per second and written to the SQLite event log
+                sink = helper.start_event_sink(source_youtube, "youtube", self.model, vid_cap.get(cv2.CAP_PROP_FPS))
+                # PPE rules are checked on every frame in the annotation stage; violating persons are outlined
+                compliance = helper.start_compliance(self.model, rules, vid_cap.get(cv2.CAP_PROP_FPS), sink)
+                try:
+                    # Decode, inference and plotting overlap in the frame pipeline; results come back in order
+                    for res in helper.run_frame_pipeline(
+                        self.model,
+                        self.accuracy,
+                        st_frame,
+                        vid_cap,
+                        is_display_tracker,
+                        tracker,
+                        batch_size or 1,
+                        metrics=metrics,
+                        show_overlay=show_overlay,
+                        detection_log=detection_log,
+                        exporter=exporter,
+                        compliance=compliance,
+                    ):
+                        if stats.frames == 0 and progressive:
+                            st.sidebar.caption(f"First frame after {vid_cap.first_frame_seconds:.1f}s")
+                        stats.update(res[0].boxes.cls)
+                        if tracks is not None:
+                            tracks.update_from_result(res[0])
+                        if sink is not None:
+                            sink.record(res[0])
+                finally:
+                    # Also runs when the stream fails mid-way, so the events seen so far are still logged
+                    vid_cap.release()
+                    if compliance is not None:
+                        compliance.finish()
+                    if sink is not None:
+                        sink.close()
+                helper.sum_detections(stats, self.model)
+                if tracks is not None:
+                    helper.sum_tracks(tracks)
+                if compliance is not None:
+                    helper.sum_violations(compliance)
             except Exception as e:
                 st.sidebar.error("Error processing video: " + str(e))
+        else:
+            # Moving the confidence slider re-summarizes the last run instantly, without inference
+            helper.display_last_video_summary(source_youtube, self.accuracy, self.model)
+        helper.display_export_download()
@@ -0,0 +1,183 @@
+#這段代碼實現了取代 Results.plot() 的快速標註器（Fast Annotator）。
+#原本每一幀都經過 res[0].plot()，它為每個框重新建立 ultralytics 的 Annotator、逐框轉換張量、計算字體大小並繪製標籤文字，
+#在擁擠的工地畫面中，繪圖的耗時與推論相比並不小。
+#這個模組的主要功能如下：
+
+#一次處理整幀的框：
+
+#一次把所有框的座標、類別、信心度和追蹤編號從張量轉成 NumPy，座標的取整和裁切以向量化完成，
+#顏色由預先建立的調色盤陣列以類別索引一次查出，之後只剩下呼叫 cv2.rectangle 和複製標籤圖塊。
+
+#顏色和文字圖塊快取：
+
+#調色盤與 ultralytics 的預設顏色相同。標籤中的信心度和追蹤編號幾乎每一幀都不同，整個標籤作為快取鍵時幾乎不會命中，
+#因此只快取會重複出現的片段：每個 (類別名稱, 顏色) 和每個 (數字或符號, 顏色) 只會以 cv2.putText 渲染一次，
+#標籤由這些片段水平拼接而成，再以切片複製到畫面上。快取的數量只取決於類別和顏色的數量，
+#上限為 settings.ANNOTATION_SPRITE_CACHE_SIZE。
+
+#直接畫在畫面上：
+
+#標註直接畫在幀的緩衝區中（與 plot() 一樣預設是 result.orig_img），不複製整張圖像。
+#"只畫框" 模式不繪製標籤，典型畫面的標註時間在一毫秒以內。
+
+#分割遮罩或關鍵點等框以外的輸出仍交給 Results.plot() 繪製，不會遺失。
+
+
+import collections  # 導入 collections 模組，用於最近最少使用的標籤圖塊快取
+
+import cv2  # 導入 OpenCV 模組，用於繪製框和渲染標籤
+import numpy as np  # 導入 numpy，用於向量化處理框的座標和顏色
+from ultralytics.utils.plotting import colors  # 導入 ultralytics 的預設調色盤，顏色與 plot() 相同
+
+import settings  # 導入 settings 模組，包含標註相關的配置
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX  # 標籤字體
+_PALETTE = np.array([colors(index, True) for index in range(colors.n)], dtype=np.uint8)  # BGR 調色盤
+
+
+class Annotator:
+    """
+    Draws a frame's boxes and cached label sprites in place, as a fast replacement for Results.plot().
+    #直接在幀上繪製框和快取的標籤圖塊，作為 Results.plot() 的快速替代。
+
+    Parameters:
+        boxes_only (bool): Draw boxes without labels. #只畫框，不畫標籤。
+        line_width (int): Box line width in pixels; by default scaled to the frame size like plot().
+        #框的線寬（像素），預設與 plot() 一樣按幀的大小計算。
+        font_scale (float): Label font scale. #標籤的字體大小。
+        sprite_cache_size (int): Maximum number of cached text sprites. #快取的文字圖塊數量上限。
+    """
+
+    def __init__(self, boxes_only=False, line_width=None, font_scale=None, sprite_cache_size=None):
+        self.boxes_only = boxes_only
+        self.line_width = line_width
+        self.font_scale = font_scale or settings.ANNOTATION_FONT_SCALE
+        self.sprite_cache_size = sprite_cache_size or settings.ANNOTATION_SPRITE_CACHE_SIZE
+        self._sprites = collections.OrderedDict()  # (文字片段, 顏色) -> 圖塊
+        self._thickness = max(int(self.font_scale * 2), 1)
+        self._pad = max(self._thickness, 2)
+        (_, text_height), baseline = cv2.getTextSize("0123456789Agy:", _FONT, self.font_scale, self._thickness)
+        self._text_height = text_height  # 所有片段使用相同的高度和基線，拼接後文字對齊
+        self._sprite_height = text_height + baseline + self._pad
+
+    def draw(self, result, image=None):
+        """
+        Draws a result's boxes into an image in place and returns it.
+        #把結果的框直接畫在圖像上，並返回這張圖像。
+
+        Parameters:
+            result (ultralytics.engine.results.Results): The detections. #偵測結果。
+            image (numpy.ndarray): The BGR image to draw on; defaults to result.orig_img. #要繪製的 BGR 圖像。
+
+        Returns:
+            numpy.ndarray: The annotated image (the same buffer). #標註好的圖像（同一個緩衝區）。
+        """
+        image = result.orig_img if image is None else image
+        if result.masks is not None or result.keypoints is not None:
+            return result.plot(img=image)  # 框以外的輸出交給 ultralytics 繪製
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return image
+
+        data = boxes.data.cpu().numpy()  # 一次轉換所有框：(x1, y1, x2, y2, [id], conf, cls)
+        height, width = image.shape[:2]
+        corners = np.rint(data[:, :4]).astype(np.int32)
+        corners[:, 0::2] = np.clip(corners[:, 0::2], 0, width - 1)
+        corners[:, 1::2] = np.clip(corners[:, 1::2], 0, height - 1)
+        classes = data[:, -1].astype(np.int64)
+        box_colours = _PALETTE[classes % len(_PALETTE)].tolist()  # 以類別索引一次查出顏色
+        line_width = self.line_width or max(round((height + width) / 2 * 0.003), 2)  # 與 plot() 相同的預設線寬
+
+        for (x1, y1, x2, y2), colour in zip(corners.tolist(), box_colours):
+            cv2.rectangle(image, (x1, y1), (x2, y2), colour, line_width, cv2.LINE_AA)
+        if self.boxes_only:
+            return image
+
+        names = result.names
+        confidences = data[:, -2]
+        track_ids = data[:, 4].astype(np.int64) if boxes.is_track else None
+        for index, ((x1, y1, _, _), colour) in enumerate(zip(corners.tolist(), box_colours)):
+            # 與 plot() 相同的標籤格式 "id:<編號> <類別> <信心度>"，每個會變化的字符是單獨快取的片段
+            # 重播時低於追蹤閾值的框編號為 -1，這些框不顯示編號
+            pieces = ["id:", *str(track_ids[index]), " "] if track_ids is not None and track_ids[index] >= 0 else []
+            pieces += [names[int(classes[index])], " ", *f"{confidences[index]:.2f}"]
+            self._blit(image, self.compose(pieces, tuple(colour)), x1, y1)
+        return image
+
+    def highlight(self, image, xyxy, label, colour=(0, 0, 255)):
+        """
+        Outlines boxes in a warning colour with a shared label, e.g. the persons violating a PPE rule.
+        #以警示顏色框出一組框並加上同一個標籤，例如違反防護裝備規則的人員。
+
+        Parameters:
+            image (numpy.ndarray): The BGR image to draw on. #要繪製的 BGR 圖像。
+            xyxy (numpy.ndarray): (N, 4) boxes in image coordinates. #圖像座標中的 (N, 4) 框。
+            label (str): The label drawn under each box. #畫在每個框下方的標籤。
+            colour (tuple): BGR outline colour. #框線的 BGR 顏色。
+        """
+        if len(xyxy) == 0:
+            return image
+        height, width = image.shape[:2]
+        corners = np.rint(xyxy).astype(np.int32)
+        corners[:, 0::2] = np.clip(corners[:, 0::2], 0, width - 1)
+        corners[:, 1::2] = np.clip(corners[:, 1::2], 0, height - 1)
+        line_width = (self.line_width or max(round((height + width) / 2 * 0.003), 2)) * 2  # 比一般的框粗，容易辨認
+        sprite = self.sprite(label, colour)
+        for x1, y1, x2, y2 in corners.tolist():
+            cv2.rectangle(image, (x1, y1), (x2, y2), colour, line_width, cv2.LINE_AA)
+            self._blit(image, sprite, x1, min(y2 + sprite.shape[0], height - 1))  # 標籤放在框的下方，不蓋住類別標籤
+        return image
+
+    def sprite(self, label, colour):
+        """
+        Returns the BGR sprite of a fixed label on a colour, e.g. a PPE warning.
+        #返回以指定顏色為底的固定標籤圖塊，例如防護裝備的警示。
+        """
+        return self.compose([label], colour)
+
+    def compose(self, pieces, colour):
+        """
+        Returns a label sprite on its class colour, concatenated from the cached sprites of its pieces.
+        #返回以類別顏色為底的標籤圖塊，由各個片段的快取圖塊拼接而成。
+
+        Parameters:
+            pieces (list): The label's text pieces in order, e.g. the class name and single digits. #標籤依序的文字片段。
+            colour (tuple): BGR background colour. #背景的 BGR 顏色。
+
+        Returns:
+            numpy.ndarray: The label sprite. #標籤圖塊。
+        """
+        glyphs = [self._glyph(piece, colour) for piece in pieces]
+        width = sum(glyph.shape[1] for glyph in glyphs)
+        sprite = np.empty((self._sprite_height, width + self._thickness + 2 * self._pad, 3), dtype=np.uint8)
+        sprite[:] = colour
+        sprite[:, self._pad:self._pad + width] = np.hstack(glyphs)
+        return sprite
+
+    def _glyph(self, text, colour):
+        key = (text, colour)
+        glyph = self._sprites.get(key)
+        if glyph is not None:
+            self._sprites.move_to_end(key)
+            return glyph
+        (text_width, _), _ = cv2.getTextSize(text, _FONT, self.font_scale, self._thickness)
+        # getTextSize 在每段文字後加上線寬，拼接時只在整個標籤的末尾加一次，寬度與整段渲染相同
+        glyph = np.empty((self._sprite_height, max(text_width - self._thickness, 1), 3), dtype=np.uint8)
+        glyph[:] = colour
+        text_colour = (0, 0, 0) if sum(colour) > 3 * 160 else (255, 255, 255)  # 淺色背景用黑字，深色背景用白字
+        cv2.putText(glyph, text, (0, self._text_height + self._pad // 2), _FONT, self.font_scale, text_colour,
+                    self._thickness, cv2.LINE_AA)
+        self._sprites[key] = glyph
+        if len(self._sprites) > self.sprite_cache_size:
+            self._sprites.popitem(last=False)  # 淘汰最久沒有使用的圖塊
+        return glyph
+
+    @staticmethod
+    def _blit(image, sprite, x, y):
+        sprite_height, sprite_width = sprite.shape[:2]
+        height, width = image.shape[:2]
+        top = y - sprite_height if y >= sprite_height else y  # 放在框的上方，超出畫面時放在框內
+        visible_height = min(sprite_height, height - top)
+        visible_width = min(sprite_width, width - x)
+        if visible_height > 0 and visible_width > 0:
+            image[top:top + visible_height, x:x + visible_width] = sprite[:visible_height, :visible_width]
@@ -22,6 +22,7 @@
 #處理 RTSP：
 
 #如果選擇了 RTSP 數據源，則調用 helper.play_rtsp_stream 函數來處理和展示 RTSP 流的物件偵測結果。
+#如果選擇了 Multi-RTSP 數據源，則調用 helper.play_multi_rtsp_stream 函數，以一個共享模型同時監控多個攝像頭。
 #總之，這段代碼透過整合 YOLOv8 模型和 Streamlit Web 應用，提供了一個交互式平台，用於從不同的數據源進行實時物件偵測和追蹤。
 
 
@@ -51,25 +52,27 @@ st.title("Object Detection And Tracking using YOLOv8")  # 顯示主標題
 
 # 側邊欄
 st.sidebar.header("ML Model Config")  # 側邊欄添加標題
-model_type = st.sidebar.radio("Select Task", ['BEST', 'TBM_SAFETY'])  # 側邊欄單選按鈕選擇模型類型
-confidence = float(st.sidebar.slider("Select Model Confidence", 25, 100, 40)) / 100  # 側邊欄滑塊選擇模型置信度閾值
+model_type = st.sidebar.radio("Select Task", list(settings.MODELS))  # 側邊欄單選按鈕選擇模型類型
+confidence = float(st.sidebar.slider("Select Model Confidence", int(settings.MIN_CONFIDENCE * 100), 100, 40)) / 100  # 側邊欄滑塊選擇模型置信度閾值
 
 # 選擇檢測或分割模式
-if model_type == "BEST":
-    model_path = Path(settings.BEST_MODEL)  # 設置BEST模型的路徑
-elif model_type == "TBM_SAFETY":
-    model_path = Path(settings.TMB_SAFETY_MODEL)  # 設置TBM_SAFETY模型的路徑
+model_path = Path(settings.MODELS[model_type])  # 設置所選模型（BEST 或 TBM_SAFETY）的路徑
 
 # 加載預訓練的機器學習模型
 try:
-    model = helper.load_model(model_path)  # 加載模型
+    model = helper.load_model(model_path)  # 加載模型（已載入過的模型只需查表）
+    helper.display_model_load_info(model)  # 顯示模型的載入和預熱時間
 except Exception as ex:
     st.error(f"Error loading model. Check the specified path: {model_path}")  # 加載失敗時顯示錯誤信息
     st.error(ex)
 
 # 側邊欄
 st.sidebar.header("Data Config")  # 側邊欄添加數據配置標題
-source_radio = st.sidebar.radio("Select Source", ["Image", "Video", "Youtube", "RTSP", "Webcam"])  # 側邊欄單選按鈕選擇數據源
+source_radio = st.sidebar.radio("Select Source", ["Image", "Video", "Youtube", "RTSP", "Multi-RTSP", "Webcam"])  # 側邊欄單選按鈕選擇數據源
+
+# 側邊欄
+st.sidebar.header("Display Config")  # 側邊欄添加顯示配置標題
+helper.display_render_options()  # 設定推送到瀏覽器的幀率、品質和寬度
 
 # 根據選擇的數據源執行不同的檢測功能
 if source_radio == "Image":
@@ -86,4 +89,6 @@ elif source_radio == "Webcam":
     webcam_detector.detect()  # 執行網絡攝像頭檢測
 elif source_radio in [settings.RTSP]:
     helper.play_rtsp_stream(confidence, model)  # 使用RTSP進行檢測
+elif source_radio == settings.MULTI_RTSP:
+    helper.play_multi_rtsp_stream(confidence, model)  # 使用多個RTSP攝像頭進行檢測
 
@@ -0,0 +1,171 @@
+#這段代碼實現了離線視頻文件的批次推論（Batched Inference）。
+#原本的偵測循環每讀取一幀就呼叫一次 model.predict，批次大小永遠是 1。
+#對於已經存在磁碟上的視頻，沒有理由一次只處理一幀。這個模組的主要功能如下：
+
+#批次解碼：
+
+#一次從 cv2.VideoCapture 讀取 N 幀，保留原始解析度，由 preprocess.FramePreprocessor 一次縮放到模型輸入大小。
+
+#批次推論：
+
+#把 N 幀疊成一個批次，只呼叫一次 predict，並按原本的順序輸出結果。
+#使用追蹤器時不呼叫 model.track（它把追蹤狀態掛在共享模型上，並在模型上留下追蹤回呼），
+#而是在 predict 之後按幀的順序更新呼叫者自己的 session_tracker.SessionTracker，因此追蹤時也可以批次推論。
+
+#自動選擇批次大小：
+
+#AutoBatchSizer 會在處理視頻開頭的幾個批次時輪流嘗試不同的批次大小，量測每幀的平均耗時，
+#然後固定使用吞吐量最高的批次大小。量測使用的是真實的視頻幀，因此不會浪費任何推論。
+
+#這個模組不依賴 Streamlit，因此也可以在命令列中使用。
+
+
+import time  # 導入 time 模組，用於量測吞吐量
+
+import cv2  # 導入 OpenCV 模組，用於處理影像
+
+import model_registry  # 導入模型註冊表模組，用於序列化共享模型上的推論
+import preprocess  # 導入預處理模組，幀只縮放一次並保持長寬比
+import session_tracker  # 導入追蹤器狀態模組，每部視頻或每個會話使用自己的追蹤器
+
+BATCH_SIZE_CANDIDATES = (1, 2, 4, 8, 16)  # 自動選擇時嘗試的批次大小
+
+
+def read_batch(vid_cap, batch_size, size=None):
+    """
+    Reads up to batch_size frames from a video capture.
+    #從視頻捕獲對象中讀取最多 batch_size 幀。
+
+    Parameters:
+        vid_cap (cv2.VideoCapture): An opened video capture. #已打開的視頻捕獲對象。
+        batch_size (int): The maximum number of frames to read. #最多讀取的幀數。
+        size (tuple): (width, height) to resize to, or None to keep the original resolution.
+        #縮放的 (寬, 高)，None 表示保留原始解析度。
+
+    Returns:
+        list: The resized frames; shorter than batch_size (or empty) at the end of the video.
+        #縮放後的幀列表；在視頻結尾時會少於 batch_size（或為空）。
+    """
+    frames = []
+    while len(frames) < batch_size:
+        success, image = vid_cap.read()  # 讀取一幀
+        if not success:
+            break
+        frames.append(image if size is None else cv2.resize(image, size))  # 調整影像大小
+    return frames
+
+
+def infer_batch(model, frames, conf, tracker=None, preprocessor=None):
+    """
+    Runs inference over a list of frames and returns one Results object per frame, in order.
+    #對一組幀進行推論，並按順序為每一幀返回一個 Results 物件。
+
+    Parameters:
+        model (YOLO): A YOLO object detection model. #YOLO 物件偵測模型。
+        frames (list): Frames of identical size. #大小相同的幀列表。
+        conf (float): The model's confidence threshold. #模型的信心閾值。
+        tracker (session_tracker.SessionTracker): The caller's tracker state, updated in frame order; None runs
+            detection only. #呼叫者自己的追蹤器狀態，按幀的順序更新；None 表示只做偵測。
+        preprocessor (preprocess.FramePreprocessor): When given, frames are resized once to the model input size
+            and the results are mapped back to the original frames. #提供時幀只縮放一次到模型輸入大小，結果再映射回原始幀。
+
+    Returns:
+        list: One Results object per input frame. #每一幀對應一個 Results 物件。
+    """
+    if not frames:
+        return []
+    inputs = frames if preprocessor is None else preprocessor.prepare(frames)
+    options = {"conf": conf, "verbose": False}
+    if preprocessor is not None:
+        options["imgsz"] = preprocessor.size  # 輸入已經是這個大小，letterbox 只補邊不再縮放
+    with model_registry.inference_lock(model):
+        results = list(model.predict(inputs, **options))  # 一次 predict 處理整個批次
+    if tracker is not None:
+        results = [tracker.update(result, image) for result, image in zip(results, inputs)]  # 追蹤器依賴幀的先後順序
+    return results if preprocessor is None else preprocessor.restore(results, frames)
+
+
+class AutoBatchSizer:
+    """
+    Picks the batch size with the best measured per-frame throughput.
+    #根據量測到的每幀吞吐量選擇最佳批次大小。
+
+    The first ``len(candidates) * trials`` batches cycle through the candidate sizes; the fastest
+    (lowest seconds per frame) is then used for the rest of the video.
+    #前 len(candidates) * trials 個批次會輪流嘗試候選大小，之後固定使用最快的那一個。
+    """
+
+    def __init__(self, candidates=BATCH_SIZE_CANDIDATES, trials=2):
+        self.candidates = list(candidates)
+        self.trials = trials
+        self._schedule = [size for size in self.candidates for _ in range(trials)]  # 量測的順序
+        self._best = {}  # 批次大小 -> 最佳的每幀秒數
+        self.chosen = None  # 量測完成後選定的批次大小
+
+    def next_size(self):
+        """
+        Returns the batch size to use for the next batch.
+        #返回下一個批次要使用的大小。
+        """
+        if self.chosen is not None:
+            return self.chosen
+        return self._schedule[0]
+
+    def record(self, batch_size, num_frames, seconds):
+        """
+        Records how long a batch took.
+        #記錄一個批次所花的時間。
+
+        Parameters:
+            batch_size (int): The batch size that was requested. #請求的批次大小。
+            num_frames (int): The number of frames actually processed. #實際處理的幀數。
+            seconds (float): The wall-clock time of the inference call. #推論所花的時間。
+        """
+        if self.chosen is not None or num_frames < batch_size:
+            return  # 已經選定，或者是視頻結尾不完整的批次，不能代表該批次大小的吞吐量
+        per_frame = seconds / num_frames
+        self._best[batch_size] = min(per_frame, self._best.get(batch_size, per_frame))
+        self._schedule.pop(0)
+        if not self._schedule:
+            self.chosen = min(self._best, key=self._best.get)  # 選出每幀耗時最少的批次大小
+
+    def throughput(self):
+        """
+        Returns the measured frames per second for each tried batch size.
+        #返回每個已嘗試批次大小的量測吞吐量（每秒幀數）。
+        """
+        return {size: 1.0 / per_frame for size, per_frame in self._best.items() if per_frame > 0}
+
+
+def iter_batched_results(model, vid_cap, conf, batch_size="auto", tracker=None):
+    """
+    Decodes a video in batches and yields (frame, result) pairs in frame order.
+    #按批次解碼視頻，並按幀順序產生 (幀, 結果)。
+
+    Parameters:
+        model (YOLO): A YOLO object detection model. #YOLO 物件偵測模型。
+        vid_cap (cv2.VideoCapture): An opened video capture. #已打開的視頻捕獲對象。
+        conf (float): The model's confidence threshold. #模型的信心閾值。
+        batch_size (int or str): A fixed batch size, or "auto" to pick it from measured throughput.
+        #固定的批次大小，或 "auto" 表示根據量測的吞吐量自動選擇。
+        tracker (str): The tracker configuration; None runs detection only. #追蹤器配置；None 表示只做偵測。
+
+    Yields:
+        tuple: (frame, Results) for each decoded frame. #每一幀的 (幀, Results)。
+    """
+    sizer = AutoBatchSizer() if batch_size == "auto" else None
+    preprocessor = preprocess.FramePreprocessor()  # 緩衝區在整部視頻中重用
+    video_tracker = session_tracker.SessionTracker(tracker) if tracker else None  # 每部視頻使用全新的追蹤器
+    while True:
+        size = sizer.next_size() if sizer else int(batch_size)
+        frames = read_batch(vid_cap, size)
+        if not frames:
+            break
+        start = time.perf_counter()
+        results = infer_batch(model, frames, conf, video_tracker, preprocessor)
+        if sizer:
+            sizer.record(size, len(frames), time.perf_counter() - start)
+        for frame, result in zip(frames, results):
+            yield frame, result
+        if len(frames) < size:
+            break  # 視頻已經讀完
@@ -0,0 +1,261 @@
+#這段代碼實現了一個可重現的吞吐量和延遲基準測試（Benchmark Suite）。
+#原本沒有任何方法知道應用程序實際跑得多快。這個工具的主要功能如下：
+
+#重播內建的媒體：
+
+#使用倉庫中的 videos/*.mp4 和 images/* 作為輸入，經過和偵測器相同的代碼路徑：
+#解碼、保持長寬比縮放到模型輸入大小、predict（啟用追蹤器時再更新每個媒體文件自己的追蹤器）、標註，
+#以及推送到瀏覽器前以應用程序的顯示設定所做的縮小和 JPEG 編碼（render.FrameRenderer.encode）。
+
+#分階段統計：
+
+#為每個模型和追蹤器的組合記錄每個階段的 p50/p95/p99 延遲、每秒幀數和峰值記憶體（RSS）。
+#進程的峰值記憶體只會增加，因此每個組合在自己的子進程中執行（載入模型、預熱再重播媒體），
+#記錄的是這個子進程的峰值，不會混入之前執行過的組合。
+
+#機器可讀的輸出：
+
+#結果寫入 JSON 文件，並附上平台和套件版本等資訊，方便保存和比較。
+
+#比較模式：
+
+#比較兩次執行的結果，吞吐量下降或某個階段的 p95 延遲上升超過閾值時標記為退步，並以非零的退出碼結束。
+
+#用法範例：
+#python benchmark.py --output bench.json --max-frames 200
+#python benchmark.py --compare baseline.json bench.json --threshold 0.1
+
+
+import argparse  # 導入 argparse 模組，用於解析命令列參數
+import concurrent.futures  # 導入 concurrent.futures 模組，每個組合在自己的子進程中執行
+import json  # 導入 json 模組，用於寫出結果
+import multiprocessing  # 導入 multiprocessing 模組，以 spawn 方式啟動乾淨的子進程
+import platform  # 導入 platform 模組，用於記錄平台資訊
+import sys  # 導入 sys 模組，用於輸出結果
+import time  # 導入 time 模組，用於計時
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import cv2  # 導入 OpenCV 模組，用於解碼和縮放
+import numpy as np  # 導入 numpy，用於計算百分位數
+
+import settings  # 導入 settings 模組，包含模型和媒體路徑
+import model_registry  # 導入模型註冊表模組，使用相同的模型載入路徑
+import session_tracker  # 導入追蹤器狀態模組，與偵測器相同地在 predict 之後更新軌跡
+import render  # 導入顯示模組，使用與偵測器相同的縮小和 JPEG 編碼
+import annotator  # 導入標註器模組，使用與偵測器相同的繪圖方式
+import preprocess  # 導入預處理模組，使用與偵測器相同的縮放方式
+
+STAGES = ("decode", "resize", "infer", "plot", "encode")  # 每一幀經過的階段
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".jfif"}  # 基準測試使用的圖像格式
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in megabytes.
+    #返回這個進程的峰值常駐記憶體（MB）。
+    """
+    try:
+        import resource  # Windows 沒有 resource 模組
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # macOS 以位元組為單位，Linux 以 KB 為單位
+    except ImportError:
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def summarize(samples):
+    """
+    Returns latency percentiles in milliseconds for a list of durations in seconds.
+    #返回一組秒數的延遲百分位數（毫秒）。
+    """
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+            "mean": round(float(values.mean()), 3)}
+
+
+def iter_media_frames(media_path, max_frames):
+    """
+    Yields (frame, decode seconds) for an image or up to max_frames of a video.
+    #產生圖像或視頻最多 max_frames 幀的 (幀, 解碼秒數)。
+    """
+    if media_path.suffix.lower() in IMAGE_EXTENSIONS:
+        start = time.perf_counter()
+        image = cv2.imread(str(media_path))
+        if image is not None:
+            yield image, time.perf_counter() - start
+        return
+    vid_cap = cv2.VideoCapture(str(media_path))
+    try:
+        for _ in range(max_frames):
+            start = time.perf_counter()
+            success, image = vid_cap.read()
+            if not success:
+                break
+            yield image, time.perf_counter() - start
+    finally:
+        vid_cap.release()
+
+
+def run_combination(model, media_paths, conf, tracker, max_frames):
+    """
+    Replays every media file through the detector code path and collects per-stage timings.
+    #把每個媒體文件以偵測器的代碼路徑重播一遍，並收集各階段的耗時。
+    """
+    timings = {stage: [] for stage in STAGES}
+    renderer = render.FrameRenderer()  # 與應用程序相同的顯示寬度和 JPEG 品質（settings.DISPLAY_*）
+    preprocessor = preprocess.FramePreprocessor()  # 縮放緩衝區在整個組合中重用
+    frame_annotator = annotator.Annotator()  # 與偵測器相同的標註器，標籤圖塊在整個組合中重用
+    frames = 0
+    start = time.perf_counter()
+    for media_path in media_paths:
+        frame_tracker = session_tracker.SessionTracker(tracker) if tracker else None  # 每個媒體文件使用全新的追蹤器
+        for image, decode_time in iter_media_frames(media_path, max_frames):
+            timings["decode"].append(decode_time)
+
+            inputs = preprocessor.prepare([image])  # 與偵測器相同：保持長寬比只縮放一次到模型輸入大小
+            timings["resize"].append(preprocessor.prepare_seconds)
+
+            stage_start = time.perf_counter()
+            res = model.predict(inputs[0], conf=conf, imgsz=preprocessor.size, verbose=False)
+            if frame_tracker is not None:
+                res = [frame_tracker.update(res[0], inputs[0])]  # 追蹤的耗時計入推論階段
+            preprocessor.restore(res, [image])  # 框映射回原始幀
+            timings["infer"].append(time.perf_counter() - stage_start)
+
+            stage_start = time.perf_counter()
+            res_plot = frame_annotator.draw(res[0])
+            timings["plot"].append(time.perf_counter() - stage_start)
+
+            stage_start = time.perf_counter()
+            renderer.encode(res_plot)  # 每一幀都編碼，量測的是單幀的編碼耗時，不受顯示幀率限制
+            timings["encode"].append(time.perf_counter() - stage_start)
+
+            frames += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "fps": round(frames / elapsed, 3) if elapsed > 0 else 0.0,
+        "stages": {stage: summarize(samples) for stage, samples in timings.items()},
+    }
+
+
+def run_isolated(model_name, media_paths, conf, tracker, max_frames):
+    """
+    Child process entry point: loads the model through the registry, runs one combination and reports its peak RSS.
+    #子進程的入口：透過註冊表載入模型，執行一個組合，並返回這個進程的峰值記憶體。
+    """
+    entry = model_registry.get_registry().get(settings.MODELS[model_name])
+    result = run_combination(entry.model, media_paths, conf, tracker, max_frames)
+    result["load_s"] = round(entry.load_time, 3)
+    result["warmup_s"] = round(entry.warmup_time, 3)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)  # 只屬於這個組合的子進程（包含載入模型）
+    return result
+
+
+def run_benchmark(args):
+    """
+    Runs every model/tracker/media combination and writes the results file.
+    #執行所有模型、追蹤器和媒體的組合，並寫出結果文件。
+    """
+    videos = sorted(Path(settings.VIDEO_DIR).glob("*.mp4"))
+    images = sorted(path for path in Path(settings.IMAGES_DIR).iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS)
+    trackers = [None if name == "none" else name for name in args.trackers]
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "conf": args.conf,
+            "max_frames": args.max_frames,
+            "backends": {name: settings.MODEL_BACKENDS.get(name, "pytorch") for name in args.models},
+        },
+        "runs": [],
+    }
+    context = multiprocessing.get_context("spawn")  # 子進程不繼承父進程已經使用的記憶體
+    for model_name in args.models:
+        for tracker in trackers:
+            for media_name, media_paths in (("videos", videos), ("images", images)):
+                if tracker and media_name == "images":
+                    continue  # 單張圖像沒有追蹤的意義
+                # 每個組合一個新的子進程，峰值記憶體不會包含之前的組合
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(
+                        run_isolated, model_name, media_paths, args.conf, tracker, args.max_frames
+                    ).result()
+                load = {"load_s": result.pop("load_s"), "warmup_s": result.pop("warmup_s")}
+                report["meta"].setdefault("load", {}).setdefault(model_name, load)  # 每個子進程都重新載入，記錄第一次
+                result.update({"model": model_name, "tracker": tracker or "none", "media": media_name})
+                report["runs"].append(result)
+                print(
+                    f"{model_name:10} {tracker or 'none':15} {media_name:7} {result['frames']:6} frames "
+                    f"{result['fps']:8.2f} FPS  infer p95 {result['stages']['infer']['p95']:.1f} ms  "
+                    f"peak RSS {result['peak_rss_mb']:.0f} MB",
+                    file=sys.stderr,
+                )
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def compare_reports(baseline, current, threshold):
+    """
+    Returns human-readable regression messages between two benchmark reports.
+    #返回兩份基準測試報告之間的退步訊息。
+
+    A run regresses when its FPS drops by more than threshold, or any stage's p95 latency grows by more than threshold.
+    #當吞吐量下降超過閾值，或任何階段的 p95 延遲上升超過閾值時，視為退步。
+    """
+    def key(run):
+        return run["model"], run["tracker"], run["media"]
+
+    baseline_runs = {key(run): run for run in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        before = baseline_runs.get(key(run))
+        if before is None:
+            continue
+        name = "/".join(key(run))
+        if before["fps"] > 0 and run["fps"] < before["fps"] * (1 - threshold):
+            regressions.append(f"{name}: FPS {before['fps']:.2f} -> {run['fps']:.2f}")
+        for stage in STAGES:
+            old_p95 = before["stages"][stage]["p95"]
+            new_p95 = run["stages"][stage]["p95"]
+            if old_p95 > 0 and new_p95 > old_p95 * (1 + threshold):
+                regressions.append(f"{name}: {stage} p95 {old_p95:.2f} ms -> {new_p95:.2f} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the detection code paths over the bundled media.")
+    parser.add_argument("--output", default="bench_output.json", help="Where to write the JSON results.")
+    parser.add_argument("--models", nargs="+", choices=sorted(settings.MODELS), default=sorted(settings.MODELS))
+    parser.add_argument("--trackers", nargs="+", choices=("none",) + settings.TRACKERS,
+                        default=["none"] + list(settings.TRACKERS))
+    parser.add_argument("--conf", type=float, default=0.4, help="Confidence threshold.")
+    parser.add_argument("--max-frames", type=int, default=300, help="Frames to replay per video.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two results files.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change that counts as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare)
+        regressions = compare_reports(baseline, current, args.threshold)
+        for message in regressions:
+            print("REGRESSION " + message)
+        if not regressions:
+            print("No regressions.")
+        return 1 if regressions else 0
+    return run_benchmark(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#這段代碼實現了一個不依賴 Streamlit 的命令列批次偵測工具。
+#原本所有的偵測都在 Streamlit 的回呼中進行（ImageDetector.detect、VideoDetector.detect 等），
+#沒有瀏覽器會話就無法處理一整晚的錄影或上千張巡檢照片。這個工具的主要功能如下：
+
+#沿用應用程序的配置：
+
+#使用 settings 中的模型路徑（BEST、TBM_SAFETY），以及和介面相同的信心閾值和追蹤器選項。
+
+#遍歷目錄：
+
+#遞迴地收集輸入目錄中的圖像和視頻文件。
+
+#多進程處理：
+
+#每個工作進程各自從模型註冊表載入一份模型，文件以一個文件為單位分配給工作進程。
+
+#串流輸出：
+
+#每個偵測結果（文件、幀序號、類別、信心度、邊界框、追蹤 ID）以 JSONL 或 CSV 格式逐行寫出。
+#每個工作進程先寫入自己的暫存分段文件，完成後由主進程追加到輸出文件，因此輸出文件永遠不會出現寫了一半的文件。
+
+#進度和續傳：
+
+#每完成一個文件就顯示進度，並記錄在 <輸出文件>.done 中；使用 --resume 重新執行時會跳過已完成的文件。
+
+#這條路徑不會載入 Streamlit。
+
+#用法範例：
+#python cli.py images videos --model TBM_SAFETY --conf 0.4 --output detections.jsonl --workers 4
+
+
+import argparse  # 導入 argparse 模組，用於解析命令列參數
+import concurrent.futures  # 導入 concurrent.futures 模組，用於多進程處理
+import csv  # 導入 csv 模組，用於寫出 CSV
+import json  # 導入 json 模組，用於寫出 JSONL
+import os  # 導入 os 模組，用於文件操作
+import shutil  # 導入 shutil 模組，用於刪除上一次留下的分段目錄
+import sys  # 導入 sys 模組，用於輸出進度
+import time  # 導入 time 模組，用於計時
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import settings  # 導入 settings 模組，包含模型路徑等配置
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".jfif"}  # 支援的圖像格式
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".m4v"}  # 支援的視頻格式
+FIELDS = [
+    "source", "frame", "class_id", "class_name", "confidence", "x1", "y1", "x2", "y2", "track_id",
+]  # 每一行輸出的欄位
+
+_model = None  # 每個工作進程各自持有的模型
+
+
+def collect_files(inputs):
+    """
+    Expands files and directories into a sorted list of image and video paths.
+    #把文件和目錄展開成排序後的圖像和視頻路徑列表。
+    """
+    files = []
+    for entry in inputs:
+        path = Path(entry)
+        candidates = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for candidate in candidates:
+            if candidate.is_file() and candidate.suffix.lower() in IMAGE_EXTENSIONS | VIDEO_EXTENSIONS:
+                files.append(candidate)
+    return files
+
+
+def file_key(path):
+    """
+    Identifies a file version for the resume manifest.
+    #為續傳記錄標識一個文件的版本。
+    """
+    stat = path.stat()
+    return f"{path.resolve()}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+def result_rows(source, frame_index, result):
+    """
+    Converts one Results object into output rows, one per detected box.
+    #把一個 Results 物件轉換成輸出行，每個邊界框一行。
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+    xyxy = boxes.xyxy.cpu().numpy()
+    confidence = boxes.conf.cpu().numpy()
+    class_ids = boxes.cls.cpu().numpy().astype(int)
+    track_ids = boxes.id.cpu().numpy().astype(int) if boxes.id is not None else [None] * len(class_ids)
+    return [
+        {
+            "source": source,
+            "frame": frame_index,
+            "class_id": int(class_id),
+            "class_name": result.names[int(class_id)],
+            "confidence": round(float(conf), 4),
+            "x1": round(float(box[0]), 1),
+            "y1": round(float(box[1]), 1),
+            "x2": round(float(box[2]), 1),
+            "y2": round(float(box[3]), 1),
+            "track_id": None if track_id is None else int(track_id),
+        }
+        for box, conf, class_id, track_id in zip(xyxy, confidence, class_ids, track_ids)
+    ]
+
+
+def _init_worker(model_path):
+    global _model
+    import model_registry  # 在工作進程中才導入，避免主進程載入 torch
+
+    _model = model_registry.get_registry().get(model_path).model
+
+
+def _process_file(path, part_path, conf, tracker, batch_size):
+    """
+    Runs detection over one image or video and writes its rows to a part file.
+    #對一個圖像或視頻進行偵測，並把結果寫入分段文件。
+
+    Returns:
+        tuple (int, int): The number of frames and detections processed. #處理的幀數和偵測數。
+    """
+    import cv2  # 在工作進程中才導入
+    import batch_inference
+    import session_tracker
+
+    source = str(path)
+    frames = detections = 0
+    with open(part_path, "w", encoding="utf-8") as part:
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            image = cv2.imread(source)
+            if image is None:
+                raise ValueError(f"Unable to read image: {source}")
+            result = _model.predict(image, conf=conf, verbose=False)[0]
+            rows = result_rows(source, 0, result)
+            frames, detections = 1, len(rows)
+            for row in rows:
+                part.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return frames, detections
+
+        vid_cap = cv2.VideoCapture(source)
+        if not vid_cap.isOpened():
+            raise ValueError(f"Unable to open video: {source}")
+        try:
+            # 每個視頻使用自己的追蹤器，追蹤 ID 不會在文件之間延續，也不會留在共享模型的 predictor 上
+            frame_tracker = session_tracker.SessionTracker(tracker) if tracker else None
+            while True:
+                batch = batch_inference.read_batch(vid_cap, batch_size, size=None)  # 保留原始解析度
+                if not batch:
+                    break
+                results = _model.predict(batch, conf=conf, verbose=False)
+                if frame_tracker is not None:
+                    results = [frame_tracker.update(result, image) for result, image in zip(results, batch)]  # 按幀的順序更新軌跡
+                for result in results:
+                    rows = result_rows(source, frames, result)
+                    detections += len(rows)
+                    for row in rows:
+                        part.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    frames += 1
+        finally:
+            vid_cap.release()
+    return frames, detections
+
+
+class OutputWriter:
+    """
+    Appends rows to a JSONL or CSV output file.
+    #把輸出行追加到 JSONL 或 CSV 輸出文件。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.is_csv = self.path.suffix.lower() == ".csv"
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._file, fieldnames=FIELDS) if self.is_csv else None
+        if self._csv and new_file:
+            self._csv.writeheader()
+
+    def append_part(self, part_path):
+        with open(part_path, encoding="utf-8") as part:
+            if self._csv is None:
+                for line in part:
+                    self._file.write(line)
+            else:
+                for line in part:
+                    self._csv.writerow(json.loads(line))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run(args):
+    """
+    Runs the batch job described by the parsed command-line arguments.
+    #根據解析後的命令列參數執行批次偵測。
+
+    Returns:
+        int: The process exit code. #進程的退出碼。
+    """
+    model_path = settings.MODELS[args.model]
+    tracker = None if args.tracker == "none" else args.tracker
+    output = Path(args.output)
+    manifest = Path(str(output) + ".done")
+    parts_dir = Path(str(output) + ".parts")
+
+    if not args.resume:
+        for stale in (output, manifest):
+            if stale.exists():
+                stale.unlink()
+        shutil.rmtree(parts_dir, ignore_errors=True)  # 上一次中斷時留下的分段文件
+    done = set(manifest.read_text(encoding="utf-8").splitlines()) if manifest.exists() else set()
+
+    files = collect_files(args.inputs)
+    pending = [path for path in files if file_key(path) not in done]
+    print(f"{len(files)} files found, {len(files) - len(pending)} already done", file=sys.stderr)
+    if not pending:
+        return 0
+
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    writer = OutputWriter(output)
+    failures = 0
+    start = time.perf_counter()
+    try:
+        with open(manifest, "a", encoding="utf-8") as manifest_file, concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_worker, initargs=(str(model_path),)
+        ) as executor:
+            futures = {}
+            for index, path in enumerate(pending):
+                part_path = parts_dir / f"{index}.jsonl"
+                future = executor.submit(_process_file, path, part_path, args.conf, tracker, args.batch_size)
+                futures[future] = (path, part_path)
+            for completed, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                path, part_path = futures[future]
+                try:
+                    frames, detections = future.result()
+                except Exception as ex:
+                    failures += 1
+                    print(f"[{completed}/{len(pending)}] FAILED {path}: {ex}", file=sys.stderr)
+                    continue
+                writer.append_part(part_path)  # 整個文件完成後才追加到輸出
+                manifest_file.write(file_key(path) + "\n")  # 記錄已完成，供 --resume 使用
+                manifest_file.flush()
+                os.remove(part_path)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"[{completed}/{len(pending)}] {path}: {frames} frames, {detections} detections "
+                    f"({elapsed:.1f}s elapsed)",
+                    file=sys.stderr,
+                )
+    finally:
+        writer.close()
+    if not any(parts_dir.iterdir()):
+        parts_dir.rmdir()  # 所有分段都已追加到輸出
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the safety models over images and videos without Streamlit.")
+    parser.add_argument("inputs", nargs="+", help="Image/video files or directories to scan recursively.")
+    parser.add_argument("--model", choices=sorted(settings.MODELS), default="BEST", help="Model from settings.MODELS.")
+    parser.add_argument("--conf", type=float, default=0.4, help="Confidence threshold (0.25-1.0 in the app).")
+    parser.add_argument(
+        "--tracker", choices=("none",) + settings.TRACKERS, default="none", help="Tracker for videos."
+    )
+    parser.add_argument("--output", default="detections.jsonl", help="Output file; .csv writes CSV, otherwise JSONL.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per predict call.")
+    parser.add_argument("--resume", action="store_true", help="Skip files recorded in <output>.done.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,280 @@
+#這段代碼實現了已分析視頻的持久化偵測索引（Persisted Detection Index）。
+#原本 VideoDetector 處理完一部視頻後所有的框都會被丟掉，重新觀看、調整信心閾值或換一種顯示方式都要重新解碼並推論整部視頻。
+#這個模組的主要功能如下：
+
+#欄式保存：
+
+#每部完整分析過的視頻會把 result_cache.DetectionLog 的欄位（幀序號、邊界框、類別、信心度、追蹤編號）
+#各自保存為一個 .npy 文件，另外保存每一幀在欄位中的起始位置（frame_offsets），
+#以 (文件內容雜湊, 模型和權重版本, 追蹤器) 為鍵存放在 settings.DETECTION_INDEX_DIR 中。
+#寫入先在暫存目錄中完成，再以 os.replace 原子地移到索引目錄。
+
+#記憶體映射讀取：
+
+#讀取時以 np.load(mmap_mode="r") 映射欄位，只有實際存取的部分才會從磁碟讀入，
+#按幀範圍取出框只是以 frame_offsets 切片，不需要掃描整個文件。
+
+#重播和查詢：
+
+#重播模式只解碼畫面，偵測結果直接從索引取出並過濾到目前的信心閾值，不需要執行模型；
+#啟用追蹤器的索引總是帶有追蹤編號欄位，低於原本追蹤閾值（保存在 meta.json）的框編號為 -1，使用者需要略過這些框；
+#"包含某個類別的幀" 這類查詢以向量化遮罩在整個欄位上一次完成，並合併成連續的幀範圍。
+
+#索引總大小超過 settings.DETECTION_INDEX_QUOTA_MB 時，從最久沒有使用的索引開始刪除。
+
+
+import hashlib  # 導入 hashlib 模組，用於計算文件內容雜湊和模型鍵的雜湊
+import json  # 導入 json 模組，用於保存索引的描述資料
+import os  # 導入 os 模組，用於原子移動和更新使用時間
+import re  # 導入 re 模組，用於辨識暫存區中以雜湊命名的文件
+import shutil  # 導入 shutil 模組，用於刪除索引目錄
+import tempfile  # 導入 tempfile 模組，用於建立寫入中的暫存目錄
+import threading  # 導入 threading 模組，保護文件雜湊的記錄
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import numpy as np  # 導入 numpy，用於欄式的偵測索引
+import torch  # 導入 torch，用於從索引重建 Results 物件
+from ultralytics.engine.results import Results  # 導入 Results 類，重播時與推論結果的用法相同
+
+import settings  # 導入 settings 模組，包含索引相關的配置
+import disk_quota  # 導入容量淘汰模組，與其他快取目錄使用相同的淘汰方式
+import detection_stats  # 導入偵測統計模組，用於按閾值計算匯總
+import result_cache  # 導入結果快取模組，使用相同的欄位和模型鍵
+
+_SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")  # 暫存區文件以 SHA-256 命名
+_STAGING_PREFIX = ".writing-"  # 寫入中的暫存目錄前綴
+_META_FILE = "meta.json"  # 索引的描述資料
+_OFFSETS_FILE = "frame_offsets.npy"  # 每一幀在欄位中的起始位置
+_file_hashes = {}  # (路徑, 大小, 修改時間) -> 內容雜湊
+_lock = threading.Lock()
+
+
+def index_dir():
+    """
+    Returns the detection index directory, creating it when needed.
+    #返回偵測索引目錄，需要時建立。
+    """
+    directory = Path(settings.DETECTION_INDEX_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 of a file's content, reusing the name of spooled uploads and remembering other files.
+    #返回文件內容的 SHA-256；暫存區的上傳文件直接使用文件名，其他文件的結果會被記住。
+    """
+    path = Path(path)
+    if _SHA256_PATTERN.fullmatch(path.stem):
+        return path.stem  # upload_spool 已經以內容雜湊命名
+    stat = path.stat()
+    signature = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        digest = _file_hashes.get(signature)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):  # 分塊讀取，不把整個文件讀進記憶體
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _lock:
+            _file_hashes[signature] = digest
+    return digest
+
+
+def index_key(video_path, model, tracker=None):
+    """
+    Returns the index key of a video: "<content hash>-<model hash>", where the model hash covers the model's
+    registry key, its weights version, the inference input size and the tracker.
+    #返回視頻的索引鍵："<內容雜湊>-<模型雜湊>"，模型雜湊包含模型的註冊表鍵、權重版本、推論輸入大小和追蹤器。
+
+    Parameters:
+        video_path (str): The video file. #視頻文件。
+        model (YOLO): The model used for detection. #偵測使用的模型。
+        tracker (str): The tracker config, or None without tracking. #追蹤器配置，不追蹤時為 None。
+    """
+    content, model_key, fingerprint = result_cache.get_cache().key(model, file_hash(video_path))
+    model_hash = hashlib.sha1(repr((model_key, fingerprint, settings.INFERENCE_SIZE, tracker)).encode("utf-8")).hexdigest()[:12]
+    return f"{content[:32]}-{model_hash}"
+
+
+def save(log, key, size, tracker=None, track_conf=None):
+    """
+    Writes a finished detection log as a memory-mappable columnar index.
+    #把完成的偵測記錄寫成可記憶體映射的欄式索引。
+
+    Parameters:
+        log (result_cache.DetectionLog): The log of a fully processed video. #完整處理過的視頻的偵測記錄。
+        key (str): The key from index_key. #index_key 返回的鍵。
+        size (tuple): The (width, height) of the frames the boxes refer to. #框所對應的幀大小 (寬, 高)。
+        tracker (str): The tracker config, or None without tracking. #追蹤器配置，不追蹤時為 None。
+        track_conf (float): The threshold the tracker ran at; boxes below it were recorded with track ID -1.
+        #追蹤器使用的閾值；低於這個閾值的框以追蹤編號 -1 記錄。
+
+    Returns:
+        DetectionIndex: The saved index. #保存的索引。
+    """
+    directory = index_dir()
+    target = directory / key
+    if not target.exists():
+        columns = log.columns()
+        # 欄位按幀的順序排列，以二分搜尋一次求出每一幀的起始位置
+        offsets = np.searchsorted(columns["frame"], np.arange(log.frames + 1)).astype(np.int64)
+        staging = Path(tempfile.mkdtemp(prefix=_STAGING_PREFIX, dir=directory))
+        try:
+            for name, values in columns.items():
+                np.save(staging / f"{name}.npy", values)
+            np.save(staging / _OFFSETS_FILE, offsets)
+            meta = {
+                "frames": log.frames,
+                "fps": log.fps,
+                "names": {str(index): name for index, name in log.names.items()},
+                "size": list(size),
+                "tracker": tracker,
+                "track_conf": track_conf if tracker is not None else None,
+            }
+            (staging / _META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+            try:
+                os.replace(staging, target)  # 原子移動，其他會話不會看到寫了一半的索引
+            except OSError:
+                if not target.exists():
+                    raise  # 不是因為其他會話已經寫入了相同的索引
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    cleanup(keep=target)
+    return DetectionIndex(target)
+
+
+def open_index(key, size=None):
+    """
+    Returns the saved index for a key, or None when the video has not been fully analysed with this model.
+    #返回鍵對應的索引；這部視頻沒有以這個模型完整分析過時返回 None。
+
+    Parameters:
+        key (str): The key from index_key. #index_key 返回的鍵。
+        size (tuple): The expected (width, height) of the indexed frames; other sizes are treated as a miss.
+        #預期的索引幀大小 (寬, 高)，大小不同時視為沒有索引。
+    """
+    directory = index_dir() / key
+    if not (directory / _META_FILE).exists():
+        return None
+    index = DetectionIndex(directory)
+    if size is not None and tuple(index.size) != tuple(size):
+        return None
+    os.utime(directory)  # 更新使用時間，用於最近最少使用淘汰
+    return index
+
+
+def frame_ranges(frames):
+    """
+    Merges sorted frame indices into inclusive (first, last) ranges of consecutive frames.
+    #把排序好的幀序號合併成連續幀的 (第一幀, 最後一幀) 範圍（包含兩端）。
+    """
+    frames = np.asarray(frames)
+    if len(frames) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(frames) > 1)  # 不連續的位置
+    starts = np.concatenate(([frames[0]], frames[breaks + 1]))
+    ends = np.concatenate((frames[breaks], [frames[-1]]))
+    return [(int(start), int(end)) for start, end in zip(starts, ends)]
+
+
+class DetectionIndex:
+    """
+    Read-only, memory-mapped columnar detections of one analysed video.
+    #一部已分析視頻的唯讀、記憶體映射欄式偵測結果。
+
+    Parameters:
+        directory (pathlib.Path): The index directory written by save. #save 寫入的索引目錄。
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / _META_FILE).read_text(encoding="utf-8"))
+        self.frames = meta["frames"]  # 索引涵蓋的幀數
+        self.fps = meta["fps"]
+        self.names = {int(index): name for index, name in meta["names"].items()}
+        self.size = tuple(meta["size"])
+        self.tracker = meta["tracker"]
+        self.track_conf = meta.get("track_conf")  # 追蹤器使用的閾值，低於它的框沒有追蹤編號
+        self.offsets = self._load(_OFFSETS_FILE)
+        self.columns = {name: self._load(f"{name}.npy") for name in result_cache.COLUMNS}
+
+    def _load(self, filename):
+        path = self.directory / filename
+        try:
+            return np.load(path, mmap_mode="r")  # 只有實際存取的部分才會從磁碟讀入
+        except ValueError:
+            return np.load(path)  # 空的欄位無法映射
+
+    def rows(self, start, stop):
+        """
+        Returns the columns of frames start (inclusive) to stop (exclusive) as zero-copy slices.
+        #以不複製的切片返回第 start 幀（包含）到第 stop 幀（不包含）的欄位。
+        """
+        start = min(max(int(start), 0), self.frames)
+        stop = min(max(int(stop), start), self.frames)
+        begin, end = int(self.offsets[start]), int(self.offsets[stop])
+        return {name: values[begin:end] for name, values in self.columns.items()}
+
+    def result(self, frame_index, image, conf):
+        """
+        Rebuilds the Results of one frame from the index, filtered to a confidence threshold.
+        #從索引重建一幀的 Results，並過濾到信心閾值。
+
+        Parameters:
+            frame_index (int): The frame to replay. #要重播的幀。
+            image (numpy.ndarray): The decoded frame, resized like the indexed frames. #已解碼並縮放到索引大小的幀。
+            conf (float): The confidence threshold. #信心閾值。
+
+        Returns:
+            Results: The frame's boxes. With a tracker the ID column is always present, and boxes below track_conf
+            carry ID -1. #這一幀的框；追蹤的索引總是帶有編號欄位，低於 track_conf 的框編號為 -1。
+        """
+        rows = self.rows(frame_index, frame_index + 1)
+        mask = rows["conf"] >= conf
+        columns = [rows["xyxy"][mask]]
+        if self.tracker is not None:
+            # 追蹤的索引總是帶有編號欄位，Boxes 的格式為 (x1, y1, x2, y2, id, conf, cls)；低於 track_conf 的框編號為 -1
+            columns.append(rows["track_id"][mask, None])
+        columns += [rows["conf"][mask, None], rows["cls"][mask, None]]
+        boxes = np.concatenate([column.astype(np.float32) for column in columns], axis=1)
+        return Results(image, path="", names=self.names, boxes=torch.from_numpy(boxes))
+
+    def frames_with(self, class_ids, conf):
+        """
+        Returns the sorted frame indices containing any of the given classes at or above a confidence threshold.
+        #返回包含任一指定類別、信心度不低於閾值的幀序號（已排序）。
+        """
+        mask = np.isin(self.columns["cls"], list(class_ids)) & (self.columns["conf"] >= conf)  # 一次向量化遮罩
+        return np.unique(self.columns["frame"][mask])
+
+    def stats(self, conf):
+        """
+        Returns DetectionStats for the boxes at or above a confidence threshold.
+        #返回信心度不低於閾值的框的 DetectionStats。
+        """
+        mask = self.columns["conf"] >= conf
+        return detection_stats.DetectionStats.from_detections(
+            self.names, self.columns["frame"][mask], self.columns["cls"][mask], self.frames, fps=self.fps
+        )
+
+
+def cleanup(keep=None, quota_mb=None):
+    """
+    Deletes least recently used indexes until the index directory fits its quota.
+    #從最久沒有使用的索引開始刪除，直到索引目錄不超過容量上限。
+
+    Parameters:
+        keep (pathlib.Path): An index that must not be deleted, e.g. the one just written. #不能刪除的索引。
+        quota_mb (float): Maximum total size, defaults to settings.DETECTION_INDEX_QUOTA_MB. #總大小上限（MB）。
+
+    Returns:
+        list: The deleted index directories. #被刪除的索引目錄。
+    """
+    quota = (quota_mb or settings.DETECTION_INDEX_QUOTA_MB) * 1024 * 1024
+    indexes = [
+        directory for directory in index_dir().iterdir()
+        if directory.is_dir() and not directory.name.startswith(_STAGING_PREFIX)  # 略過其他會話正在寫入的索引
+    ]
+    return disk_quota.evict_oldest(indexes, quota, keep=[keep] if keep else ())
@@ -0,0 +1,162 @@
+#這段代碼實現了固定記憶體的串流偵測統計（Streaming Detection Statistics）。
+#原本 VideoDetector、YouTubeDetector 和 WebcamDetector 會把每一幀的 res[0].boxes.cls 追加到
+#detected_objects_summary_list（網絡攝像頭還保存在 st.session_state 中），
+#長時間的攝像頭會話會讓這個列表無限增長，並持有上千個小張量，最後 helper.sum_detections 只用它算出一組名稱。
+#這個模組的主要功能如下：
+
+#固定大小的 NumPy 陣列：
+
+#每個類別的偵測總數、出現過該類別的幀數、同一幀中的最大數量，以及按分鐘統計的直方圖，
+#全部存放在大小固定的陣列中，每一幀只做一次向量化的 bincount，記憶體用量不隨時間增長。
+
+#按分鐘的直方圖：
+
+#以環形緩衝區保存最近 settings.STATS_HISTORY_MINUTES 分鐘每個類別的偵測數。
+#視頻文件使用視頻時間（幀序號 / 幀率），即時來源使用實際經過的時間。
+
+
+import time  # 導入 time 模組，用於即時來源的計時
+
+import numpy as np  # 導入 numpy，用於固定大小的統計陣列
+
+import settings  # 導入 settings 模組，包含統計相關的配置
+
+
+def as_index_array(values):
+    """Converts a tensor, array or list of class indices or track IDs to a 1-D int64 NumPy array."""
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values, dtype=np.int64).reshape(-1)
+
+
+class DetectionStats:
+    """
+    Constant-memory per-class detection statistics for a stream of frames.
+    #一個幀串流的固定記憶體、按類別的偵測統計。
+
+    Parameters:
+        names (dict): The model's class index -> name mapping (model.names). #模型的類別索引到名稱的對應。
+        fps (float): Frame rate of a video file; None or 0 uses wall-clock time (live sources).
+        #視頻文件的幀率；None 或 0 表示使用實際時間（即時來源）。
+        history_minutes (int): Number of minutes kept in the per-minute histogram. #按分鐘直方圖保留的分鐘數。
+        start_frame (int): Video frame index of the first update, e.g. the start of a replayed range.
+        #第一次 update 對應的視頻幀序號，例如重播範圍的起始幀。
+    """
+
+    def __init__(self, names, fps=None, history_minutes=None, start_frame=0):
+        self.names = dict(names)
+        self.fps = fps or None
+        self.start_frame = start_frame
+        num_classes = max(self.names) + 1 if self.names else 0
+        history_minutes = history_minutes or settings.STATS_HISTORY_MINUTES
+        self.counts = np.zeros(num_classes, dtype=np.int64)  # 每個類別的偵測總數
+        self.frames_with = np.zeros(num_classes, dtype=np.int64)  # 出現過該類別的幀數
+        self.max_simultaneous = np.zeros(num_classes, dtype=np.int64)  # 同一幀中該類別的最大數量
+        self.minute_counts = np.zeros((history_minutes, num_classes), dtype=np.int64)  # 環形緩衝區：每分鐘每個類別的偵測數
+        self._minute_ids = np.full(history_minutes, -1, dtype=np.int64)  # 每個槽位目前保存的是第幾分鐘
+        self.frames = 0  # 已處理的幀數
+        self._start = time.monotonic()
+
+    def _current_minute(self):
+        if self.fps:
+            return int((self.start_frame + self.frames) / self.fps // 60)  # 視頻時間
+        return int((time.monotonic() - self._start) // 60)  # 實際經過的時間
+
+    def update(self, classes):
+        """
+        Adds one frame's detections.
+        #加入一幀的偵測結果。
+
+        Parameters:
+            classes: The frame's class indices, e.g. res[0].boxes.cls. #這一幀的類別索引。
+        """
+        per_class = np.bincount(as_index_array(classes), minlength=len(self.counts))[: len(self.counts)]
+        self.counts += per_class
+        self.frames_with += per_class > 0
+        np.maximum(self.max_simultaneous, per_class, out=self.max_simultaneous)
+
+        minute = self._current_minute()
+        slot = minute % len(self._minute_ids)
+        if self._minute_ids[slot] != minute:
+            self.minute_counts[slot] = 0  # 這個槽位保存的是更早的分鐘，清空後重用
+            self._minute_ids[slot] = minute
+        self.minute_counts[slot] += per_class
+        self.frames += 1
+
+    @classmethod
+    def from_detections(cls, names, frames, classes, frame_count, fps=None, history_minutes=None):
+        """
+        Builds statistics in one vectorized pass from columnar detections.
+        #以欄式的偵測記錄一次向量化地建立統計。
+
+        Parameters:
+            names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+            frames (numpy.ndarray): The frame index of every box. #每個框的幀序號。
+            classes (numpy.ndarray): The class index of every box. #每個框的類別索引。
+            frame_count (int): Total frames, including frames without boxes. #總幀數（包含沒有框的幀）。
+            fps (float): Frame rate of the video. #視頻的幀率。
+            history_minutes (int): Number of minutes kept in the per-minute histogram. #按分鐘直方圖保留的分鐘數。
+
+        Returns:
+            DetectionStats: The same statistics update() would have accumulated frame by frame. #與逐幀 update() 相同的統計。
+        """
+        stats = cls(names, fps=fps, history_minutes=history_minutes)
+        num_classes = len(stats.counts)
+        frames = as_index_array(frames)
+        classes = as_index_array(classes)
+        stats.counts = np.bincount(classes, minlength=num_classes)[:num_classes]
+        pairs, per_frame = np.unique(frames * num_classes + classes, return_counts=True)  # 每一幀每個類別的數量
+        pair_classes = pairs % num_classes if num_classes else pairs
+        stats.frames_with = np.bincount(pair_classes, minlength=num_classes)[:num_classes]
+        np.maximum.at(stats.max_simultaneous, pair_classes, per_frame)
+        stats.frames = int(frame_count)
+        if stats.fps and stats.frames:
+            history = len(stats._minute_ids)
+            last = int((stats.frames - 1) / stats.fps // 60)  # 最後一幀所在的分鐘，結尾幾分鐘可能沒有任何偵測
+            window = np.arange(max(0, last - history + 1), last + 1)
+            stats._minute_ids[window % history] = window  # 與逐幀 update() 相同，沒有偵測的分鐘也佔用槽位
+            minutes = (frames / stats.fps // 60).astype(np.int64)
+            recent = minutes > last - history  # 只保留最近的分鐘，與環形緩衝區相同
+            np.add.at(stats.minute_counts, (minutes[recent] % history, classes[recent]), 1)
+        return stats
+
+    def update_from_result(self, result):
+        """
+        Adds one frame's detections from an ultralytics Results object.
+        #從 ultralytics 的 Results 物件加入一幀的偵測結果。
+        """
+        self.update(result.boxes.cls if result.boxes is not None else [])
+
+    def summary(self):
+        """
+        Returns per-class rows for every class that was detected, most frequent first.
+        #返回每個被偵測到的類別的統計行，按偵測數由多到少排序。
+
+        Returns:
+            list of dict: name, detections, frames and max_simultaneous for each detected class.
+            #每個類別的名稱、偵測數、幀數和同一幀最大數量。
+        """
+        detected = np.flatnonzero(self.counts)
+        order = detected[np.argsort(-self.counts[detected], kind="stable")]
+        return [
+            {
+                "name": self.names.get(int(index), str(index)),
+                "detections": int(self.counts[index]),
+                "frames": int(self.frames_with[index]),
+                "max_simultaneous": int(self.max_simultaneous[index]),
+            }
+            for index in order
+        ]
+
+    def minute_histogram(self):
+        """
+        Returns the per-minute histogram in chronological order.
+        #按時間順序返回按分鐘的直方圖。
+
+        Returns:
+            tuple (numpy.ndarray, numpy.ndarray): (minute indices, counts of shape (minutes, classes)).
+            #(分鐘序號, 形狀為 (分鐘數, 類別數) 的偵測數)。
+        """
+        valid = np.flatnonzero(self._minute_ids >= 0)
+        order = valid[np.argsort(self._minute_ids[valid])]
+        return self._minute_ids[order], self.minute_counts[order]
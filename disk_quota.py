@@ -0,0 +1,75 @@
+#這段代碼實現了本機快取目錄共用的容量淘汰（Disk Quota Eviction）。
+#偵測索引、YouTube 下載快取、上傳暫存區和標註視頻的導出目錄都有各自的容量上限，
+#它們的淘汰方式相同，因此集中在這裡實現一次。這個模組的主要功能如下：
+
+#按最後使用時間淘汰：
+
+#以修改時間排序（快取命中時各模組會更新修改時間），從最久沒有使用的項目開始刪除，直到總大小不超過上限；
+#也可以另外指定最長保留時間，超過的項目不論容量都會刪除。文件和目錄（例如偵測索引）都可以淘汰。
+
+#保留正在使用的項目：
+
+#keep 中的路徑計入總大小但不會被刪除，例如剛寫入的文件或其他會話正在下載的影片。
+#無法刪除的項目（例如 Windows 上其他會話正在讀取的文件）會被略過，留到下一次淘汰。
+
+
+import shutil  # 導入 shutil 模組，用於刪除目錄
+import time  # 導入 time 模組，用於計算保留時間
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+
+def path_size(path):
+    """
+    Returns the size of a file, or the total size of the files under a directory, in bytes.
+    #返回文件的大小，或目錄中所有文件的總大小（位元組）。
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+    return path.stat().st_size
+
+
+def evict_oldest(paths, quota_bytes, keep=(), max_age_seconds=None):
+    """
+    Deletes the least recently used files or directories until the rest fit a size quota.
+    #從最久沒有使用的文件或目錄開始刪除，直到剩下的不超過容量上限。
+
+    Parameters:
+        paths (iterable): The cached files or directories, e.g. the entries of a cache directory. #快取的文件或目錄。
+        quota_bytes (float): Maximum total size in bytes. #總大小上限（位元組）。
+        keep (iterable): Paths that count towards the total but must not be deleted. #計入總大小但不能刪除的路徑。
+        max_age_seconds (float): When given, entries unused for longer are deleted even under the quota.
+            #提供時，超過這個時間沒有使用的項目即使沒有超過容量也會刪除。
+
+    Returns:
+        list: The deleted paths, oldest first. #被刪除的路徑，最舊的在前。
+    """
+    keep = {Path(path) for path in keep}
+    now = time.time()
+    entries = []
+    for path in paths:
+        path = Path(path)
+        try:
+            entries.append((path.stat().st_mtime, path_size(path), path))
+        except OSError:
+            continue  # 已經被其他會話刪除
+    entries.sort(key=lambda entry: entry[0])  # 最久沒有使用的在前
+
+    total = sum(size for _, size, _ in entries)
+    deleted = []
+    for mtime, size, path in entries:
+        expired = max_age_seconds is not None and now - mtime > max_age_seconds
+        if total <= quota_bytes and not expired:
+            break  # 之後的項目都更新，也不會過期
+        if path in keep:
+            continue
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except OSError:
+            continue  # 例如 Windows 上其他會話正在讀取，下一次再刪除
+        total -= size
+        deleted.append(path)
+    return deleted
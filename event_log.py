@@ -0,0 +1,455 @@
+#這段代碼實現了以 SQLite 保存的偵測和違規事件記錄（Detection Event Log）。
+#原本應用偵測到的內容都不會保存，會話結束後就無法回答「上週 3 號攝像頭有幾次違規」這類問題。
+#這個模組的主要功能如下：
+
+#按秒匯總的事件：
+
+#EventSink 由各個偵測循環逐幀餵入結果，在記憶體中以 np.bincount 按 settings.EVENT_LOG_BUCKET_SECONDS 秒累積
+#每個類別的偵測數和同一幀中的最大數量，每個時間桶每個類別只寫一行；防護裝備規則的違規也按時間桶匯總，
+#啟用追蹤器時每個防抖後的違規另外寫成一行（含軌跡編號和持續幀數）。長時間的攝像頭也只會產生有限的行數。
+
+#背景寫入線程：
+
+#所有會話共用一個寫入線程，資料庫使用 WAL 模式（讀取的歷史頁面不會阻塞寫入），
+#寫入線程一次取出佇列中最多 settings.EVENT_LOG_BATCH_ROWS 行，在同一個交易中 executemany 寫入。
+#偵測循環只以 put_nowait 放入佇列，佇列已滿時丟棄並計數，永遠不會等待磁碟。
+
+#索引和查詢：
+
+#偵測和違規表都建立 (時間)、(來源, 時間)、(類別或規則, 時間) 的索引，
+#歷史頁面的查詢都帶時間範圍並在 SQL 中彙總，資料有數百萬行時也只掃描索引範圍內的行。
+#超過 settings.EVENT_LOG_RETENTION_DAYS 天的事件在寫入線程啟動時刪除。
+
+#RTSP 網址中的帳號密碼不會寫入資料庫。
+
+
+import queue  # 導入 queue 模組，用於寫入線程的佇列
+import sqlite3  # 導入 sqlite3 模組，用於本機事件資料庫
+import threading  # 導入 threading 模組，用於背景寫入
+import time  # 導入 time 模組，用於事件時間和批次等待
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+from urllib.parse import urlsplit, urlunsplit  # 導入網址解析函數，用於移除網址中的帳號密碼
+
+import numpy as np  # 導入 numpy，用於按類別累積時間桶
+
+import settings  # 導入 settings 模組，包含事件記錄相關的配置
+from detection_stats import as_index_array  # 導入索引陣列的轉換函數
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS detections (
+    ts REAL NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    class_name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    max_in_frame INTEGER NOT NULL,
+    video_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections(ts);
+CREATE INDEX IF NOT EXISTS idx_detections_source_ts ON detections(source_id, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_class_ts ON detections(class_name, ts);
+CREATE TABLE IF NOT EXISTS violations (
+    ts REAL NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    rule TEXT NOT NULL,
+    track_id INTEGER,
+    persons INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    video_s REAL
+);
+CREATE INDEX IF NOT EXISTS idx_violations_ts ON violations(ts);
+CREATE INDEX IF NOT EXISTS idx_violations_source_ts ON violations(source_id, ts);
+CREATE INDEX IF NOT EXISTS idx_violations_rule_ts ON violations(rule, ts);
+"""  # 時間以 Unix 秒保存；track_id 為 NULL 的違規行是時間桶匯總，不為 NULL 的是一條軌跡的違規
+
+_INSERTS = {
+    "detections": "INSERT INTO detections (ts, source_id, class_name, count, max_in_frame, video_s) VALUES (?, ?, ?, ?, ?, ?)",
+    "violations": "INSERT INTO violations (ts, source_id, rule, track_id, persons, frames, video_s) VALUES (?, ?, ?, ?, ?, ?, ?)",
+}  # 每一行的第二個值是來源名稱，寫入時才換成來源編號
+
+
+def source_name(source):
+    """
+    Returns the name a source is logged under, without the credentials of stream URLs.
+    #返回來源在記錄中的名稱，串流網址中的帳號密碼會被移除。
+    """
+    source = str(source)
+    parts = urlsplit(source)
+    if parts.scheme and "@" in parts.netloc:
+        parts = parts._replace(netloc=parts.netloc.rsplit("@", 1)[1])  # rtsp://帳號:密碼@主機 -> rtsp://主機
+        return urlunsplit(parts)
+    return source
+
+
+def connect(path=None, readonly=False):
+    """
+    Opens the event database; read-only connections are used by the history page.
+    #打開事件資料庫；歷史頁面使用唯讀連接。
+    """
+    path = Path(path or settings.EVENT_LOG_DB)
+    if readonly:
+        return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path), check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")  # 讀取不阻塞寫入
+    connection.execute("PRAGMA synchronous=NORMAL")  # WAL 模式下只在檢查點同步，批次寫入更快
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class EventWriter:
+    """
+    A background thread that writes queued event rows to SQLite in batched transactions.
+    #在背景線程中以批次交易把佇列中的事件寫入 SQLite。
+
+    Parameters:
+        path (str): The database file, defaults to settings.EVENT_LOG_DB. #資料庫文件。
+        queue_size (int): Maximum number of row groups waiting to be written. #等待寫入的最大批數。
+        batch_rows (int): Maximum rows per transaction. #每個交易的最大行數。
+        flush_seconds (float): Maximum time rows wait to be batched with later ones. #行等待合併寫入的最長秒數。
+    """
+
+    def __init__(self, path=None, queue_size=None, batch_rows=None, flush_seconds=None):
+        self.path = Path(path or settings.EVENT_LOG_DB)
+        self.batch_rows = batch_rows or settings.EVENT_LOG_BATCH_ROWS
+        self.flush_seconds = settings.EVENT_LOG_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._queue = queue.Queue(maxsize=queue_size or settings.EVENT_LOG_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.error = None  # 寫入線程中發生的錯誤
+        self.rows_written = 0  # 已寫入的行數
+        self.rows_dropped = 0  # 佇列已滿時丟棄的行數
+
+    def start(self):
+        """
+        Starts the writer thread. Returns self.
+        #啟動寫入線程，並返回自身。
+        """
+        self._thread.start()
+        return self
+
+    def is_alive(self):
+        """
+        Returns True while the writer thread is running.
+        #寫入線程仍在執行時返回 True。
+        """
+        return self._thread.is_alive()
+
+    def put(self, table, rows, source, kind):
+        """
+        Queues rows for a table without waiting. Returns False when they were dropped.
+        #不等待地把一個表的多行放入佇列；被丟棄時返回 False。
+
+        Parameters:
+            table (str): "detections" or "violations". #表名。
+            rows (list): Tuples in the table's column order, with the source name in place of source_id.
+            #按表的欄位順序排列的元組，source_id 的位置放來源名稱。
+            source (str): The source name. #來源名稱。
+            kind (str): The source kind, e.g. "rtsp". #來源類型。
+        """
+        if not rows:
+            return True
+        try:
+            self._queue.put_nowait((table, rows, source, kind))
+            return True
+        except queue.Full:
+            self.rows_dropped += len(rows)  # 寫入跟不上時丟棄，而不是讓偵測循環等待
+            return False
+
+    def _run(self):
+        try:
+            connection = connect(self.path)
+            connection.execute(
+                "DELETE FROM detections WHERE ts < ?", (time.time() - settings.EVENT_LOG_RETENTION_DAYS * 86400,)
+            )
+            connection.execute(
+                "DELETE FROM violations WHERE ts < ?", (time.time() - settings.EVENT_LOG_RETENTION_DAYS * 86400,)
+            )  # 刪除超過保留天數的事件
+            connection.commit()
+        except sqlite3.Error as ex:
+            self.error = ex
+            return
+        source_ids = {}  # 來源名稱 -> 來源編號
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0][1])
+            deadline = time.monotonic() + self.flush_seconds
+            while count < self.batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)  # 繼續收集，與之後的行合成一個交易
+                except queue.Empty:
+                    break
+                batch.append(item)
+                count += len(item[1])
+            try:
+                with connection:  # 一個批次一個交易
+                    for table, rows, source, kind in batch:
+                        source_id = source_ids.get(source)
+                        if source_id is None:
+                            connection.execute("INSERT OR IGNORE INTO sources (name, kind) VALUES (?, ?)", (source, kind))
+                            source_id = source_ids[source] = connection.execute(
+                                "SELECT id FROM sources WHERE name = ?", (source,)
+                            ).fetchone()[0]
+                        connection.executemany(_INSERTS[table], [row[:1] + (source_id,) + row[2:] for row in rows])
+                self.rows_written += count
+            except sqlite3.Error as ex:
+                self.error = ex  # 例如磁碟已滿；保留錯誤，繼續處理之後的批次
+                self.rows_dropped += count
+                source_ids.clear()  # 交易已回滾，新加入的來源編號可能不存在
+
+
+class EventSink:
+    """
+    Aggregates one source's detections and violations into time buckets and hands them to the writer.
+    #把一個來源的偵測和違規匯總成時間桶，再交給寫入線程。
+
+    Parameters:
+        writer (EventWriter): The shared writer. #共享的寫入線程。
+        source (str): The video path or stream URL. #視頻路徑或串流網址。
+        kind (str): The source kind, e.g. "video", "youtube", "webcam" or "rtsp". #來源類型。
+        names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+        fps (float): Frame rate of a video file, whose events are timed from the start of the run plus video
+            time; None or 0 for live sources, which use wall-clock time.
+            #視頻文件的幀率，事件時間為開始執行的時間加上視頻時間；即時來源為 None 或 0，使用實際時間。
+        bucket_seconds (float): Length of an aggregation bucket. #匯總時間桶的長度（秒）。
+    """
+
+    def __init__(self, writer, source, kind, names, fps=None, bucket_seconds=None):
+        self.writer = writer
+        self.source = source_name(source)
+        self.kind = kind
+        self.names = dict(names)
+        self.fps = fps or None
+        self.bucket_seconds = bucket_seconds or settings.EVENT_LOG_BUCKET_SECONDS
+        self.started = time.time()
+        self._lock = threading.Lock()  # 偵測在腳本線程中記錄，違規在標註線程中記錄
+        num_classes = max(self.names) + 1 if self.names else 0
+        self._detections = _Bucket(num_classes)
+        self._violations = None  # 第一次記錄違規時按規則數建立
+        self._rule_names = ()
+
+    def _clock(self, frame):
+        if self.fps:
+            return self.started + frame / self.fps, frame / self.fps  # 視頻時間
+        return time.time(), None
+
+    def record(self, result):
+        """
+        Adds one frame's detections.
+        #加入一幀的偵測結果。
+        """
+        boxes = result.boxes
+        self.record_classes(as_index_array(boxes.cls) if boxes is not None else np.zeros(0, dtype=np.int64))
+
+    def record_rows(self, rows):
+        """
+        Adds one frame of output rows, e.g. a frame of the merged timeline from video_segments.iter_timeline.
+        #加入一幀的輸出行，例如 video_segments.iter_timeline 合併後的時間軸上的一幀。
+        """
+        self.record_classes(np.array([row["class_id"] for row in rows], dtype=np.int64))
+
+    def record_classes(self, classes):
+        """
+        Adds one frame's detected class indices.
+        #加入一幀偵測到的類別索引。
+        """
+        per_class = np.bincount(classes, minlength=self._detections.size)[: self._detections.size]
+        with self._lock:
+            ts, video_s = self._clock(self._detections.frames)
+            self._flush(self._detections.add(per_class, ts, video_s, self.bucket_seconds), "detections")
+
+    def record_violations(self, rule_names, counts):
+        """
+        Adds one frame's number of violating persons per rule (called by ppe_rules.ComplianceMonitor).
+        #加入一幀每條規則的違規人數（由 ppe_rules.ComplianceMonitor 呼叫）。
+        """
+        with self._lock:
+            if self._violations is None:
+                self._violations, self._rule_names = _Bucket(len(rule_names)), tuple(rule_names)
+            ts, video_s = self._clock(self._violations.frames)
+            self._flush(self._violations.add(counts, ts, video_s, self.bucket_seconds), "violations")
+
+    def record_violation_event(self, rule_name, track_id, first_frame, last_frame):
+        """
+        Writes one debounced per-track violation (called by ppe_rules.ComplianceMonitor when it ends).
+        #寫入一個防抖後的逐軌跡違規（由 ppe_rules.ComplianceMonitor 在違規結束時呼叫）。
+        """
+        frames = last_frame - first_frame + 1
+        if self.fps:
+            ts, video_s = self._clock(first_frame)
+        else:
+            ts, video_s = time.time(), None  # 即時來源記錄違規結束的時間
+        self.writer.put("violations", [(ts, self.source, rule_name, int(track_id), 1, frames, video_s)], self.source, self.kind)
+
+    def _flush(self, closed, table):
+        if closed is None:
+            return
+        ts, video_s, totals, maxima, frames = closed
+        if table == "detections":
+            rows = [
+                (ts, self.source, self.names.get(index, str(index)), int(totals[index]), int(maxima[index]), video_s)
+                for index in np.flatnonzero(totals)
+            ]
+        else:
+            rows = [
+                (ts, self.source, self._rule_names[index], None, int(maxima[index]), int(frames[index]), video_s)
+                for index in np.flatnonzero(totals)
+            ]
+        self.writer.put(table, rows, self.source, self.kind)
+
+    def close(self):
+        """
+        Writes the buckets still open at the end of the run.
+        #寫入執行結束時仍未寫入的時間桶。
+        """
+        with self._lock:
+            self._flush(self._detections.close(), "detections")
+            if self._violations is not None:
+                self._flush(self._violations.close(), "violations")
+
+
+class _Bucket:
+    """Per-index totals, per-frame maxima and frames-with counts of the current time bucket."""
+
+    def __init__(self, size):
+        self.size = size
+        self.totals = np.zeros(size, dtype=np.int64)
+        self.maxima = np.zeros(size, dtype=np.int64)
+        self.frames_with = np.zeros(size, dtype=np.int64)
+        self.bucket = None  # 目前時間桶的編號
+        self.start = None  # 目前時間桶的 (時間, 視頻時間)
+        self.frames = 0  # 已加入的幀數
+
+    def add(self, counts, ts, video_s, bucket_seconds):
+        """Adds one frame; returns the previous bucket when this frame starts a new one, otherwise None."""
+        bucket = int(ts // bucket_seconds)
+        closed = self.close() if bucket != self.bucket else None
+        if self.bucket is None:
+            self.bucket, self.start = bucket, (ts, video_s)
+        counts = np.asarray(counts, dtype=np.int64)
+        self.totals += counts
+        np.maximum(self.maxima, counts, out=self.maxima)
+        self.frames_with += counts > 0
+        self.frames += 1
+        return closed
+
+    def close(self):
+        """Returns the current bucket as (ts, video_s, totals, maxima, frames_with) and starts an empty one."""
+        if self.bucket is None:
+            return None
+        closed = (*self.start, self.totals, self.maxima, self.frames_with)
+        self.totals = np.zeros(self.size, dtype=np.int64)
+        self.maxima = np.zeros(self.size, dtype=np.int64)
+        self.frames_with = np.zeros(self.size, dtype=np.int64)
+        self.bucket = self.start = None
+        return closed
+
+
+def _where(start, end, source_ids=None, column=None, values=None):
+    """Builds a WHERE clause over a time range, optional sources and optional values of one column."""
+    clauses, params = ["ts >= ?", "ts < ?"], [start, end]  # 時間範圍總是存在，查詢只掃描索引範圍內的行
+    if source_ids:
+        clauses.append(f"source_id IN ({', '.join('?' * len(source_ids))})")
+        params.extend(source_ids)
+    if column and values:
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return " AND ".join(clauses), params
+
+
+def list_sources(connection):
+    """
+    Returns (id, name, kind) of every logged source.
+    #返回每個有記錄的來源的 (編號, 名稱, 類型)。
+    """
+    return connection.execute("SELECT id, name, kind FROM sources ORDER BY name").fetchall()
+
+
+def class_names(connection, start, end, source_ids=None):
+    """
+    Returns the class names detected in a time range.
+    #返回時間範圍內偵測到的類別名稱。
+    """
+    where, params = _where(start, end, source_ids)
+    return [row[0] for row in connection.execute(f"SELECT DISTINCT class_name FROM detections WHERE {where} ORDER BY 1", params)]
+
+
+def detection_totals(connection, start, end, source_ids=None, classes=None):
+    """
+    Returns (class_name, detections, max_in_frame) per class in a time range, most detected first.
+    #返回時間範圍內每個類別的 (類別名稱, 偵測數, 同一幀中的最大數量)，偵測數多的在前。
+    """
+    where, params = _where(start, end, source_ids, "class_name", classes)
+    return connection.execute(
+        f"SELECT class_name, SUM(count), MAX(max_in_frame) FROM detections WHERE {where} GROUP BY class_name ORDER BY 2 DESC",
+        params,
+    ).fetchall()
+
+
+def detection_series(connection, start, end, step, source_ids=None, classes=None, utc_offset=0):
+    """
+    Returns (bucket_start, class_name, detections) rows aggregated into buckets of step seconds.
+    #返回按 step 秒匯總的 (時間桶開始時間, 類別名稱, 偵測數)。
+
+    Parameters:
+        utc_offset (float): Local offset from UTC in seconds, so day buckets follow local dates. #本地時區與 UTC 的秒數差，按天匯總時以本地日期分組。
+    """
+    where, params = _where(start, end, source_ids, "class_name", classes)
+    return connection.execute(
+        f"SELECT CAST((ts + ?) / ? AS INTEGER) * ? - ? AS bucket, class_name, SUM(count) FROM detections WHERE {where} "
+        "GROUP BY bucket, class_name ORDER BY bucket",
+        [utc_offset, step, step, utc_offset] + params,
+    ).fetchall()
+
+
+def violation_totals(connection, start, end, source_ids=None, rules=None):
+    """
+    Returns (source, rule, violating_frames, max_persons, tracked_violations) per source and rule in a time range.
+    #返回時間範圍內每個來源和規則的 (來源, 規則, 有違規的幀數, 同一幀中的最多違規人數, 逐軌跡違規數)。
+    """
+    where, params = _where(start, end, source_ids, "rule", rules)
+    return connection.execute(
+        "SELECT sources.name, rule, "
+        "SUM(CASE WHEN track_id IS NULL THEN frames ELSE 0 END), "
+        "MAX(CASE WHEN track_id IS NULL THEN persons ELSE 0 END), "
+        "SUM(track_id IS NOT NULL) "
+        f"FROM violations JOIN sources ON sources.id = violations.source_id WHERE {where} "
+        "GROUP BY source_id, rule ORDER BY 3 DESC",
+        params,
+    ).fetchall()
+
+
+def violation_events(connection, start, end, source_ids=None, rules=None, limit=None):
+    """
+    Returns the latest per-track violations as (ts, source, rule, track_id, frames, video_s), newest first.
+    #返回最近的逐軌跡違規 (時間, 來源, 規則, 軌跡編號, 持續幀數, 視頻時間)，最新的在前。
+    """
+    where, params = _where(start, end, source_ids, "rule", rules)
+    return connection.execute(
+        "SELECT ts, sources.name, rule, track_id, frames, video_s "
+        f"FROM violations JOIN sources ON sources.id = violations.source_id WHERE {where} AND track_id IS NOT NULL "
+        "ORDER BY ts DESC LIMIT ?",
+        params + [limit or settings.EVENT_LOG_QUERY_LIMIT],
+    ).fetchall()
+
+
+_writer = None  # 全進程共享的寫入線程
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """
+    Returns the process-wide event writer, starting (or restarting) its thread when needed.
+    #返回全進程共享的事件寫入線程，需要時啟動（或重新啟動）。
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = EventWriter().start()
+        return _writer
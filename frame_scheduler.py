@@ -0,0 +1,137 @@
+#這段代碼實現了一個根據推論耗時自動調整的跳幀排程器（Adaptive Frame-Stride Scheduler）。
+#對於網絡攝像頭和 RTSP 這類即時來源，在 CPU 上對每一幀都呼叫 model.predict 是跟不上的。
+#這個模組的主要功能如下：
+
+#量測推論耗時：
+
+#以指數移動平均記錄每次推論的耗時。
+
+#選擇要推論的幀：
+
+#根據目標的即時幀率計算步長（stride）：每隔 stride 幀才推論一次，使推論的總耗時不超過即時播放允許的時間。
+#推論變慢時步長自動增大，變快時自動減小。
+
+#沿用上一次的結果：
+
+#沒有被推論的幀會沿用上一次的偵測結果（包括追蹤 ID）畫在新的幀上。
+#使用追蹤器時，被跳過的幀不會更新追蹤器，因此追蹤器的 track_buffer 是以推論過的幀計算的，
+#短暫的跳幀不會讓追蹤目標被判定為消失。
+
+#提供統計數據：
+
+#提供實際的推論幀率和跳幀比例，方便操作人員評估硬體需求。
+
+
+import collections  # 導入 collections 模組，用於滑動窗口
+import copy  # 導入 copy 模組，用於複製偵測結果
+import math  # 導入 math 模組，用於計算步長
+import time  # 導入 time 模組，用於計時
+
+import settings  # 導入 settings 模組，包含即時來源的目標幀率
+
+
+def carry_forward(result, frame):
+    """
+    Returns a copy of a previous result that draws onto a new frame.
+    #返回上一次結果的副本，並讓它畫在新的幀上。
+
+    Parameters:
+        result (ultralytics.engine.results.Results): The last inferred result. #上一次推論的結果。
+        frame (numpy.ndarray): The new frame, same size as the inferred one. #新的幀，大小與推論的幀相同。
+
+    Returns:
+        ultralytics.engine.results.Results: A shallow copy sharing the boxes of the previous result.
+        #與上一次結果共用邊界框的淺層副本。
+    """
+    carried = copy.copy(result)
+    carried.orig_img = frame  # plot() 會把邊界框畫在 orig_img 上
+    return carried
+
+
+class AdaptiveStrideScheduler:
+    """
+    Chooses which frames to infer so that a target real-time frame rate is held.
+    #選擇要推論的幀，使畫面能維持目標的即時幀率。
+
+    Parameters:
+        target_fps (float): The frame rate the display should keep up with. #畫面需要維持的幀率。
+        max_stride (int): Never skip more than max_stride - 1 frames in a row. #最多連續跳過 max_stride - 1 幀。
+        smoothing (float): Weight of the newest sample in the latency moving average. #最新樣本在移動平均中的權重。
+        window (int): Number of recent frames used for the reported rates. #計算統計數據時使用的最近幀數。
+    """
+
+    def __init__(self, target_fps=None, max_stride=None, smoothing=0.2, window=120):
+        self.target_fps = target_fps or settings.LIVE_TARGET_FPS
+        self.max_stride = max_stride or settings.LIVE_MAX_STRIDE
+        self.smoothing = smoothing
+        self.latency = None  # 推論耗時的指數移動平均（秒）
+        self.stride = 1  # 目前的步長
+        self.frames_seen = 0  # 已處理的幀數
+        self.frames_inferred = 0  # 已推論的幀數
+        self._since_last = None  # 距離上一次推論經過的幀數
+        self._recent = collections.deque(maxlen=window)  # 最近幀的 (時間, 是否推論)
+
+    def should_infer(self):
+        """
+        Decides whether the next frame should be inferred, and counts it.
+        #決定下一幀是否需要推論，並將它計入統計。
+
+        Returns:
+            bool: True to run the model, False to carry the last result forward.
+            #True 表示執行模型，False 表示沿用上一次的結果。
+        """
+        self.frames_seen += 1
+        infer = self._since_last is None or self._since_last + 1 >= self.stride
+        if infer:
+            self._since_last = 0
+            self.frames_inferred += 1
+        else:
+            self._since_last += 1
+        self._recent.append((time.monotonic(), infer))
+        return infer
+
+    def record(self, seconds):
+        """
+        Records the cost of one inference and updates the stride.
+        #記錄一次推論的耗時並更新步長。
+
+        Parameters:
+            seconds (float): Wall-clock time of the inference call. #推論所花的時間。
+        """
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+        # 每 stride 幀推論一次，推論耗時必須小於 stride 幀的播放時間
+        self.stride = min(self.max_stride, max(1, math.ceil(self.latency * self.target_fps)))
+
+    def infer_fps(self):
+        """
+        Returns the effective number of inferred frames per second over the recent window.
+        #返回最近窗口內實際每秒推論的幀數。
+        """
+        if len(self._recent) < 2:
+            return 0.0
+        elapsed = self._recent[-1][0] - self._recent[0][0]
+        inferred = sum(1 for _, infer in self._recent if infer)
+        return inferred / elapsed if elapsed > 0 else 0.0
+
+    def skip_ratio(self):
+        """
+        Returns the fraction of recent frames that reused the previous result.
+        #返回最近沿用上一次結果的幀所佔的比例。
+        """
+        if not self._recent:
+            return 0.0
+        return sum(1 for _, infer in self._recent if not infer) / len(self._recent)
+
+    def status_text(self):
+        """
+        Returns a one-line summary for display.
+        #返回一行用於顯示的摘要。
+        """
+        latency = 0.0 if self.latency is None else self.latency * 1000
+        return (
+            f"inference {self.infer_fps():.1f} FPS, skipped {self.skip_ratio():.0%}, "
+            f"stride {self.stride}, latency {latency:.0f} ms"
+        )
@@ -0,0 +1,310 @@
+#這段代碼實現了所有會話共用的推論工作進程（Shared Inference Service）。
+#原本每個 Streamlit 會話都在伺服器進程中各自呼叫 model.predict / model.track，
+#共享模型上的 track(..., persist=True) 會讓追蹤狀態在會話之間洩漏，多位管理人員同時打開應用時各個請求互相爭奪 CPU 線程。
+#這個模組的主要功能如下：
+
+#獨立的推論進程：
+
+#一個以 spawn 啟動的工作進程透過模型註冊表載入模型，所有會話都把幀放入同一個請求佇列，
+#推論只在這個進程中進行，伺服器進程只負責解碼、預處理、繪圖和推送。
+
+#跨會話的微批次：
+
+#工作進程取得第一個請求後，在 settings.INFERENCE_SERVICE_LATENCY_MS 毫秒內繼續收集請求，
+#最多 settings.INFERENCE_SERVICE_MAX_BATCH 幀，同一個模型的請求合成一次 predict（以批次中最低的信心閾值推論，
+#再按每個請求自己的閾值過濾）。
+
+#每個串流獨立的追蹤狀態：
+
+#需要追蹤的請求帶有串流編號，工作進程為每個串流保存一個 session_tracker.SessionTracker，
+#軌跡不會在會話之間互相干擾；超過 settings.INFERENCE_SERVICE_TRACKER_TTL 秒沒有使用的追蹤器會被清除。
+
+#背壓信號：
+
+#等待推論的幀數保存在共享計數器中，超過 settings.INFERENCE_SERVICE_MAX_PENDING 時 busy() 返回 True，
+#即時來源可以據此丟棄幀（沿用上一次的結果），而不是讓延遲不斷累積。
+
+#工作進程停止時快速失敗：
+
+#工作進程意外結束（例如記憶體不足被終止）時，等待中的請求立即以錯誤結束，新的請求直接被拒絕，而不是等到逾時；
+#ServiceClient 隨即透過 get_service() 重新連接（需要時重新啟動工作進程）並重試一次。
+#逾時或失敗而不再等待的請求會從等待表中移除，不會無限累積。
+
+#跨進程只傳送預處理後的模型輸入（長邊 settings.INFERENCE_SIZE）和每個框的幾個數字，不傳送原始幀。
+
+#工作進程以 spawn 方式啟動，會在新的直譯器中重新導入這個模組，因此這裡不能導入 Streamlit。
+
+
+import collections  # 導入 collections 模組，用於按模型分組請求
+import itertools  # 導入 itertools 模組，用於產生請求編號
+import multiprocessing  # 導入 multiprocessing 模組，用於啟動推論進程和跨進程佇列
+import queue  # 導入 queue 模組，用於等待佇列時的逾時
+import threading  # 導入 threading 模組，用於分派推論結果
+import time  # 導入 time 模組，用於微批次的等待時間
+import uuid  # 導入 uuid 模組，用於產生串流編號
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError  # 導入 Future 類和其逾時錯誤，用於等待推論結果
+
+import torch  # 導入 torch，用於重建 Results 物件
+from ultralytics.engine.results import Results  # 導入 Results 類，結果與在進程內推論時的用法相同
+
+import settings  # 導入 settings 模組，包含推論服務相關的配置
+import model_registry  # 導入模型註冊表模組，用於取得模型的鍵
+import preprocess  # 導入預處理模組，在伺服器進程中縮放幀並把框映射回原始幀
+
+Request = collections.namedtuple("Request", "request_id model_key image conf imgsz stream_id tracker")  # 一幀的推論請求
+
+
+def _serve(requests, responses, pending, max_batch, latency):
+    """Worker process loop: collects micro-batches, runs one predict per model and applies per-stream trackers."""
+    import session_tracker  # 在工作進程中才導入
+
+    registry = model_registry.get_registry()
+    trackers = {}  # 串流編號 -> (SessionTracker, 最後使用的時間)
+    running = True
+    while running:
+        first = requests.get()
+        if first is None:
+            break
+        batch = [first]
+        deadline = time.monotonic() + latency
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = requests.get(timeout=remaining)  # 在延遲預算內繼續收集其他會話的請求
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+        with pending.get_lock():
+            pending.value -= len(batch)
+
+        groups = collections.defaultdict(list)
+        for request in batch:
+            groups[(request.model_key, request.imgsz)].append(request)  # 同一個模型和輸入大小的請求合成一個批次
+        for (model_key, imgsz), group in groups.items():
+            try:
+                model = registry.get(*model_key).model
+                conf = min(request.conf for request in group)
+                results = model.predict([request.image for request in group], conf=conf, imgsz=imgsz, verbose=False)
+                for request, result in zip(group, results):
+                    if request.conf > conf:
+                        result = result[result.boxes.conf >= request.conf]  # 按請求自己的閾值過濾
+                    if request.tracker:
+                        tracker, _ = trackers.get(request.stream_id) or (session_tracker.SessionTracker(request.tracker), 0)
+                        trackers[request.stream_id] = (tracker, time.monotonic())
+                        result = tracker.update(result, request.image)  # 每個串流使用自己的追蹤狀態
+                    responses.put((request.request_id, result.boxes.data.cpu().numpy(), None))
+            except Exception as ex:
+                for request in group:
+                    responses.put((request.request_id, None, f"{type(ex).__name__}: {ex}"))
+
+        now = time.monotonic()
+        for stream_id, (_, last_used) in list(trackers.items()):
+            if now - last_used > settings.INFERENCE_SERVICE_TRACKER_TTL:
+                del trackers[stream_id]  # 串流已經結束（例如會話關閉）
+
+
+class InferenceService:
+    """
+    A local inference worker process shared by every session, with cross-session micro-batching.
+    #所有會話共用的本機推論工作進程，會把不同會話的請求合成微批次。
+
+    Parameters:
+        max_batch (int): Maximum frames per predict call. #每次 predict 的最大幀數。
+        latency_ms (float): How long the worker waits to fill a batch after the first request. #收到第一個請求後等待湊批次的毫秒數。
+        max_pending (int): Queued frames above which busy() reports backpressure. #等待中的幀數超過這個值時 busy() 返回 True。
+    """
+
+    def __init__(self, max_batch=None, latency_ms=None, max_pending=None):
+        self.max_batch = max_batch or settings.INFERENCE_SERVICE_MAX_BATCH
+        self.latency = (settings.INFERENCE_SERVICE_LATENCY_MS if latency_ms is None else latency_ms) / 1000.0
+        self.max_pending = max_pending or settings.INFERENCE_SERVICE_MAX_PENDING
+        context = multiprocessing.get_context("spawn")  # 不複製伺服器進程的線程和模型
+        self._requests = context.Queue()
+        self._responses = context.Queue()
+        self._pending = context.Value("i", 0)  # 等待推論的幀數
+        self._process = context.Process(
+            target=_serve,
+            args=(self._requests, self._responses, self._pending, self.max_batch, self.latency),
+            daemon=True,
+        )
+        self._futures = {}  # 請求編號 -> Future
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+
+    def start(self):
+        """
+        Starts the worker process and the result dispatcher. Returns self.
+        #啟動工作進程和結果分派線程，並返回自身。
+        """
+        self._process.start()
+        self._dispatcher.start()
+        return self
+
+    def is_alive(self):
+        """
+        Returns True while the worker process is running.
+        #工作進程仍在執行時返回 True。
+        """
+        return self._process.is_alive()
+
+    def _dispatch(self):
+        while True:
+            try:
+                request_id, boxes, error = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._fail_all(RuntimeError("The inference worker stopped"))
+                    return
+                continue
+            with self._lock:
+                future = self._futures.pop(request_id, None)
+            if future is None:
+                continue  # 提交者已經放棄等待
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(boxes)
+
+    def _fail_all(self, error):
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.set_exception(error)
+
+    def submit(self, model_key, image, conf, imgsz, stream_id=None, tracker=None):
+        """
+        Queues one prepared model input and returns a Future of its box data (N x 6, or N x 7 when tracked).
+        #把一個預處理好的模型輸入放入佇列，並返回其框資料的 Future（N x 6，追蹤時為 N x 7）。
+
+        Raises:
+            RuntimeError: When the worker process has stopped. #工作進程已停止時。
+        """
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._futures[request_id] = future
+        # 先登記再檢查：工作進程在這之後才停止時，分派線程的 _fail_all 一定會看到這個 Future
+        if not self._process.is_alive():
+            with self._lock:
+                self._futures.pop(request_id, None)
+            raise RuntimeError("The inference worker stopped")
+        with self._pending.get_lock():
+            self._pending.value += 1
+        self._requests.put(Request(request_id, model_key, image, conf, imgsz, stream_id, tracker))
+        return future
+
+    def discard(self, futures):
+        """
+        Forgets requests whose submitter stopped waiting, e.g. after a timeout; their late results are dropped.
+        #移除提交者不再等待的請求（例如逾時後），之後才返回的結果會被丟棄。
+        """
+        abandoned = {id(future) for future in futures}
+        with self._lock:
+            for request_id in [key for key, future in self._futures.items() if id(future) in abandoned]:
+                del self._futures[request_id]
+
+    def pending(self):
+        """
+        Returns the number of frames waiting for the worker.
+        #返回等待工作進程推論的幀數。
+        """
+        return self._pending.value
+
+    def busy(self):
+        """
+        Returns True when the worker is backlogged and live sources should drop frames.
+        #工作進程積壓、即時來源應該丟棄幀時返回 True。
+        """
+        return self.pending() >= self.max_pending
+
+    def stop(self):
+        """
+        Stops the worker process after the queued requests.
+        #處理完佇列中的請求後停止工作進程。
+        """
+        self._requests.put(None)
+        self._process.join(timeout=5)
+
+
+class ServiceClient:
+    """
+    One video stream's connection to the inference service, with its own tracker stream and preprocessing buffers.
+    #一個視頻串流與推論服務的連接，擁有自己的追蹤串流和預處理緩衝區。
+
+    Parameters:
+        service (InferenceService): The shared service. #共享的推論服務。
+        model (YOLO): A registry-managed model; the worker loads the same weights and backend. #註冊表管理的模型。
+        tracker (str): The tracker configuration, or None without tracking. #追蹤器配置，不追蹤時為 None。
+        preprocessor (preprocess.FramePreprocessor): Reused resize buffers; a new one by default. #重用的縮放緩衝區。
+    """
+
+    def __init__(self, service, model, tracker=None, preprocessor=None):
+        entry = model_registry.get_registry().find(model)
+        if entry is None:
+            raise ValueError("Only registry-managed models can be served by the inference worker")
+        self.service = service
+        self.model_key = entry.key
+        self.names = model.names
+        self.tracker = tracker
+        self.stream_id = uuid.uuid4().hex  # 每次執行一個新的追蹤串流
+        self.preprocessor = preprocessor or preprocess.FramePreprocessor()
+
+    def infer(self, frames, conf):
+        """
+        Runs frames through the service and returns one Results object per frame, on the original frames.
+        #把幀交給推論服務，並為每一幀返回一個對應原始幀的 Results 物件。
+        """
+        inputs = self.preprocessor.prepare(frames)
+        try:
+            boxes = self._submit(inputs, conf)
+        except (RuntimeError, FutureTimeoutError):
+            if self.service.is_alive():
+                raise  # 推論本身的錯誤或真正的逾時
+            self.service = get_service()  # 工作進程已停止：重新連接（需要時重新啟動）並重試一次
+            boxes = self._submit(inputs, conf)
+        results = [
+            Results(image, path="", names=self.names, boxes=torch.from_numpy(data))
+            for image, data in zip(inputs, boxes)
+        ]  # 等到結果返回時輸入已經送出，下一次 prepare 才會覆寫緩衝區
+        return self.preprocessor.restore(results, frames)
+
+    def _submit(self, inputs, conf):
+        futures = []
+        try:
+            for image in inputs:
+                futures.append(
+                    self.service.submit(self.model_key, image, conf, self.preprocessor.size, self.stream_id, self.tracker)
+                )
+            return [future.result(settings.INFERENCE_SERVICE_TIMEOUT) for future in futures]
+        except Exception:
+            self.service.discard(futures)  # 不再等待的請求從等待表中移除
+            raise
+
+    def busy(self):
+        """
+        Returns the service's backpressure signal.
+        #返回推論服務的背壓信號。
+        """
+        return self.service.busy()
+
+
+_service = None  # 全進程共享的推論服務
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """
+    Returns the process-wide inference service, starting (or restarting) its worker when needed.
+    #返回全進程共享的推論服務，需要時啟動（或重新啟動）工作進程。
+    """
+    global _service
+    with _service_lock:
+        if _service is None or not _service.is_alive():
+            _service = InferenceService().start()
+        return _service
@@ -0,0 +1,230 @@
+#這段代碼實現了幀處理循環的輕量級分階段計時（Instrumentation）。
+#RTSP 畫面卡頓時，原本無法知道瓶頸是在解碼、推論、繪圖還是 Streamlit 推送圖像。
+#這個模組的主要功能如下：
+
+#分階段計時：
+
+#每個階段（decode、resize、infer、plot、encode、render）的耗時都會被記錄到：
+#1. 一個滑動窗口，用於計算最近的 p50/p95 和每秒幀數；
+#2. 一個固定區間的累積直方圖，用於 Prometheus 導出。
+#各階段在不同的線程中執行，所有記錄都是線程安全的。
+
+#畫面上的疊加資訊：
+
+#可以把每秒幀數和各階段的耗時直接畫在幀上。
+
+#Prometheus 導出：
+
+#在本機端口上以 Prometheus 文字格式提供 /metrics，長時間運行的攝像頭會話不需要分析器也能被監控。
+
+
+import collections  # 導入 collections 模組，用於滑動窗口
+import contextlib  # 導入 contextlib 模組，用於計時的 with 語句
+import logging  # 導入 logging 模組，用於記錄指標服務無法啟動的原因
+import threading  # 導入 threading 模組，用於線程安全和 HTTP 服務
+import time  # 導入 time 模組，用於計時
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 導入 HTTP 服務，用於導出指標
+
+import cv2  # 導入 OpenCV 模組，用於在幀上繪製文字
+import numpy as np  # 導入 numpy，用於計算百分位數
+
+import settings  # 導入 settings 模組，包含指標相關的配置
+
+STAGES = ("decode", "resize", "infer", "plot", "encode", "render")  # 幀處理循環的各個階段
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # 直方圖區間的上限（秒）
+
+
+class FrameMetrics:
+    """
+    Rolling and cumulative per-stage timings for one frame source.
+    #一個幀來源的各階段滑動和累積計時。
+
+    Parameters:
+        source (str): The label used for this source in exported metrics. #導出指標中使用的來源標籤。
+        window (int): Number of recent samples kept per stage. #每個階段保留的最近樣本數。
+    """
+
+    def __init__(self, source, window=None):
+        self.source = source
+        window = window or settings.METRICS_WINDOW
+        self._lock = threading.Lock()
+        self._recent = {stage: collections.deque(maxlen=window) for stage in STAGES}  # 最近的耗時（秒）
+        self._bucket_counts = {stage: np.zeros(len(BUCKETS) + 1, dtype=np.int64) for stage in STAGES}  # 最後一格是 +Inf
+        self._sums = dict.fromkeys(STAGES, 0.0)
+        self._frame_times = collections.deque(maxlen=window)  # 最近完成的幀的時間
+        self.frames_total = 0
+
+    def observe(self, stage, seconds):
+        """
+        Records one duration for a stage.
+        #記錄一個階段的一次耗時。
+        """
+        with self._lock:
+            self._recent[stage].append(seconds)
+            self._bucket_counts[stage][np.searchsorted(BUCKETS, seconds)] += 1
+            self._sums[stage] += seconds
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """
+        Context manager that records how long its body took under the given stage.
+        #記錄 with 區塊耗時的上下文管理器。
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def frame_done(self):
+        """
+        Marks one frame as fully processed (whether or not it was pushed to the browser).
+        #標記一幀已經處理完成（無論是否推送到瀏覽器）。
+        """
+        with self._lock:
+            self._frame_times.append(time.monotonic())
+            self.frames_total += 1
+
+    def fps(self):
+        """
+        Returns the processed frames per second over the recent window.
+        #返回最近窗口內每秒處理的幀數。
+        """
+        with self._lock:
+            if len(self._frame_times) < 2:
+                return 0.0
+            elapsed = self._frame_times[-1] - self._frame_times[0]
+            return (len(self._frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self):
+        """
+        Returns {stage: (p50 ms, p95 ms)} over the recent window.
+        #返回最近窗口內每個階段的 (p50 毫秒, p95 毫秒)。
+        """
+        with self._lock:
+            recent = {stage: list(samples) for stage, samples in self._recent.items()}
+        summary = {}
+        for stage, samples in recent.items():
+            if samples:
+                p50, p95 = np.percentile(samples, [50, 95]) * 1000
+                summary[stage] = (float(p50), float(p95))
+        return summary
+
+    def overlay(self, frame):
+        """
+        Draws FPS and per-stage p50 times onto a frame in place and returns it.
+        #把每秒幀數和各階段的 p50 耗時直接畫在幀上，並返回該幀。
+        """
+        lines = [f"{self.fps():.1f} FPS"]
+        lines += [f"{stage} {p50:.1f} ms" for stage, (p50, _) in self.snapshot().items()]
+        for row, text in enumerate(lines):
+            origin = (8, 20 + row * 18)
+            cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3, cv2.LINE_AA)  # 黑色描邊
+            cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+        return frame
+
+    def prometheus_lines(self):
+        """
+        Returns this source's metrics in Prometheus text exposition format (without HELP/TYPE headers).
+        #以 Prometheus 文字格式返回這個來源的指標（不含 HELP/TYPE 標頭）。
+        """
+        with self._lock:
+            counts = {stage: values.copy() for stage, values in self._bucket_counts.items()}
+            sums = dict(self._sums)
+            frames_total = self.frames_total
+        lines = []
+        for stage in STAGES:
+            labels = f'source="{self.source}",stage="{stage}"'
+            cumulative = np.cumsum(counts[stage])
+            for bound, count in zip(BUCKETS, cumulative):
+                lines.append(f'frame_stage_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'frame_stage_seconds_bucket{{{labels},le="+Inf"}} {cumulative[-1]}')
+            lines.append(f"frame_stage_seconds_sum{{{labels}}} {sums[stage]:.6f}")
+            lines.append(f"frame_stage_seconds_count{{{labels}}} {cumulative[-1]}")
+        lines.append(f'frames_processed_total{{source="{self.source}"}} {frames_total}')
+        lines.append(f'frames_per_second{{source="{self.source}"}} {self.fps():.3f}')
+        return lines
+
+
+_metrics = {}  # 來源標籤 -> FrameMetrics，全進程共享
+_metrics_lock = threading.Lock()
+_server = None  # Prometheus HTTP 服務
+_logger = logging.getLogger(__name__)
+
+
+def get_metrics(source):
+    """
+    Returns the process-wide metrics for a source label, creating them on first use.
+    #返回來源標籤對應的全進程共享指標，第一次使用時建立。
+    """
+    with _metrics_lock:
+        if source not in _metrics:
+            _metrics[source] = FrameMetrics(source)
+        return _metrics[source]
+
+
+def render_prometheus():
+    """
+    Returns every source's metrics as one Prometheus text document.
+    #把所有來源的指標輸出成一份 Prometheus 文字文件。
+    """
+    with _metrics_lock:
+        all_metrics = list(_metrics.values())
+    lines = [
+        "# HELP frame_stage_seconds Time spent in each stage of the frame loop.",
+        "# TYPE frame_stage_seconds histogram",
+    ]
+    stage_lines, other_lines = [], []
+    for metrics in all_metrics:
+        for line in metrics.prometheus_lines():
+            (stage_lines if line.startswith("frame_stage_seconds") else other_lines).append(line)
+    lines += stage_lines
+    lines += [
+        "# HELP frames_processed_total Frames processed since the process started.",
+        "# TYPE frames_processed_total counter",
+    ]
+    lines += [line for line in other_lines if line.startswith("frames_processed_total")]
+    lines += [
+        "# HELP frames_per_second Processed frames per second over the recent window.",
+        "# TYPE frames_per_second gauge",
+    ]
+    lines += [line for line in other_lines if line.startswith("frames_per_second")]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不在終端機輸出每一次抓取
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Starts the Prometheus /metrics endpoint on a local port once per process.
+    #每個進程只啟動一次本機端口上的 Prometheus /metrics 服務。
+
+    Returns:
+        int or None: The port the server listens on, or None when it could not bind (e.g. the port is in use).
+        #服務監聽的端口；無法綁定端口（例如端口已被佔用）時為 None。
+    """
+    global _server
+    with _metrics_lock:
+        if _server is None:
+            port = port or settings.METRICS_PORT
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as ex:
+                _logger.warning("Metrics server could not listen on %s:%s: %s", host, port, ex)
+                return None  # 計時仍然有效，只是無法導出指標；下次重跑時再嘗試
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server.server_address[1]
@@ -0,0 +1,232 @@
+#這段代碼實現了導出模型的執行後端（ONNX / OpenVINO / TorchScript）。
+#原本 helper.load_model 永遠載入 PyTorch 的 .pt 檢查點，在沒有 GPU 的伺服器上這是 YOLOv8 最慢的執行方式。
+#這個模組的主要功能如下：
+
+#按模型選擇後端：
+
+#在 settings.MODEL_BACKENDS 中為每個模型設定後端，模型註冊表會自動載入對應的導出文件，
+#display_frames 和各個偵測器類別不需要任何修改。
+
+#導出一次並快取：
+
+#導出的文件存放在 weights/exported 下，目錄名稱包含 .pt 文件內容的雜湊值，
+#.pt 文件改變時雜湊值改變，會自動重新導出，並刪除同一個模型舊的導出文件。
+
+#一致性檢查：
+
+#在內建的範例圖像上比較導出模型和 .pt 模型的邊界框和類別，確認兩者的輸出一致。
+
+#用法範例：
+#python model_export.py --model BEST --backend onnx
+
+
+import argparse  # 導入 argparse 模組，用於解析命令列參數
+import hashlib  # 導入 hashlib 模組，用於計算權重文件的雜湊值
+import shutil  # 導入 shutil 模組，用於移動和刪除導出文件
+import sys  # 導入 sys 模組，用於輸出結果
+import threading  # 導入 threading 模組，避免同一個模型被同時導出
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import numpy as np  # 導入 numpy，用於計算 IoU
+
+import settings  # 導入 settings 模組，包含後端相關的配置
+
+PYTORCH = "pytorch"  # 直接使用 .pt 檢查點
+EXPORT_FORMATS = {
+    "onnx": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+    "torchscript": ("torchscript", ".torchscript"),
+}  # 後端 -> (ultralytics 的導出格式, 導出文件的後綴)
+PARITY_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".jfif"}  # 一致性檢查使用的圖像格式
+STAGING_SUFFIX = ".tmp"  # 導出中的暫存目錄的後綴
+
+_export_lock = threading.Lock()  # 同一個進程中一次只導出一個模型
+
+
+def backend_for(model_path):
+    """
+    Returns the runtime backend configured for a weights file.
+    #返回為權重文件配置的執行後端。
+
+    Parameters:
+        model_path (str): The path to the .pt weights. #.pt 權重的路徑。
+
+    Returns:
+        str: A key of EXPORT_FORMATS, or "pytorch". #EXPORT_FORMATS 的鍵，或 "pytorch"。
+    """
+    resolved = Path(model_path).resolve()
+    for name, path in settings.MODELS.items():
+        if Path(path).resolve() == resolved:
+            return settings.MODEL_BACKENDS.get(name, PYTORCH)
+    return PYTORCH
+
+
+def weights_fingerprint(model_path):
+    """
+    Returns a short content hash of a weights file.
+    #返回權重文件內容的短雜湊值。
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as weights:
+        for chunk in iter(lambda: weights.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def export_path(model_path, backend):
+    """
+    Returns where the exported artifact for a weights file and backend is cached.
+    #返回權重文件和後端對應的導出文件的快取位置。
+    """
+    model_path = Path(model_path)
+    _, suffix = EXPORT_FORMATS[backend]
+    cache_dir = settings.EXPORT_DIR / f"{model_path.stem}-{backend}-{settings.EXPORT_IMAGE_SIZE}-{weights_fingerprint(model_path)}"
+    return cache_dir / f"{model_path.stem}{suffix}"
+
+
+def resolve_weights(model_path, backend=None):
+    """
+    Returns the file the model registry should load, exporting it first if needed.
+    #返回模型註冊表應該載入的文件，必要時先導出。
+
+    Parameters:
+        model_path (str): The path to the .pt weights. #.pt 權重的路徑。
+        backend (str): The runtime backend; defaults to the one in settings.MODEL_BACKENDS. #執行後端。
+
+    Returns:
+        Path: The .pt path for "pytorch", otherwise the cached exported artifact. #導出文件的路徑。
+    """
+    backend = backend or backend_for(model_path)
+    if backend == PYTORCH:
+        return Path(model_path)
+    if backend not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    target = export_path(model_path, backend)
+    if target.exists():
+        return target
+    with _export_lock:
+        if not target.exists():
+            _export(Path(model_path), backend, target)
+    return target
+
+
+def _export(model_path, backend, target):
+    from ultralytics import YOLO  # 只有需要導出時才導入
+
+    export_format, _ = EXPORT_FORMATS[backend]
+    # ultralytics 會把導出文件寫在 .pt 旁邊，先複製到暫存目錄再導出，避免多個進程互相覆蓋
+    staging = target.parent.with_name(target.parent.name + STAGING_SUFFIX)
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    staged_weights = staging / model_path.name
+    shutil.copy2(model_path, staged_weights)
+    exported = YOLO(str(staged_weights), task=settings.MODEL_TASK).export(
+        format=export_format,
+        imgsz=settings.EXPORT_IMAGE_SIZE,
+        dynamic=backend != "torchscript",  # 動態批次大小，批次推論才能使用導出模型
+    )
+    staged_weights.unlink()
+    Path(exported).rename(staging / target.name)
+    for leftover in staging.iterdir():
+        if leftover.name == target.name:
+            continue
+        if leftover.is_dir():
+            shutil.rmtree(leftover, ignore_errors=True)
+        else:
+            leftover.unlink()
+    shutil.rmtree(target.parent, ignore_errors=True)
+    staging.rename(target.parent)  # 整個目錄一次換上，其他進程不會看到寫了一半的導出文件
+    _remove_stale_exports(model_path, backend, target.parent)
+
+
+def _remove_stale_exports(model_path, backend, current):
+    """Deletes finished exports of the same weights name and backend other than current (the .pt has changed)."""
+    for stale in settings.EXPORT_DIR.glob(f"{model_path.stem}-{backend}-*"):
+        if stale == current or stale.name.endswith(STAGING_SUFFIX) or not stale.is_dir():
+            continue  # 目前的導出文件，或其他進程正在使用的暫存目錄
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Computes the pairwise IoU matrix of two sets of xyxy boxes.
+    #計算兩組 xyxy 邊界框兩兩之間的 IoU 矩陣。
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def compare_results(reference, candidate, iou_threshold=0.9):
+    """
+    Greedily matches candidate boxes to reference boxes of the same class.
+    #把候選邊界框貪婪地匹配到相同類別的參考邊界框。
+
+    Returns:
+        tuple (int, int, float): (matched boxes, unmatched boxes, lowest IoU among matches).
+        #(匹配數, 未匹配數, 匹配中最低的 IoU)。
+    """
+    ref_boxes = reference.boxes.xyxy.cpu().numpy()
+    ref_cls = reference.boxes.cls.cpu().numpy()
+    cand_boxes = candidate.boxes.xyxy.cpu().numpy()
+    cand_cls = candidate.boxes.cls.cpu().numpy()
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return 0, len(ref_boxes) + len(cand_boxes), 1.0
+    iou = box_iou(ref_boxes, cand_boxes)
+    iou[ref_cls[:, None] != cand_cls[None, :]] = 0  # 類別不同不能匹配
+    matched, lowest = 0, 1.0
+    while True:
+        ref_index, cand_index = np.unravel_index(np.argmax(iou), iou.shape)
+        best = iou[ref_index, cand_index]
+        if best < iou_threshold:
+            break
+        matched += 1
+        lowest = min(lowest, float(best))
+        iou[ref_index, :] = 0
+        iou[:, cand_index] = 0
+    return matched, len(ref_boxes) + len(cand_boxes) - 2 * matched, lowest
+
+
+def parity_check(model_path, backend, images_dir=None, conf=0.4, iou_threshold=0.9):
+    """
+    Compares an exported backend against the .pt model on the bundled sample images.
+    #在內建的範例圖像上比較導出後端和 .pt 模型的輸出。
+
+    Returns:
+        bool: True when every box matched a same-class box with IoU >= iou_threshold.
+        #所有邊界框都匹配到 IoU 不低於閾值的同類別邊界框時返回 True。
+    """
+    import cv2
+    from ultralytics import YOLO
+
+    images_dir = Path(images_dir or settings.IMAGES_DIR)
+    reference_model = YOLO(str(model_path), task=settings.MODEL_TASK)
+    candidate_model = YOLO(str(resolve_weights(model_path, backend)), task=settings.MODEL_TASK)
+    passed = True
+    for image_path in sorted(images_dir.iterdir()):
+        if image_path.suffix.lower() not in PARITY_IMAGE_EXTENSIONS:
+            continue
+        image = cv2.imread(str(image_path))
+        if image is None:
+            continue
+        reference = reference_model.predict(image, conf=conf, imgsz=settings.EXPORT_IMAGE_SIZE, verbose=False)[0]
+        candidate = candidate_model.predict(image, conf=conf, imgsz=settings.EXPORT_IMAGE_SIZE, verbose=False)[0]
+        matched, unmatched, lowest = compare_results(reference, candidate, iou_threshold)
+        status = "OK" if unmatched == 0 else "MISMATCH"
+        passed = passed and unmatched == 0
+        print(f"{status:8} {image_path.name}: {matched} matched, {unmatched} unmatched, min IoU {lowest:.3f}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a model to a runtime backend and check parity with the .pt.")
+    parser.add_argument("--model", choices=sorted(settings.MODELS), default="BEST")
+    parser.add_argument("--backend", choices=sorted(EXPORT_FORMATS), required=True)
+    parser.add_argument("--iou", type=float, default=0.9, help="Minimum IoU for a box to count as matching.")
+    args = parser.parse_args()
+    weights = settings.MODELS[args.model]
+    print(f"Exported to {resolve_weights(weights, args.backend)}")
+    sys.exit(0 if parity_check(weights, args.backend, iou_threshold=args.iou) else 1)
@@ -0,0 +1,184 @@
+#這段代碼實現了一個全進程共享的模型註冊表（Model Registry）。
+#Streamlit 每次互動（拖動滑塊、點擊按鈕）都會重新執行 app.py，如果每次都重新建立 YOLO 物件，
+#在 CPU 機器上每次互動都要花費數秒，而且每個會話都各自持有一份權重。
+#這個模組的主要功能如下：
+
+#以 (權重路徑, 任務類型, 設備, 執行後端) 作為鍵快取模型：
+
+#同一個權重在同一個進程中只會被載入一次，所有 Streamlit 重跑和所有瀏覽器會話共用同一個實例。
+#共享的模型只能呼叫 predict：model.track(..., persist=True) 會把追蹤狀態和追蹤回呼留在共享的 predictor 上，
+#軌跡會在會話和視頻之間洩漏，之後的 predict 也會執行追蹤。追蹤狀態由呼叫者自己的 session_tracker.SessionTracker 保存。
+
+#載入時進行預熱：
+
+#用一張全黑的假幀跑一次推論，讓第一次真正的偵測不需要再承擔初始化的開銷。
+
+#記錄載入和預熱時間：
+
+#每個模型條目都記錄載入耗時和預熱耗時，介面可以顯示出來，方便確認之後的切換只是一次查表。
+
+#選擇執行後端：
+
+#settings.MODEL_BACKENDS 中設定了導出後端（ONNX / OpenVINO / TorchScript）的模型，會載入快取的導出文件，
+#後端也是註冊表鍵的一部分。
+
+#這個模組不依賴 Streamlit，因此也可以在命令列或背景工作進程中使用。
+
+
+import threading  # 導入 threading 模組，用於保護共享的註冊表
+import time  # 導入 time 模組，用於計時
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import numpy as np  # 導入 numpy，用於產生預熱用的假幀
+from ultralytics import YOLO  # 從 ultralytics 庫導入 YOLO 模組
+
+import settings  # 導入 settings 模組，包含模型相關的配置
+import model_export  # 導入模型導出模組，用於取得執行後端對應的權重文件
+
+
+class ModelEntry:
+    """
+    A cached model together with its load statistics.
+    #快取的模型及其載入統計資料。
+
+    Attributes:
+        model (YOLO): The loaded YOLO model. #已載入的 YOLO 模型。
+        key (tuple): The (weights path, task, device, backend) registry key. #註冊表的鍵。
+        load_time (float): Seconds spent constructing the model. #建立模型所花的秒數。
+        warmup_time (float): Seconds spent on the dummy-frame warm-up. #預熱所花的秒數。
+        lock (threading.RLock): Serialises inference on the shared model. #序列化共享模型上的推論。
+    """
+
+    def __init__(self, model, key, load_time, warmup_time):
+        self.model = model
+        self.key = key
+        self.load_time = load_time
+        self.warmup_time = warmup_time
+        self.lock = threading.RLock()  # ultralytics 的 predictor 不是線程安全的，多個會話共用時需要加鎖
+        self.hits = 0  # 快取命中次數
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of YOLO models keyed by weights path, task, device and runtime backend.
+    #以權重路徑、任務類型、設備和執行後端為鍵的全進程 YOLO 模型快取。
+    """
+
+    def __init__(self, warmup_size=None):
+        self._entries = {}  # 鍵 -> ModelEntry
+        self._key_locks = {}  # 每個鍵一把鎖，載入一個模型時不會阻塞其他模型的查表
+        self._lock = threading.Lock()  # 保護上面兩個字典
+        self._warmup_size = warmup_size or settings.WARMUP_IMAGE_SIZE
+
+    @staticmethod
+    def make_key(model_path, task=None, device=None, backend=None):
+        """
+        Builds the registry key for a model.
+        #建立模型在註冊表中的鍵。
+        """
+        return (
+            str(Path(model_path).resolve()),
+            task or settings.MODEL_TASK,
+            device or settings.MODEL_DEVICE,
+            backend or model_export.backend_for(model_path),
+        )
+
+    def get(self, model_path, task=None, device=None, backend=None):
+        """
+        Returns the cached entry for a model, loading and warming it up on first use.
+        #返回模型的快取條目，第一次使用時會載入並預熱。
+
+        Parameters:
+            model_path (str): The path to the YOLO model file. #YOLO 模型文件的路徑。
+            task (str): The YOLO task, defaults to settings.MODEL_TASK. #YOLO 任務類型。
+            device (str): The inference device, defaults to settings.MODEL_DEVICE. #推論設備。
+            backend (str): The runtime backend, defaults to settings.MODEL_BACKENDS. #執行後端。
+
+        Returns:
+            ModelEntry: The cached model and its load statistics. #快取的模型及其載入統計。
+        """
+        key = self.make_key(model_path, task, device, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一個鍵只允許一個線程載入，其他線程等待載入完成後直接取用
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                return entry
+            entry = self._load(model_path, key)
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+
+    def _load(self, model_path, key):
+        _, task, device, backend = key
+        start = time.perf_counter()
+        weights = model_export.resolve_weights(model_path, backend)  # 導出後端第一次使用時會先導出並快取
+        model = YOLO(str(weights), task=task)  # 使用 YOLO 構造函數創建模型實例
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        height, width = self._warmup_size
+        dummy = np.zeros((height, width, 3), dtype=np.uint8)  # 全黑的假幀
+        model.predict(dummy, device=device, imgsz=settings.INFERENCE_SIZE, verbose=False)  # 預熱：建立 predictor 並完成第一次推論的初始化
+        warmup_time = time.perf_counter() - start
+        return ModelEntry(model, key, load_time, warmup_time)
+
+    def find(self, model):
+        """
+        Returns the entry holding the given model instance, or None.
+        #返回持有指定模型實例的條目，找不到則返回 None。
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.model is model:
+                    return entry
+        return None
+
+    def entries(self):
+        """
+        Returns a snapshot list of all cached entries.
+        #返回所有快取條目的快照列表。
+        """
+        with self._lock:
+            return list(self._entries.values())
+
+    def clear(self):
+        """
+        Drops every cached model.
+        #清除所有快取的模型。
+        """
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+_registry = ModelRegistry()  # 全進程共享的註冊表實例
+
+
+def get_registry():
+    """
+    Returns the process-wide model registry.
+    #返回全進程共享的模型註冊表。
+    """
+    return _registry
+
+
+def inference_lock(model):
+    """
+    Returns the lock guarding inference on a registry-managed model.
+    #返回保護註冊表模型推論的鎖。
+
+    Models that were not loaded through the registry get a fresh lock, so callers can always use
+    ``with inference_lock(model):`` regardless of where the model came from.
+    #不是經由註冊表載入的模型會得到一把新鎖，因此呼叫者總是可以使用 with 語句。
+    """
+    entry = _registry.find(model)
+    return entry.lock if entry is not None else threading.RLock()
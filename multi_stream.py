@@ -0,0 +1,149 @@
+#這段代碼實現了多攝像頭 RTSP 監控（Multi-Stream Monitor）。
+#原本 helper.play_rtsp_stream 只能處理側邊欄輸入的一個網址，十幾台工地攝像頭就需要十幾個瀏覽器分頁，各自載入自己的模型。
+#這個模組的主要功能如下：
+
+#每個攝像頭一個讀取器：
+
+#每個網址使用一個 rtsp_reader.LatestFrameReader，在背景線程中讀取並只保留最新幀，斷線時各自重新連接。
+
+#跨串流的批次推論：
+
+#每一輪收集所有攝像頭的最新幀，保持長寬比各自縮放一次到模型輸入大小後合成一個批次，只呼叫一次共享模型的 predict，
+#框再映射回各自的原始幀。
+
+#每個攝像頭獨立的追蹤狀態：
+
+#模型是共享的，但每個攝像頭有自己的 session_tracker.SessionTracker，軌跡不會在攝像頭之間互相干擾。
+
+#每個攝像頭的幀率和健康狀態：
+
+#每個攝像頭使用自己的 instrumentation.FrameMetrics 計算每秒處理的幀數，並從讀取器取得重連次數和最後一幀的時間。
+
+
+import time  # 導入 time 模組，用於計時和等待新幀
+
+import settings  # 導入 settings 模組，包含多攝像頭相關的配置
+import batch_inference  # 導入批次推論模組，用於一次推論所有攝像頭的幀
+import instrumentation  # 導入計時模組，用於每個攝像頭的幀率
+import rtsp_reader  # 導入 RTSP 讀取器模組，只保留最新幀並自動重連
+import session_tracker  # 導入追蹤器狀態模組，讓每個攝像頭有自己的軌跡
+import preprocess  # 導入預處理模組，每一幀保持長寬比只縮放一次
+
+
+class CameraStream:
+    """
+    One camera of a multi-stream monitor: its reader, tracker state and metrics.
+    #多攝像頭監控中的一個攝像頭：讀取器、追蹤器狀態和效能指標。
+    """
+
+    def __init__(self, index, source, tracker=None):
+        self.index = index
+        self.source = source
+        self.reader = rtsp_reader.LatestFrameReader(source)
+        self.tracker = session_tracker.SessionTracker(tracker) if tracker else None
+        self.metrics = instrumentation.get_metrics(f"{settings.MULTI_RTSP}-{index}")
+        self.last_result = None  # 最後一次的偵測結果
+
+    def health(self):
+        """
+        Returns "ok", "stalled" or "closed" for display.
+        #返回用於顯示的健康狀態："ok"、"stalled"（停滯）或 "closed"（已關閉）。
+        """
+        if not self.reader.isOpened():
+            return "closed"
+        last = self.reader.last_frame_time
+        if last is None or time.monotonic() - last > self.reader.stall_timeout:
+            return "stalled"
+        return "ok"
+
+    def status_text(self):
+        """
+        Returns a one-line FPS and health summary for display.
+        #返回一行用於顯示的幀率和健康狀態摘要。
+        """
+        return f"{self.metrics.fps():.1f} FPS | {self.health()} | {self.reader.status_text()}"
+
+
+class MultiStreamMonitor:
+    """
+    Reads several RTSP streams and runs one batched inference over their latest frames.
+    #讀取多個 RTSP 串流，並對它們的最新幀執行一次批次推論。
+
+    Parameters:
+        model (YOLO): The shared YOLO model. #共享的 YOLO 模型。
+        sources (list): RTSP URLs, one per camera. #RTSP 網址，每個攝像頭一個。
+        conf (float): The model's confidence threshold. #模型的信心閾值。
+        tracker (str): Tracker configuration; None disables tracking. #追蹤器配置；None 表示不追蹤。
+    """
+
+    def __init__(self, model, sources, conf, tracker=None):
+        self.model = model
+        self.conf = conf
+        self.cameras = [CameraStream(index, source, tracker) for index, source in enumerate(sources)]
+        self.preprocessor = preprocess.FramePreprocessor()  # 縮放緩衝區在每一輪之間重用
+
+    def start(self):
+        """
+        Starts every camera's reader thread and returns self.
+        #啟動每個攝像頭的讀取線程並返回自身。
+        """
+        for camera in self.cameras:
+            camera.reader.start()
+        return self
+
+    def is_running(self):
+        """
+        Returns True while at least one reader is still open.
+        #至少還有一個讀取器開啟時返回 True。
+        """
+        return any(camera.reader.isOpened() for camera in self.cameras)
+
+    def step(self, timeout=None):
+        """
+        Waits for new frames, runs one batched inference over them and updates each camera's tracker.
+        #等待新幀，對它們執行一次批次推論，並更新每個攝像頭的追蹤器。
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for at least one new frame. #最長等待新幀的秒數。
+
+        Returns:
+            list of tuple (CameraStream, numpy.ndarray, Results): The cameras that had a new frame this round.
+            #這一輪有新幀的攝像頭，以及它們的幀和偵測結果。
+        """
+        timeout = settings.MULTI_RTSP_POLL_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            ready = []
+            for camera in self.cameras:
+                success, frame = camera.reader.read(timeout=0)  # 不等待，只取比上次更新的幀
+                if success:
+                    ready.append((camera, frame))
+            if ready or time.monotonic() >= deadline or not self.is_running():
+                break
+            time.sleep(settings.MULTI_RTSP_POLL_INTERVAL)
+        if not ready:
+            return []
+
+        frames = [frame for _, frame in ready]
+        start = time.perf_counter()
+        # 所有攝像頭共用一次 predict；大小不同的幀也可以放在同一個批次中
+        results = batch_inference.infer_batch(self.model, frames, self.conf, preprocessor=self.preprocessor)
+        elapsed = (time.perf_counter() - start) / len(frames)
+
+        updates = []
+        for (camera, _), frame, result in zip(ready, frames, results):
+            if camera.tracker is not None:
+                result = camera.tracker.update(result, frame)  # 每個攝像頭使用自己的追蹤狀態
+            camera.last_result = result
+            camera.metrics.observe("infer", elapsed)
+            camera.metrics.frame_done()
+            updates.append((camera, frame, result))
+        return updates
+
+    def release(self):
+        """
+        Stops every camera's reader.
+        #停止每個攝像頭的讀取器。
+        """
+        for camera in self.cameras:
+            camera.reader.release()
@@ -0,0 +1,122 @@
+#這段代碼實現了 Streamlit 的偵測歷史頁面（Detection History）。
+#偵測循環透過 event_log 把每秒匯總的偵測數和防護裝備違規寫入本機 SQLite 資料庫，
+#這個頁面從同一個資料庫查詢，回答「上週 3 號攝像頭有幾次違規」這類問題。
+#頁面的主要功能如下：
+
+#篩選：
+
+#在側邊欄選擇來源、日期範圍、類別和圖表的時間粒度（小時或天）。
+
+#匯總和趨勢：
+
+#每個類別在範圍內的偵測總數和同一幀中的最大數量，以及按小時或按天的偵測趨勢圖。
+
+#違規：
+
+#每個來源和規則有違規的幀數、同一幀中最多的違規人數和逐軌跡違規數，以及最近的逐軌跡違規列表。
+
+#所有查詢都帶時間範圍並在 SQL 中彙總，使用 (來源, 時間)、(類別, 時間) 和 (時間) 索引，
+#結果以 st.cache_data 快取 settings.EVENT_LOG_QUERY_TTL 秒，資料有數百萬行時頁面仍然很快。
+#頁面以唯讀方式連接資料庫，WAL 模式下不會阻塞偵測循環的寫入。
+
+
+import datetime  # 導入 datetime 模組，用於日期範圍和時間顯示
+from pathlib import Path  # 從pathlib導入Path類，用於檢查資料庫是否存在
+
+import streamlit as st  # 導入streamlit庫，用於建立Web應用
+
+import settings  # 導入settings模組，包含事件記錄相關的配置
+import event_log  # 導入事件記錄模組，提供資料庫連接和查詢
+
+st.set_page_config(page_title="Detection History", page_icon="📊", layout="wide")  # 設置頁面標題、圖標和寬屏佈局
+st.title("Detection History")  # 顯示頁面標題
+
+if not Path(settings.EVENT_LOG_DB).exists():
+    st.info("No events logged yet. Run a detection with the event log enabled first.")  # 還沒有任何事件
+    st.stop()
+
+
+@st.cache_resource
+def _connection():
+    return event_log.connect(readonly=True)  # 全進程共用一個唯讀連接
+
+
+@st.cache_data(ttl=settings.EVENT_LOG_QUERY_TTL)
+def _query(name, *args):
+    return getattr(event_log, name)(_connection(), *args)  # 相同的篩選條件在快取時間內不重新查詢
+
+
+sources = _query("list_sources")
+if not sources:
+    st.info("No events logged yet. Run a detection with the event log enabled first.")
+    st.stop()
+
+# 側邊欄篩選條件
+st.sidebar.header("Filters")  # 側邊欄添加標題
+source_labels = {f"{name} ({kind})": source_id for source_id, name, kind in sources}
+selected_sources = st.sidebar.multiselect("Sources", list(source_labels))  # 不選擇表示所有來源
+source_ids = tuple(source_labels[label] for label in selected_sources)
+today = datetime.date.today()
+date_range = st.sidebar.date_input("Dates", (today - datetime.timedelta(days=7), today))  # 預設最近一週
+if not isinstance(date_range, (tuple, list)) or len(date_range) != 2:
+    st.stop()  # 只選了開始日期
+start = datetime.datetime.combine(date_range[0], datetime.time.min).timestamp()
+end = datetime.datetime.combine(date_range[1] + datetime.timedelta(days=1), datetime.time.min).timestamp()  # 包含結束日期當天
+classes = tuple(st.sidebar.multiselect("Objects", _query("class_names", start, end, source_ids)))  # 不選擇表示所有類別
+granularity = st.sidebar.radio("Chart by", ["Hour", "Day"], horizontal=True)
+step = 3600 if granularity == "Hour" else 86400
+
+# 偵測匯總
+st.subheader("Detections")
+totals = _query("detection_totals", start, end, source_ids, classes)
+if not totals:
+    st.info("No detections in this range")
+else:
+    st.dataframe(
+        {
+            "Object": [row[0] for row in totals],
+            "Detections": [row[1] for row in totals],
+            "Max in one frame": [row[2] for row in totals],
+        },
+        use_container_width=True,
+    )
+    utc_offset = datetime.datetime.now().astimezone().utcoffset().total_seconds()
+    series = _query("detection_series", start, end, step, source_ids, classes, utc_offset)
+    buckets = sorted({row[0] for row in series})
+    position = {bucket: index for index, bucket in enumerate(buckets)}
+    chart = {name: [0] * len(buckets) for name, _, _ in totals}
+    for bucket, name, count in series:
+        chart[name][position[bucket]] = count
+    chart["time"] = [datetime.datetime.fromtimestamp(bucket) for bucket in buckets]
+    st.bar_chart(chart, x="time")  # 每小時或每天每個類別的偵測數
+
+# 防護裝備違規
+st.subheader("PPE Violations")
+violations = _query("violation_totals", start, end, source_ids)
+if not violations:
+    st.info("No violations in this range")
+else:
+    st.dataframe(
+        {
+            "Source": [row[0] for row in violations],
+            "Rule": [row[1] for row in violations],
+            "Frames": [row[2] for row in violations],
+            "Max persons in one frame": [row[3] for row in violations],
+            "Tracked violations": [row[4] for row in violations],
+        },
+        use_container_width=True,
+    )
+    events = _query("violation_events", start, end, source_ids)
+    if events:
+        st.caption(f"Latest {len(events)} tracked violations")
+        st.dataframe(
+            {
+                "Time": [datetime.datetime.fromtimestamp(row[0]).strftime("%Y-%m-%d %H:%M:%S") for row in events],
+                "Source": [row[1] for row in events],
+                "Rule": [row[2] for row in events],
+                "Track": [row[3] for row in events],
+                "Frames": [row[4] for row in events],
+                "Video time (s)": [round(row[5], 2) if row[5] is not None else None for row in events],
+            },
+            use_container_width=True,
+        )
@@ -0,0 +1,207 @@
+#這段代碼實現了一個可重用的幀處理流水線（Frame Pipeline）。
+#原本每個偵測循環都是嚴格依序執行 vid_cap.read()、cv2.resize、model.predict、res[0].plot() 和 st_frame.image()，
+#解碼、推論和介面編碼完全沒有重疊，每幀的耗時是所有步驟的總和。這個模組的主要功能如下：
+
+#分階段執行：
+
+#讀取（解碼和縮放）、推論、標註（繪圖）各自在獨立的線程中執行，階段之間用有界佇列連接。
+#最後的顯示階段在呼叫者的線程中執行，因為 Streamlit 的元件只能在腳本線程中更新。
+#這樣持續的幀率由最慢的階段決定，而不是所有階段的總和。
+
+#有界佇列：
+
+#每個佇列都有上限，慢的階段會對快的階段產生背壓，記憶體使用量不會無限增長。
+
+#乾淨的關閉和錯誤傳遞：
+
+#任何一個階段出錯時，錯誤會被記錄下來並在呼叫者的線程中重新拋出，其他階段會收到停止信號並退出。
+#呼叫者提前結束迭代（例如 Streamlit 重新執行腳本）時，所有線程也會被停止。
+
+
+import queue  # 導入 queue 模組，用於在階段之間傳遞幀
+import threading  # 導入 threading 模組，用於執行各個階段
+import time  # 導入 time 模組，用於量測推論耗時
+
+_END = object()  # 表示流結束的哨兵物件
+
+
+class FrameItem:
+    """
+    A frame travelling through the pipeline.
+    #在流水線中傳遞的一幀。
+
+    Attributes:
+        index (int): The frame's position in the source. #幀在來源中的序號。
+        frame (numpy.ndarray): The decoded (and resized) frame. #解碼（和縮放）後的幀。
+        result (ultralytics.engine.results.Results): The inference result. #推論結果。
+        annotated: The output of annotate_fn, e.g. the encoded frame, or None if it is not displayed.
+        #annotate_fn 的輸出，例如編碼後的幀；不顯示時為 None。
+    """
+
+    __slots__ = ("index", "frame", "result", "annotated")
+
+    def __init__(self, index, frame):
+        self.index = index
+        self.frame = frame
+        self.result = None
+        self.annotated = None
+
+
+class FramePipeline:
+    """
+    Runs read, inference and annotation in separate threads connected by bounded queues.
+    #在以有界佇列連接的獨立線程中執行讀取、推論和標註。
+
+    Parameters:
+        read_fn (callable): Returns (success, frame) like cv2.VideoCapture.read. #與 cv2.VideoCapture.read 相同，返回 (成功與否, 幀)。
+        infer_fn (callable): Takes a list of frames and returns one result per frame. #接收幀列表並為每一幀返回一個結果。
+        annotate_fn (callable): Takes (frame, result) and returns what the caller displays. #接收 (幀, 結果) 並返回呼叫者要顯示的內容。
+        queue_size (int): The capacity of every inter-stage queue. #每個階段間佇列的容量。
+        batch_size (int or object): Frames per inference call, or a sizer with next_size()/record().
+        #每次推論的幀數，或具有 next_size()/record() 方法的批次大小選擇器。
+
+    Iterating over the pipeline starts the threads and yields FrameItem objects in source order.
+    #迭代流水線會啟動線程，並按來源順序產生 FrameItem。
+    """
+
+    def __init__(self, read_fn, infer_fn, annotate_fn, queue_size=4, batch_size=1):
+        self.read_fn = read_fn
+        self.infer_fn = infer_fn
+        self.annotate_fn = annotate_fn
+        self.batch_size = batch_size
+        self._decoded = queue.Queue(maxsize=queue_size)  # 讀取 -> 推論
+        self._inferred = queue.Queue(maxsize=queue_size)  # 推論 -> 標註
+        self._annotated = queue.Queue(maxsize=queue_size)  # 標註 -> 顯示
+        self._stop = threading.Event()
+        self._error = None
+        self._threads = []
+
+    # ---- 階段之間的佇列操作 ----
+
+    def _put(self, q, item):
+        """Blocks until the item is queued or the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Blocks until an item is available; returns _END when the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error  # 只保留第一個錯誤
+        self._stop.set()
+
+    # ---- 各個階段 ----
+
+    def _read_stage(self):
+        index = 0
+        try:
+            while not self._stop.is_set():
+                success, frame = self.read_fn()  # 讀取（和縮放）一幀
+                if not success:
+                    break
+                if not self._put(self._decoded, FrameItem(index, frame)):
+                    return
+                index += 1
+        except Exception as ex:
+            self._fail(ex)
+        self._put(self._decoded, _END)
+
+    def _next_batch(self):
+        """Collects up to the current batch size of items, waiting only for the first one."""
+        size = self.batch_size if isinstance(self.batch_size, int) else self.batch_size.next_size()
+        first = self._get(self._decoded)
+        if first is _END:
+            return size, [], True
+        items = [first]
+        while len(items) < size:
+            item = self._get(self._decoded)
+            if item is _END:
+                return size, items, True
+            items.append(item)
+        return size, items, False
+
+    def _infer_stage(self):
+        try:
+            while not self._stop.is_set():
+                size, items, finished = self._next_batch()
+                if items:
+                    start = time.perf_counter()
+                    results = self.infer_fn([item.frame for item in items])  # 一次推論整個批次
+                    if not isinstance(self.batch_size, int):
+                        self.batch_size.record(size, len(items), time.perf_counter() - start)
+                    for item, result in zip(items, results):
+                        item.result = result
+                        if not self._put(self._inferred, item):
+                            return
+                if finished:
+                    break
+        except Exception as ex:
+            self._fail(ex)
+        self._put(self._inferred, _END)
+
+    def _annotate_stage(self):
+        try:
+            while not self._stop.is_set():
+                item = self._get(self._inferred)
+                if item is _END:
+                    break
+                item.annotated = self.annotate_fn(item.frame, item.result)  # 繪製偵測結果
+                if not self._put(self._annotated, item):
+                    return
+        except Exception as ex:
+            self._fail(ex)
+        self._put(self._annotated, _END)
+
+    # ---- 對外介面 ----
+
+    def start(self):
+        """
+        Starts the stage threads.
+        #啟動各個階段的線程。
+        """
+        for target in (self._read_stage, self._infer_stage, self._annotate_stage):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """
+        Signals every stage to stop and waits for the threads to exit.
+        #通知所有階段停止，並等待線程退出。
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                item = self._get(self._annotated)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error  # 在呼叫者的線程中重新拋出階段中的錯誤
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
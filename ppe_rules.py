@@ -0,0 +1,322 @@
+#這段代碼實現了向量化的個人防護裝備合規規則引擎（PPE Rule Engine）。
+#TBM_SAFETY 和 BEST 模型會偵測人員和安全裝備，但應用原本只透過 helper.sum_detections 列出類別名稱，
+#從來不判斷某個人是否缺少安全帽或反光背心。
+#這個模組的主要功能如下：
+
+#按模型配置的規則：
+
+#settings.PPE_RULES 為每個模型列出規則：人員類別、必須配戴的裝備類別（任一即可）、代表違規的類別（例如 NO-Hardhat），
+#以及裝備應該出現的人員框區域（例如安全帽在上方 40%）。類別名稱不分大小寫，模型沒有的類別會被忽略，
+#人員類別不存在的規則不會啟用。
+
+#向量化的關聯：
+
+#每條規則一次計算人員區域與所有裝備框的包含率矩陣（交集面積 / 裝備面積），
+#裝備框有足夠比例落在人員區域內即視為屬於這個人，整幀只需要幾次 NumPy 廣播運算，數百個框也不會拖慢幀循環。
+
+#按軌跡防抖：
+
+#啟用追蹤器時，每條 (軌跡, 規則) 連續違規 settings.PPE_DEBOUNCE_FRAMES 幀才成立，
+#連續合規 settings.PPE_CLEAR_FRAMES 幀才解除，偶爾漏偵測一頂安全帽不會產生誤報；成立和解除都會記錄成事件。
+#沒有追蹤器時只按幀統計違規。平行分段處理時以 update_rows 逐幀檢查合併後的時間軸。
+
+
+import collections  # 導入 collections 模組，用於保存最近的違規事件
+
+import numpy as np  # 導入 numpy，用於向量化的包含率矩陣
+
+import settings  # 導入 settings 模組，包含規則和防抖相關的配置
+from detection_stats import as_index_array  # 導入索引陣列的轉換函數
+
+Rule = collections.namedtuple("Rule", "name person requires violates region")  # 編譯後的規則（類別為索引陣列）
+
+
+def containment(regions, boxes):
+    """
+    Computes the pairwise fraction of each box's area that lies inside each region.
+    #計算每個框的面積落在每個區域內的比例（兩兩之間）。
+
+    Parameters:
+        regions (numpy.ndarray): (P, 4) xyxy regions. #(P, 4) 的 xyxy 區域。
+        boxes (numpy.ndarray): (G, 4) xyxy boxes. #(G, 4) 的 xyxy 框。
+
+    Returns:
+        numpy.ndarray: (P, G) containment matrix in [0, 1]. #(P, G) 的包含率矩陣。
+    """
+    top_left = np.maximum(regions[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(regions[:, None, 2:], boxes[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area = (boxes[:, 2:] - boxes[:, :2]).prod(axis=1)
+    return inter / (area[None, :] + 1e-9)
+
+
+def compile_rules(names, rules):
+    """
+    Resolves the class names of configured rules against a model's classes.
+    #把規則中的類別名稱對應到模型的類別索引。
+
+    Parameters:
+        names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+        rules (list): Rule dicts from settings.PPE_RULES. #settings.PPE_RULES 中的規則。
+
+    Returns:
+        list: The usable rules, with class indices instead of names. #可以使用的規則（類別以索引表示）。
+    """
+    index_of = {str(name).lower(): int(index) for index, name in names.items()}
+
+    def indices(class_names):
+        return np.array([index_of[name.lower()] for name in class_names if name.lower() in index_of], dtype=np.int64)
+
+    compiled = []
+    for rule in rules:
+        person = index_of.get(rule["person"].lower())
+        requires, violates = indices(rule.get("requires", ())), indices(rule.get("violates", ()))
+        if person is None or (len(requires) == 0 and len(violates) == 0):
+            continue  # 這個模型沒有對應的類別
+        compiled.append(Rule(rule["name"], person, requires, violates, tuple(rule.get("region", (0.0, 1.0)))))
+    return compiled
+
+
+class PPERuleEngine:
+    """
+    Evaluates PPE rules over one frame's detections with vectorized containment matrices.
+    #以向量化的包含率矩陣對一幀的偵測結果評估防護裝備規則。
+
+    Parameters:
+        names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+        rules (list): Rule dicts, e.g. settings.PPE_RULES[model name]. #規則，例如 settings.PPE_RULES[模型名稱]。
+        min_containment (float): Minimum fraction of a gear box inside a person region to belong to that person.
+        #裝備框至少有多少比例落在人員區域內才屬於這個人。
+    """
+
+    def __init__(self, names, rules, min_containment=None):
+        self.rules = compile_rules(names, rules)
+        self.min_containment = settings.PPE_MIN_CONTAINMENT if min_containment is None else min_containment
+
+    def evaluate(self, xyxy, classes):
+        """
+        Returns, for each rule, the indices of the person boxes violating it.
+        #返回每條規則中違規的人員框索引。
+
+        Parameters:
+            xyxy (numpy.ndarray): (N, 4) boxes of the frame. #這一幀的 (N, 4) 框。
+            classes (numpy.ndarray): (N,) class indices. #(N,) 類別索引。
+
+        Returns:
+            list of numpy.ndarray: One array of box indices per rule, aligned with self.rules. #每條規則一個框索引陣列。
+        """
+        violations = []
+        for rule in self.rules:
+            persons = np.flatnonzero(classes == rule.person)
+            if len(persons) == 0:
+                violations.append(persons)
+                continue
+            person_boxes = xyxy[persons]
+            heights = person_boxes[:, 3] - person_boxes[:, 1]
+            regions = person_boxes.copy()
+            regions[:, 1] = person_boxes[:, 1] + heights * rule.region[0]  # 裝備應該出現的人員框區域
+            regions[:, 3] = person_boxes[:, 1] + heights * rule.region[1]
+            compliant = np.ones(len(persons), dtype=bool)
+            if len(rule.requires):
+                gear = xyxy[np.isin(classes, rule.requires)]
+                compliant = (containment(regions, gear) >= self.min_containment).any(axis=1) if len(gear) else ~compliant
+            if len(rule.violates):
+                negatives = xyxy[np.isin(classes, rule.violates)]
+                if len(negatives):
+                    compliant &= ~(containment(regions, negatives) >= self.min_containment).any(axis=1)
+            violations.append(persons[~compliant])
+        return violations
+
+
+class ComplianceMonitor:
+    """
+    Accumulates rule violations over a video, debounced per track when tracking is on.
+    #累積一部視頻的規則違規；啟用追蹤器時按軌跡防抖。
+
+    Parameters:
+        names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+        rules (list): Rule dicts, e.g. settings.PPE_RULES[model name]. #規則。
+        fps (float): The source frame rate, used to report event times; None for live sources. #來源幀率。
+        debounce_frames (int): Consecutive violating frames before a track's violation starts. #違規成立所需的連續幀數。
+        clear_frames (int): Consecutive compliant frames before it ends. #違規解除所需的連續幀數。
+        sink (event_log.EventSink): When given, per-frame violation counts and ended per-track violations are
+            logged to it. #提供時把每一幀的違規人數和結束的逐軌跡違規寫入事件記錄。
+    """
+
+    def __init__(self, names, rules, fps=None, debounce_frames=None, clear_frames=None, sink=None):
+        self.engine = PPERuleEngine(names, rules)
+        self.sink = sink
+        self.fps = fps or None
+        self.debounce_frames = debounce_frames or settings.PPE_DEBOUNCE_FRAMES
+        self.clear_frames = clear_frames or settings.PPE_CLEAR_FRAMES
+        rule_count = len(self.engine.rules)
+        self.frames = 0  # 已評估的幀數
+        self.violation_frames = np.zeros(rule_count, dtype=np.int64)  # 每條規則有違規的幀數
+        self.max_simultaneous = np.zeros(rule_count, dtype=np.int64)  # 每條規則同一幀中最多的違規人數
+        self.current = np.zeros(rule_count, dtype=np.int64)  # 每條規則在最新一幀中的違規人數
+        self.tracked = False  # 是否收到過帶追蹤編號的結果
+        self.flagged_tracks = np.zeros(rule_count, dtype=np.int64)  # 每條規則成立過違規的不重複軌跡數
+        self._states = {}  # (軌跡編號, 規則索引) -> [連續違規幀數, 連續合規幀數, 違規開始的幀, 最後出現的幀]
+        self.active = set()  # 目前違規中的 (軌跡編號, 規則索引)
+        self._flagged = set()  # 成立過違規的 (軌跡編號, 規則索引)
+        self.events = collections.deque(maxlen=settings.PPE_EVENT_HISTORY)  # 最近的違規事件
+
+    @property
+    def enabled(self):
+        """
+        True when at least one rule applies to the model's classes.
+        #至少有一條規則適用於模型的類別時為 True。
+        """
+        return bool(self.engine.rules)
+
+    def update(self, result):
+        """
+        Evaluates one frame's result and updates the counts and per-track states.
+        #評估一幀的結果，並更新統計和每條軌跡的狀態。
+
+        Returns:
+            list of numpy.ndarray: The violating box indices per rule in this frame. #這一幀每條規則違規的框索引。
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return self.update_boxes(np.zeros((0, 4)), np.zeros(0, dtype=np.int64))
+        track_ids = as_index_array(boxes.id) if boxes.id is not None else None
+        return self.update_boxes(boxes.xyxy.cpu().numpy(), as_index_array(boxes.cls), track_ids)
+
+    def update_rows(self, rows):
+        """
+        Evaluates one frame of output rows, e.g. a frame of the merged timeline from video_segments.iter_timeline.
+        #評估一幀的輸出行，例如 video_segments.iter_timeline 合併後的時間軸上的一幀。
+
+        Returns:
+            list of numpy.ndarray: The violating row indices per rule in this frame. #這一幀每條規則違規的行索引。
+        """
+        xyxy = np.array([[row["x1"], row["y1"], row["x2"], row["y2"]] for row in rows], dtype=np.float64).reshape(-1, 4)
+        classes = np.array([row["class_id"] for row in rows], dtype=np.int64)
+        track_ids = None
+        if any(row["track_id"] is not None for row in rows):
+            track_ids = np.array([-1 if row["track_id"] is None else row["track_id"] for row in rows], dtype=np.int64)
+        return self.update_boxes(xyxy, classes, track_ids)
+
+    def update_boxes(self, xyxy, classes, track_ids=None):
+        """
+        Evaluates one frame's boxes and updates the counts and per-track states.
+        #評估一幀的框，並更新統計和每條軌跡的狀態。
+
+        Parameters:
+            xyxy (numpy.ndarray): (N, 4) boxes of the frame. #這一幀的 (N, 4) 框。
+            classes (numpy.ndarray): (N,) class indices. #(N,) 類別索引。
+            track_ids (numpy.ndarray): (N,) track IDs, -1 for untracked boxes; None without a tracker.
+            #(N,) 追蹤編號，沒有追蹤的框為 -1；沒有追蹤器時為 None。
+
+        Returns:
+            list of numpy.ndarray: The violating box indices per rule in this frame. #這一幀每條規則違規的框索引。
+        """
+        if len(classes) == 0 or not self.enabled:
+            violations = [np.zeros(0, dtype=np.int64) for _ in self.engine.rules]
+            classes = track_ids = np.zeros(0, dtype=np.int64)  # 空幀也要推進軌跡的狀態
+        else:
+            self.tracked = self.tracked or track_ids is not None
+            violations = self.engine.evaluate(xyxy, classes)
+
+        counts = np.array([len(indices) for indices in violations], dtype=np.int64)
+        self.violation_frames += counts > 0
+        np.maximum(self.max_simultaneous, counts, out=self.max_simultaneous)
+        self.current = counts
+        if self.sink is not None and self.enabled:
+            self.sink.record_violations([rule.name for rule in self.engine.rules], counts)
+        if self.tracked and track_ids is not None:
+            self._update_tracks(classes, track_ids, violations)
+        self.frames += 1
+        return violations
+
+    def _update_tracks(self, classes, track_ids, violations):
+        frame = self.frames
+        for rule_index, (rule, indices) in enumerate(zip(self.engine.rules, violations)):
+            violating = set(track_ids[indices].tolist())
+            for track_id in track_ids[(classes == rule.person) & (track_ids >= 0)].tolist():  # 略過沒有追蹤編號的框
+                key = (track_id, rule_index)
+                state = self._states.setdefault(key, [0, 0, None, frame])
+                state[3] = frame
+                if track_id in violating:
+                    state[0], state[1] = state[0] + 1, 0
+                    if key not in self.active and state[0] >= self.debounce_frames:
+                        self.active.add(key)  # 連續違規足夠多幀才成立
+                        state[2] = frame - state[0] + 1
+                        if key not in self._flagged:
+                            self._flagged.add(key)
+                            self.flagged_tracks[rule_index] += 1
+                else:
+                    state[0], state[1] = 0, state[1] + 1
+                    if key in self.active and state[1] >= self.clear_frames:
+                        self._close(key, frame - state[1])  # 連續合規足夠多幀才解除
+        stale_before = frame - settings.TRACK_STALE_FRAMES
+        for key, state in list(self._states.items()):
+            if state[3] < stale_before:
+                if key in self.active:
+                    self._close(key, state[3])  # 軌跡消失時結束違規
+                del self._states[key]
+
+    def _close(self, key, last_frame):
+        track_id, rule_index = key
+        state = self._states[key]
+        self.active.discard(key)
+        if self.sink is not None:
+            self.sink.record_violation_event(self.engine.rules[rule_index].name, track_id, state[2], last_frame)
+        self.events.append({
+            "track_id": track_id,
+            "rule": self.engine.rules[rule_index].name,
+            "first_frame": state[2],
+            "last_frame": last_frame,
+        })
+
+    def finish(self):
+        """
+        Closes the violations still active at the end of the video.
+        #結束視頻結尾時仍在進行的違規。
+        """
+        for key in list(self.active):
+            self._close(key, self._states[key][3])
+
+    def summary(self):
+        """
+        Returns one row per rule with its violation counts.
+        #返回每條規則一行的違規統計。
+        """
+        return [
+            {
+                "rule": rule.name,
+                "frames": int(self.violation_frames[index]),
+                "max_simultaneous": int(self.max_simultaneous[index]),
+                "tracks": int(self.flagged_tracks[index]),
+            }
+            for index, rule in enumerate(self.engine.rules)
+        ]
+
+    def event_rows(self):
+        """
+        Returns the recorded per-track violation events, with times in seconds when the frame rate is known.
+        #返回記錄的逐軌跡違規事件；已知幀率時附上秒數。
+        """
+        rows = []
+        for event in self.events:
+            row = dict(event)
+            if self.fps:
+                row["start_s"] = round(event["first_frame"] / self.fps, 2)
+                row["end_s"] = round((event["last_frame"] + 1) / self.fps, 2)
+            rows.append(row)
+        return rows
+
+    def status_text(self):
+        """
+        Returns a one-line summary of current violations (debounced tracks when tracking), for live status captions.
+        #返回目前違規的一行摘要（追蹤時為防抖後的軌跡數），用於即時狀態說明。
+        """
+        if not self.enabled:
+            return "PPE rules: none apply to this model"
+        if self.tracked:  # 追蹤時顯示防抖後仍在違規的軌跡數
+            active = collections.Counter(rule_index for _, rule_index in self.active.copy())  # 標註線程可能同時更新
+            counts = [active.get(rule_index, 0) for rule_index in range(len(self.engine.rules))]
+        else:
+            counts = self.current.tolist()
+        return "PPE: " + ", ".join(f"{rule.name} ×{count}" for rule, count in zip(self.engine.rules, counts))
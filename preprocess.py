@@ -0,0 +1,112 @@
+#這段代碼實現了只縮放一次、保持長寬比的推論預處理（Single-Resize Preprocessing）。
+#原本 display_frames 和 _display_detected_frames 總是把幀 cv2.resize 成 720x405，4:3 和直向的畫面都會被拉伸；
+#YOLO 在內部再做一次 letterbox 縮放，每一幀都被縮放兩次，而且每次都配置新的陣列。
+#這個模組的主要功能如下：
+
+#一次縮放到模型輸入大小：
+
+#每一幀按長寬比縮放一次，使長邊等於 settings.INFERENCE_SIZE，再以 imgsz=settings.INFERENCE_SIZE 交給模型，
+#ultralytics 的 letterbox 發現大小已經符合時只會補邊，不會再縮放一次。
+
+#預先配置的緩衝區：
+
+#縮放結果直接寫入以批次位置和輸入大小為鍵的緩衝區（cv2.resize 的 dst 參數），之後的幀重用同一塊記憶體。
+#推論完成後結果不再引用這些緩衝區，因此下一個批次可以安全地覆寫。
+
+#把框映射回原始幀：
+
+#推論結果的框按縮放比例映射回原始解析度，orig_img 換成原始幀，
+#顯示、導出和統計使用的都是原始長寬比的畫面和座標，不再拉伸。
+
+
+import time  # 導入 time 模組，用於量測縮放耗時
+
+import cv2  # 導入 OpenCV 模組，用於縮放
+import numpy as np  # 導入 numpy，用於預先配置緩衝區
+import torch  # 導入 torch，用於縮放框的座標
+
+import settings  # 導入 settings 模組，包含推論輸入大小
+
+
+class FramePreprocessor:
+    """
+    Resizes frames once to the model input size into reusable buffers and maps results back to the original frames.
+    #把幀一次縮放到模型輸入大小並寫入可重用的緩衝區，再把結果映射回原始幀。
+
+    Parameters:
+        size (int): The model input size (long side in pixels), defaults to settings.INFERENCE_SIZE.
+        #模型輸入大小（長邊像素），預設為 settings.INFERENCE_SIZE。
+    """
+
+    def __init__(self, size=None):
+        self.size = int(size or settings.INFERENCE_SIZE)
+        self._buffers = {}  # (批次位置, 原始大小) -> 預先配置的縮放緩衝區
+        self.prepare_seconds = 0.0  # 上一次 prepare 的耗時
+
+    def input_shape(self, frame_shape):
+        """
+        Returns the (height, width) a frame is resized to: the long side equals size and the aspect ratio is kept.
+        #返回幀縮放後的 (高, 寬)：長邊等於 size 並保持長寬比。
+        """
+        height, width = frame_shape[:2]
+        ratio = self.size / max(height, width)
+        return max(int(round(height * ratio)), 1), max(int(round(width * ratio)), 1)
+
+    def prepare(self, frames):
+        """
+        Resizes each frame once into its preallocated buffer.
+        #把每一幀縮放一次並寫入預先配置的緩衝區。
+
+        Parameters:
+            frames (list): BGR frames; different sizes are allowed. #BGR 幀，大小可以不同。
+
+        Returns:
+            list: The model inputs, valid until the next call to prepare. #模型輸入，在下一次呼叫 prepare 前有效。
+        """
+        start = time.perf_counter()
+        inputs = []
+        for slot, frame in enumerate(frames):
+            key = (slot, frame.shape)
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                height, width = self.input_shape(frame.shape)
+                buffer = self._buffers[key] = np.empty((height, width) + frame.shape[2:], dtype=frame.dtype)
+            if buffer.shape[:2] == frame.shape[:2]:
+                inputs.append(frame)  # 已經是模型輸入大小，不需要縮放
+                continue
+            shrinking = buffer.shape[0] < frame.shape[0]
+            cv2.resize(
+                frame, (buffer.shape[1], buffer.shape[0]), dst=buffer,
+                interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR,
+            )  # 直接寫入緩衝區，不配置新陣列
+            inputs.append(buffer)
+        self.prepare_seconds = time.perf_counter() - start
+        return inputs
+
+    def restore(self, results, frames):
+        """
+        Maps results inferred on prepared inputs back to the original frames, in place.
+        #把在預處理輸入上推論的結果直接映射回原始幀。
+
+        Parameters:
+            results (list): One Results object per prepared input. #每個預處理輸入對應的 Results 物件。
+            frames (list): The original frames passed to prepare. #傳給 prepare 的原始幀。
+
+        Returns:
+            list: The same results, now referring to the original frames. #同一組結果，現在對應原始幀。
+        """
+        for result, frame in zip(results, frames):
+            input_height, input_width = result.orig_shape
+            height, width = frame.shape[:2]
+            result.orig_img = frame  # 顯示和繪圖使用原始幀，結果不再引用緩衝區
+            result.orig_shape = (height, width)
+            boxes = result.boxes
+            if boxes is None:
+                continue
+            data = boxes.data.clone()
+            scale = torch.tensor(
+                [width / input_width, height / input_height] * 2, dtype=data.dtype, device=data.device
+            )
+            data[:, :4] *= scale  # 一次縮放所有框的座標
+            result.update(boxes=data)  # 以原始大小重新建立 Boxes
+        return results
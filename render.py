@@ -0,0 +1,70 @@
+#這段代碼實現了與推論速度分離的顯示階段（Render Stage）。
+#原本每一幀都透過 st_frame.image(res_plot, channels="BGR", use_column_width=True) 把完整大小的原始圖像送到瀏覽器，
+#對於幾分鐘長的視頻，websocket 流量和伺服器端的圖像編碼佔了循環時間的很大一部分。
+#這個模組的主要功能如下：
+
+#限制顯示幀率：
+
+#每一幀仍然會被分析，但只有距離上一次推送超過 1/顯示幀率 秒的幀才會被繪製和推送到瀏覽器。
+
+#壓縮和縮小：
+
+#推送前先縮小到設定的顯示寬度，再以設定的品質編碼成 JPEG，
+#st.image 收到的是已經編碼好的位元組，不需要再轉換和編碼。
+#編碼在流水線的標註線程中進行，不佔用 Streamlit 的腳本線程。
+
+
+import time  # 導入 time 模組，用於限制顯示幀率
+
+import cv2  # 導入 OpenCV 模組，用於縮小和編碼圖像
+
+import settings  # 導入 settings 模組，包含顯示相關的配置
+
+
+class FrameRenderer:
+    """
+    Decides which analysed frames are pushed to the browser and encodes them compactly.
+    #決定哪些已分析的幀要推送到瀏覽器，並將它們壓縮編碼。
+
+    Parameters:
+        display_fps (float): Maximum frames per second pushed to the browser; 0 pushes every frame.
+        #每秒最多推送到瀏覽器的幀數；0 表示每一幀都推送。
+        jpeg_quality (int): JPEG quality from 1 to 100. #JPEG 品質（1 到 100）。
+        display_width (int): Width in pixels of the pushed image; 0 keeps the analysed size.
+        #推送圖像的寬度（像素）；0 表示保留分析時的大小。
+    """
+
+    def __init__(self, display_fps=None, jpeg_quality=None, display_width=None):
+        self.display_fps = settings.DISPLAY_FPS if display_fps is None else display_fps
+        self.jpeg_quality = settings.DISPLAY_JPEG_QUALITY if jpeg_quality is None else jpeg_quality
+        self.display_width = settings.DISPLAY_WIDTH if display_width is None else display_width
+        self._last_push = None  # 上一次推送的時間
+        self.frames_pushed = 0  # 已推送的幀數
+        self.frames_skipped = 0  # 已分析但沒有推送的幀數
+
+    def due(self):
+        """
+        Returns True when the next frame should be pushed, and counts the decision.
+        #下一幀需要推送時返回 True，並將這個決定計入統計。
+        """
+        now = time.monotonic()
+        if self.display_fps and self._last_push is not None and now - self._last_push < 1.0 / self.display_fps:
+            self.frames_skipped += 1
+            return False
+        self._last_push = now
+        self.frames_pushed += 1
+        return True
+
+    def encode(self, frame):
+        """
+        Downscales a BGR frame to the display width and encodes it as JPEG bytes.
+        #把 BGR 幀縮小到顯示寬度，並編碼成 JPEG 位元組。
+        """
+        height, width = frame.shape[:2]
+        if self.display_width and width > self.display_width:
+            scale = self.display_width / width
+            frame = cv2.resize(frame, (self.display_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        success, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+        if not success:
+            raise ValueError("Failed to encode frame as JPEG")
+        return buffer.tobytes()
@@ -0,0 +1,246 @@
+#這段代碼實現了與信心閾值無關的偵測結果快取（Confidence-Independent Result Cache）。
+#app.py 的信心滑塊範圍是 0.25 到 1.0，原本每次移動滑塊都會重新執行 model.predict(image, conf=...)。
+#這個模組的主要功能如下：
+
+#以最低閾值快取一次：
+
+#每張圖像只以 settings.MIN_CONFIDENCE（滑塊的最小值）推論一次，結果以 (內容雜湊, 模型註冊表鍵, 權重版本) 為鍵
+#保存在全進程共享、有數量上限的快取中，換模型或權重文件改變時自然不會命中。
+
+#向量化過濾：
+
+#任何更高的閾值都只是對快取的框做一次 result[result.boxes.conf >= conf] 的遮罩過濾，再用過濾後的結果重新繪圖，
+#調整閾值不需要任何模型呼叫。
+
+#最近一部視頻的偵測記錄：
+
+#DetectionLog 以欄式陣列記錄最近一部視頻在最低閾值下每個框的幀序號、類別、信心度、邊界框和追蹤編號，
+#調整閾值時以向量化遮罩重新計算匯總，不需要重新解碼和推論整部視頻。
+#啟用追蹤器時，追蹤器只接收目前閾值以上的框（與不記錄時的即時追蹤相同，追蹤編號不會因低信心度的框而改變），
+#低於閾值的框以追蹤編號 -1 一起記錄，見 merge_tracked。
+
+
+import collections  # 導入 collections 模組，用於最近最少使用的快取
+import hashlib  # 導入 hashlib 模組，用於計算內容雜湊
+import threading  # 導入 threading 模組，保護共享的快取
+
+import numpy as np  # 導入 numpy，用於欄式的偵測記錄
+import torch  # 導入 torch，用於合併追蹤後的框和低於閾值的框
+
+import settings  # 導入 settings 模組，包含快取相關的配置
+import model_export  # 導入模型導出模組，用於計算權重版本
+import model_registry  # 導入模型註冊表模組，用於取得模型的鍵和推論鎖
+import detection_stats  # 導入偵測統計模組，用於按新閾值重新計算匯總
+from detection_stats import as_index_array  # 導入索引陣列的轉換函數
+
+
+def content_hash(data):
+    """
+    Returns the SHA-256 of bytes, a NumPy image or a PIL image.
+    #返回位元組、NumPy 圖像或 PIL 圖像的 SHA-256。
+    """
+    if hasattr(data, "tobytes"):
+        data = data.tobytes()  # 圖像的像素內容
+    return hashlib.sha256(data).hexdigest()
+
+
+def filter_result(result, conf):
+    """
+    Returns the boxes of a result whose confidence is at least conf, as a new Results object.
+    #返回信心度不低於 conf 的框組成的新 Results 物件。
+    """
+    if result.boxes is None or len(result.boxes) == 0:
+        return result
+    return result[result.boxes.conf >= conf]  # 一次向量化遮罩
+
+
+def merge_tracked(result, tracked, conf):
+    """
+    Combines a frame's tracked boxes with its boxes below the tracking threshold, for recording in a DetectionLog.
+    #把一幀追蹤後的框和低於追蹤閾值的框合併，用於寫入 DetectionLog。
+
+    Parameters:
+        result (ultralytics.engine.results.Results): The frame's detections at the minimum threshold. #最低閾值下的偵測結果。
+        tracked (ultralytics.engine.results.Results): filter_result(result, conf) after the tracker update.
+            #以 conf 過濾並經過追蹤器更新的結果。
+        conf (float): The threshold the tracker ran at. #追蹤器使用的閾值。
+
+    Returns:
+        Results: The tracked boxes followed by the boxes below conf, which get track ID -1. #追蹤後的框，加上追蹤編號為 -1 的低閾值框。
+    """
+    if result.boxes is None or len(result.boxes) == 0:
+        return tracked
+
+    def with_ids(data):
+        if data.shape[1] == 7:
+            return data  # 已經帶有追蹤編號
+        return torch.cat([data[:, :4], torch.full_like(data[:, :1], -1), data[:, 4:]], dim=1)  # xyxy, id, conf, cls
+
+    data = result.boxes.data
+    below = with_ids(data[data[:, 4] < conf])
+    if tracked.boxes is not None and len(tracked.boxes):
+        below = torch.cat([with_ids(tracked.boxes.data.to(below.device, below.dtype)), below])
+    merged = result.new()
+    merged.update(boxes=below)
+    return merged
+
+
+class ResultCache:
+    """
+    Process-wide LRU cache of minimum-confidence detections.
+    #全進程共享、以最低信心閾值偵測結果組成的最近最少使用快取。
+
+    Parameters:
+        max_entries (int): Maximum number of cached results. #快取結果的數量上限。
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or settings.RESULT_CACHE_SIZE
+        self._entries = collections.OrderedDict()  # 鍵 -> Results
+        self._fingerprints = {}  # 權重路徑 -> 權重版本
+        self._lock = threading.Lock()
+        self.hits = 0  # 命中次數
+        self.misses = 0  # 未命中次數
+
+    def key(self, model, content_key):
+        """
+        Builds the cache key from the content hash, the model's registry key and its weights version.
+        #以內容雜湊、模型的註冊表鍵和權重版本建立快取鍵。
+        """
+        entry = model_registry.get_registry().find(model)
+        model_key = entry.key if entry is not None else (str(getattr(model, "ckpt_path", id(model))),)
+        weights_path = model_key[0]
+        with self._lock:
+            fingerprint = self._fingerprints.get(weights_path)
+        if fingerprint is None:
+            try:
+                fingerprint = model_export.weights_fingerprint(weights_path)
+            except OSError:
+                fingerprint = weights_path  # 不是文件的模型（例如測試用的物件）
+            with self._lock:
+                self._fingerprints[weights_path] = fingerprint
+        return content_key, model_key, fingerprint
+
+    def lookup(self, model, content_key):
+        """
+        Returns the cached minimum-confidence result, or None.
+        #返回快取的最低閾值結果，沒有則返回 None。
+        """
+        key = self.key(model, content_key)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        return result
+
+    def get(self, model, image, content_key=None):
+        """
+        Returns the minimum-confidence result for an image, running the model only on a cache miss.
+        #返回圖像的最低閾值結果，只有未命中時才執行模型。
+
+        Parameters:
+            model (YOLO): The model. #模型。
+            image: The image passed to model.predict (path, PIL image or NumPy array). #傳給 model.predict 的圖像。
+            content_key (str): The image's content hash; computed from the image when omitted. #圖像的內容雜湊。
+
+        Returns:
+            Results: The detections at settings.MIN_CONFIDENCE; filter them with filter_result. #最低閾值下的偵測結果。
+        """
+        content_key = content_key or content_hash(image)
+        result = self.lookup(model, content_key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        with model_registry.inference_lock(model):  # 共享模型上的推論需要序列化
+            result = model.predict(image, conf=settings.MIN_CONFIDENCE, verbose=False)[0].cpu()
+        key = self.key(model, content_key)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # 淘汰最久沒有使用的結果
+        return result
+
+
+COLUMNS = {
+    "frame": np.int32,  # 幀序號
+    "cls": np.int16,  # 類別索引
+    "conf": np.float32,  # 信心度
+    "xyxy": np.float32,  # 邊界框 (x1, y1, x2, y2)
+    "track_id": np.int32,  # 追蹤編號，沒有追蹤時為 -1
+}  # 偵測記錄的欄位和資料類型
+
+
+class DetectionLog:
+    """
+    Columnar record of every box of one video (frame, class, confidence, box, track ID), detected at the minimum threshold.
+    #以欄式陣列記錄一部視頻在最低閾值下的每個框（幀序號、類別、信心度、邊界框、追蹤編號）。
+
+    Parameters:
+        source_key (str): Identifies the video, e.g. its path or content hash. #視頻的標識，例如路徑或內容雜湊。
+        names (dict): The model's class index -> name mapping. #模型的類別索引到名稱的對應。
+        fps (float): The video's frame rate. #視頻的幀率。
+    """
+
+    def __init__(self, source_key, names, fps=None):
+        self.source_key = source_key
+        self.names = dict(names)
+        self.fps = fps or None
+        self.frames = 0  # 已記錄的幀數
+        self._chunks = []  # 每一幀的欄位陣列，讀取時再合併
+        self._columns = None  # 合併後的欄位快取
+
+    def append(self, result):
+        """
+        Records one frame's boxes.
+        #記錄一幀的框。
+        """
+        boxes = result.boxes
+        if boxes is not None and len(boxes):
+            count = len(boxes)
+            self._chunks.append({
+                "frame": np.full(count, self.frames, dtype=COLUMNS["frame"]),
+                "cls": as_index_array(boxes.cls).astype(COLUMNS["cls"]),
+                "conf": boxes.conf.cpu().numpy().astype(COLUMNS["conf"]),
+                "xyxy": boxes.xyxy.cpu().numpy().astype(COLUMNS["xyxy"]),
+                "track_id": (as_index_array(boxes.id) if boxes.id is not None else np.full(count, -1)).astype(
+                    COLUMNS["track_id"]),
+            })
+            self._columns = None
+        self.frames += 1
+
+    def columns(self):
+        """
+        Returns every column as aligned arrays, keyed like COLUMNS.
+        #以對齊的陣列返回所有欄位，鍵與 COLUMNS 相同。
+        """
+        if self._columns is None:
+            if self._chunks:
+                self._columns = {name: np.concatenate([chunk[name] for chunk in self._chunks]) for name in COLUMNS}
+                self._chunks = [self._columns]  # 合併後只保留一份
+            else:
+                self._columns = {name: np.zeros((0, 4) if name == "xyxy" else 0, dtype) for name, dtype in COLUMNS.items()}
+        return self._columns
+
+    def stats(self, conf):
+        """
+        Returns DetectionStats for the boxes at or above a confidence threshold.
+        #返回信心度不低於閾值的框的 DetectionStats。
+        """
+        columns = self.columns()
+        mask = columns["conf"] >= conf  # 一次向量化遮罩
+        return detection_stats.DetectionStats.from_detections(
+            self.names, columns["frame"][mask], columns["cls"][mask], self.frames, fps=self.fps
+        )
+
+
+_cache = ResultCache()  # 全進程共享的快取實例
+
+
+def get_cache():
+    """
+    Returns the process-wide result cache.
+    #返回全進程共享的結果快取。
+    """
+    return _cache
@@ -0,0 +1,202 @@
+#這段代碼實現了一個低延遲的 RTSP 讀取器（Latest-Frame Reader）。
+#原本的 play_rtsp_stream 以推論的速度用阻塞的 vid_cap.read() 拉取幀，攝像頭的緩衝區會被填滿，
+#幾分鐘後畫面就會比現場慢好幾秒，這對安全監控是不可接受的。而且第一次讀取失敗就會直接退出。
+#這個模組的主要功能如下：
+
+#背景線程持續讀取：
+
+#一個背景線程以攝像頭的速度不斷讀取幀，只保留最新的一幀（latest-frame-wins），
+#因此無論推論有多慢，顯示的畫面和現場之間的延遲都是有上限的。
+
+#統計丟棄的幀：
+
+#在被取用之前就被新幀覆蓋的幀會被計為丟棄幀，連同讀取數、重連次數一起提供給介面顯示。
+
+#自動重連：
+
+#讀取失敗或串流停滯時，會釋放捕獲對象並以指數退避的間隔重新連接。
+
+#read()、isOpened() 和 release() 的用法與 cv2.VideoCapture 相同，可以直接交給流水線使用。
+
+
+import threading  # 導入 threading 模組，用於背景讀取線程
+import time  # 導入 time 模組，用於退避和停滯偵測
+
+import cv2  # 導入 OpenCV 模組，用於捕獲 RTSP 流
+
+import settings  # 導入 settings 模組，包含重連相關的配置
+
+
+def open_capture(source, timeout=None):
+    """
+    Opens a video capture with a small internal buffer and, where supported, open/read timeouts.
+    #打開一個內部緩衝區很小的視頻捕獲對象，並在支援時設定打開和讀取的超時。
+
+    Parameters:
+        source (str): The stream URL. #串流的 URL。
+        timeout (float): Seconds before a blocking open or read gives up. #阻塞的打開或讀取放棄前的秒數。
+
+    Returns:
+        cv2.VideoCapture: The capture object (check isOpened()). #捕獲對象（需檢查 isOpened()）。
+    """
+    timeout = settings.RTSP_STALL_TIMEOUT if timeout is None else timeout
+    params = []
+    # 較舊的 OpenCV 版本沒有這些屬性
+    for name in ("CAP_PROP_OPEN_TIMEOUT_MSEC", "CAP_PROP_READ_TIMEOUT_MSEC"):
+        if hasattr(cv2, name):
+            params += [getattr(cv2, name), int(timeout * 1000)]
+    if params:
+        vid_cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+    else:
+        vid_cap = cv2.VideoCapture(source)
+    vid_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 盡量減少解碼器內部的緩衝
+    return vid_cap
+
+
+class LatestFrameReader:
+    """
+    Drains a live stream on a background thread and keeps only the newest frame.
+    #在背景線程中持續讀取即時串流，只保留最新的一幀。
+
+    Parameters:
+        source (str): The RTSP (or any OpenCV-readable) URL. #RTSP（或任何 OpenCV 可讀取的）URL。
+        stall_timeout (float): Seconds without a new frame before the stream is reopened. #沒有新幀多少秒後重新連接。
+        backoff (tuple): (initial, maximum) seconds between reconnect attempts. #重連間隔的 (初始, 最大) 秒數。
+        max_reconnects (int): Give up after this many consecutive failed reconnects; None retries forever.
+        #連續重連失敗多少次後放棄；None 表示永遠重試。
+    """
+
+    def __init__(self, source, stall_timeout=None, backoff=None, max_reconnects=None):
+        self.source = source
+        self.stall_timeout = settings.RTSP_STALL_TIMEOUT if stall_timeout is None else stall_timeout
+        self.backoff = backoff or settings.RTSP_RECONNECT_BACKOFF
+        self.max_reconnects = max_reconnects
+        self.frames_read = 0  # 從串流讀取到的幀數
+        self.frames_delivered = 0  # 交給呼叫者的幀數
+        self.frames_dropped = 0  # 被新幀覆蓋而沒有被取用的幀數
+        self.reconnects = 0  # 重新連接的次數
+        self.last_frame_time = None  # 最後一次讀到幀的時間
+        self._frame = None
+        self._seq = 0  # 最新幀的序號
+        self._delivered_seq = 0  # 最後交給呼叫者的幀的序號
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._closed = False  # 放棄重連或被釋放後為 True
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the background reader thread.
+        #啟動背景讀取線程。
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        delay, max_delay = self.backoff
+        failures = 0
+        vid_cap = None
+        while not self._stop.is_set():
+            if vid_cap is None:
+                vid_cap = open_capture(self.source, self.stall_timeout)
+                if not vid_cap.isOpened():
+                    vid_cap.release()
+                    vid_cap = None
+                    failures += 1
+                    if self.max_reconnects is not None and failures > self.max_reconnects:
+                        break  # 放棄重連
+                    self._stop.wait(delay)  # 指數退避
+                    delay = min(delay * 2, max_delay)
+                    continue
+                opened_at = time.monotonic()
+
+            success, image = vid_cap.read()  # 以串流的速度讀取，避免攝像頭緩衝區堆積
+            now = time.monotonic()
+            if success:
+                failures = 0
+                delay = self.backoff[0]
+                with self._cond:
+                    if self._seq > self._delivered_seq:
+                        self.frames_dropped += 1  # 上一幀還沒被取用就被覆蓋了
+                    self._frame = image
+                    self._seq += 1
+                    self.frames_read += 1
+                    self.last_frame_time = now
+                    self._cond.notify_all()
+                continue
+
+            # 讀取失敗或停滯：釋放後重新連接
+            last = max(self.last_frame_time or opened_at, opened_at)
+            if now - last < self.stall_timeout and vid_cap.isOpened():
+                self._stop.wait(0.01)
+                continue  # 短暫的讀取失敗，稍後繼續嘗試
+            vid_cap.release()
+            vid_cap = None
+            self.reconnects += 1
+
+        if vid_cap is not None:
+            vid_cap.release()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def isOpened(self):
+        """
+        Returns True while the reader is running (including while reconnecting).
+        #讀取器運行中（包括重連中）時返回 True。
+        """
+        return not self._closed and not self._stop.is_set()
+
+    def read(self, timeout=None):
+        """
+        Waits for a frame newer than the last one returned and returns it.
+        #等待一幀比上次返回的更新的幀並返回。
+
+        Parameters:
+            timeout (float): Maximum seconds to wait; None waits until a frame arrives or the reader closes.
+            #最長等待秒數；None 表示一直等待直到有新幀或讀取器關閉。
+
+        Returns:
+            tuple (bool, numpy.ndarray): Same as cv2.VideoCapture.read. #與 cv2.VideoCapture.read 相同。
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._seq == self._delivered_seq:
+                if self._closed or self._stop.is_set():
+                    return False, None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False, None
+                self._cond.wait(0.5 if remaining is None else min(remaining, 0.5))
+            self._delivered_seq = self._seq
+            self.frames_delivered += 1
+            return True, self._frame
+
+    def release(self):
+        """
+        Stops the reader thread and releases the stream.
+        #停止讀取線程並釋放串流。
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.stall_timeout + 1)
+            self._thread = None
+
+    def status_text(self):
+        """
+        Returns a one-line health summary for display.
+        #返回一行用於顯示的健康狀態摘要。
+        """
+        if self.last_frame_time is None:
+            age = "no frames yet"
+        else:
+            age = f"last frame {time.monotonic() - self.last_frame_time:.1f}s ago"
+        return (
+            f"read {self.frames_read}, shown {self.frames_delivered}, dropped {self.frames_dropped}, "
+            f"reconnects {self.reconnects}, {age}"
+        )
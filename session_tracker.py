@@ -0,0 +1,68 @@
+#這段代碼實現了與模型分離的追蹤器狀態（Session Tracker）。
+#model.track(..., persist=True) 把追蹤器掛在共享模型的 predictor 上，同一個模型只能有一份追蹤狀態，
+#多個攝像頭或多個會話共用一個模型時，彼此的軌跡會互相干擾。
+#這個模組的主要功能如下：
+
+#每個來源一個追蹤器：
+
+#直接建立 ultralytics 的 BYTETracker 或 BOTSORT，狀態保存在 SessionTracker 物件中，
+#模型只需要做一般的 predict（可以把多個來源的幀合成一個批次），再由每個來源自己的追蹤器更新結果。
+
+#與 model.track 相同的結果：
+
+#更新方式與 ultralytics 的追蹤回呼相同：只保留被追蹤到的框，並用 results.update(boxes=...) 寫入帶有追蹤編號的框，
+#之後的繪圖和統計（res.boxes.id）不需要任何修改。
+
+
+import torch  # 導入 torch，用於把追蹤結果寫回 Results
+from ultralytics.trackers.track import TRACKER_MAP  # 導入追蹤器類型到類別的對應（bytetrack / botsort）
+from ultralytics.utils import IterableSimpleNamespace, yaml_load  # 導入讀取追蹤器配置的工具
+from ultralytics.utils.checks import check_yaml  # 導入追蹤器配置文件的路徑解析
+
+
+class SessionTracker:
+    """
+    Tracker state for one video source, independent of the (shared) model.
+    #一個視頻來源的追蹤器狀態，與（共享的）模型無關。
+
+    Parameters:
+        tracker (str): The tracker configuration, e.g. "bytetrack.yaml" or "botsort.yaml". #追蹤器配置文件。
+        frame_rate (int): Frame rate used to size the tracker's lost-track buffer. #追蹤器用於計算遺失緩衝的幀率。
+    """
+
+    def __init__(self, tracker, frame_rate=30):
+        self.tracker_type = tracker
+        cfg = IterableSimpleNamespace(**yaml_load(check_yaml(tracker)))
+        if cfg.tracker_type not in TRACKER_MAP:
+            raise ValueError(f"Only {sorted(TRACKER_MAP)} trackers are supported, but got '{cfg.tracker_type}'")
+        self._tracker = TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
+
+    def update(self, result, frame):
+        """
+        Assigns track IDs to one frame's detections in place, like model.track(..., persist=True) does.
+        #像 model.track(..., persist=True) 一樣，為一幀的偵測結果分配追蹤編號。
+
+        Parameters:
+            result (ultralytics.engine.results.Results): The frame's detections from model.predict. #這一幀的偵測結果。
+            frame (numpy.ndarray): The BGR frame the detections came from (BOTSORT uses it for motion compensation).
+            #偵測結果對應的 BGR 幀（BOTSORT 會用它做相機運動補償）。
+
+        Returns:
+            Results: The tracked result (a subset of the detections, with IDs). #追蹤後的結果（帶有追蹤編號的框）。
+        """
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return result
+        tracks = self._tracker.update(det, frame)
+        if len(tracks) == 0:
+            return result
+        result = result[tracks[:, -1].astype(int)]  # 只保留被追蹤到的框
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))  # 寫入帶有追蹤編號的框
+        return result
+
+    def reset(self):
+        """
+        Forgets every track, e.g. when the source restarts.
+        #清除所有軌跡，例如來源重新開始時。
+        """
+        self._tracker.reset()
@@ -40,6 +40,7 @@ VIDEO = 'Video'  # 定義視頻來源
 YOUTUBE = 'Youtube'  # 定義YouTube視頻來源
 WEBCAM  = 'Webcam'  # 定義網絡攝像頭來源
 RTSP = 'RTSP'  # 定義RTSP流媒體來源
+MULTI_RTSP = 'Multi-RTSP'  # 定義多攝像頭RTSP來源
 SOURCE_LIST = [IMAGE, VIDEO, YOUTUBE, WEBCAM]  # 將所有來源類型保存在列表中
 
 # 圖像配置
@@ -49,9 +50,21 @@ DEFAULT_IMAGE = IMAGES_DIR / 'Detection.jpg'  # 定義默認圖像文件的路
 # 視頻配置
 VIDEO_DIR = ROOT / 'videos'  # 定義存放視頻的目錄路徑
 DEFAULT_VIDEO = VIDEO_DIR / 'video_7.mp4'  # 定義默認視頻文件的路徑
+VIDEOS_DICT = {path.name: path for path in sorted(VIDEO_DIR.glob('*.mp4'))}  # 定義可供選擇的內建視頻（文件名 -> 路徑）
+
+# 上傳暫存配置
+UPLOAD_SPOOL_DIR = ROOT / 'cache' / 'uploads'  # 定義上傳文件的暫存目錄
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 定義複製上傳文件時每一塊的大小（位元組）
+UPLOAD_SPOOL_MAX_AGE_HOURS = 24  # 定義暫存文件多少小時沒有使用後被刪除
+UPLOAD_SPOOL_QUOTA_MB = 2048  # 定義暫存目錄的總大小上限（MB）
 
 # Youtube配置
 DEFAULT_URL = "https://www.youtube.com/watch?v=41ID7HECvJI&t=7s"  # 定義默認YouTube視頻的URL
+YOUTUBE_CACHE_DIR = ROOT / 'cache' / 'youtube'  # 定義YouTube影片的快取目錄
+YOUTUBE_CACHE_QUOTA_MB = 4096  # 定義YouTube快取的總大小上限（MB），超過時刪除最久沒有使用的影片
+YOUTUBE_FORMAT = 'best'  # 定義YouTube影片的下載格式（yt_dlp 的格式選擇）
+YOUTUBE_STREAM_FORMAT = 'best[vcodec!=none][protocol^=http]/best'  # 定義邊下載邊分析時的串流格式（需要可直接以 HTTP 讀取的畫面）
+YOUTUBE_READAHEAD_FRAMES = 64  # 定義邊下載邊分析時預讀緩衝的最大幀數
 
 
 # 機器學習模型配置
@@ -60,3 +73,113 @@ MODEL_DIR = ROOT / 'weights'  # 定義存放模型權重的目錄路徑
 #SEGMENTATION_MODEL = MODEL_DIR / 'yolov8n-seg.pt'  # 定義分割模型的路徑（目前被註釋掉）
 BEST_MODEL = MODEL_DIR / 'Best.pt'  # 定義最佳模型的路徑
 TMB_SAFETY_MODEL = MODEL_DIR / 'TBMSafety.pt'  # 定義TMB安全模型的路徑
+MODELS = {'BEST': BEST_MODEL, 'TBM_SAFETY': TMB_SAFETY_MODEL}  # 定義任務名稱與模型路徑的對應，供介面和命令列共用
+
+# 追蹤器配置
+TRACKERS = ('bytetrack.yaml', 'botsort.yaml')  # 定義可選的追蹤器配置文件
+
+# 模型載入配置
+MODEL_TASK = 'detect'  # 定義模型的任務類型
+MODEL_DEVICE = None  # 定義推論設備，None 表示由 ultralytics 自動選擇（例如 'cpu' 或 '0'）
+INFERENCE_SIZE = 640  # 定義推論輸入大小（長邊像素），每一幀保持長寬比只縮放一次到這個大小
+WARMUP_IMAGE_SIZE = (INFERENCE_SIZE * 9 // 16, INFERENCE_SIZE)  # 定義預熱假幀的大小（高, 寬），與 16:9 畫面預處理後的大小一致
+
+# 模型執行後端配置
+MODEL_BACKENDS = {'BEST': 'pytorch', 'TBM_SAFETY': 'pytorch'}  # 定義每個模型的執行後端：'pytorch'、'onnx'、'openvino' 或 'torchscript'
+EXPORT_DIR = MODEL_DIR / 'exported'  # 定義導出模型的快取目錄
+EXPORT_IMAGE_SIZE = INFERENCE_SIZE  # 定義導出模型的輸入大小，與推論輸入大小一致
+
+# 推論服務配置
+INFERENCE_SERVICE_ENABLED = True  # 定義是否把所有會話的推論交給共享的推論工作進程（False 表示在各自的會話中推論）
+INFERENCE_SERVICE_MAX_BATCH = 8  # 定義推論工作進程每次 predict 的最大幀數
+INFERENCE_SERVICE_LATENCY_MS = 10  # 定義收到第一個請求後等待其他會話的請求湊成批次的毫秒數
+INFERENCE_SERVICE_MAX_PENDING = 8  # 定義等待推論的幀數超過多少時通知即時來源丟棄幀
+INFERENCE_SERVICE_TRACKER_TTL = 300  # 定義追蹤串流多少秒沒有使用後被清除
+INFERENCE_SERVICE_TIMEOUT = 60  # 定義等待一幀推論結果的最長秒數（包含工作進程第一次載入模型的時間）
+
+# 流水線配置
+PIPELINE_QUEUE_SIZE = 4  # 定義流水線各階段之間佇列的容量
+LIVE_QUEUE_SIZE = 1  # 定義即時來源的佇列容量，容量越小延遲越低
+LIVE_TARGET_FPS = 15  # 定義即時來源需要維持的顯示幀率
+LIVE_MAX_STRIDE = 10  # 定義自適應跳幀時最大的步長（每隔多少幀推論一次）
+
+# RTSP配置
+RTSP_STALL_TIMEOUT = 5.0  # 定義多少秒沒有新幀就視為停滯並重新連接
+RTSP_RECONNECT_BACKOFF = (0.5, 8.0)  # 定義重新連接的初始和最大退避秒數
+RTSP_STATUS_INTERVAL = 15  # 定義每隔多少幀更新一次串流狀態
+
+# 多攝像頭RTSP配置
+MULTI_RTSP_COLUMNS = 3  # 定義多攝像頭畫面每行顯示的攝像頭數
+MULTI_RTSP_POLL_TIMEOUT = 1.0  # 定義每一輪最多等待新幀的秒數
+MULTI_RTSP_POLL_INTERVAL = 0.005  # 定義沒有新幀時再次檢查前等待的秒數
+
+# 效能指標配置
+METRICS_PORT = 9108  # 定義 Prometheus 指標服務的本機端口
+METRICS_WINDOW = 120  # 定義計算最近延遲和每秒幀數時使用的樣本數
+
+# 顯示配置
+DISPLAY_FPS = 10  # 定義每秒最多推送到瀏覽器的幀數，其餘幀仍會被分析
+DISPLAY_JPEG_QUALITY = 75  # 定義推送圖像的 JPEG 品質
+DISPLAY_WIDTH = 720  # 定義推送圖像的寬度（像素）
+
+# 標註配置
+ANNOTATION_FONT_SCALE = 0.5  # 定義標籤的字體大小
+ANNOTATION_SPRITE_CACHE_SIZE = 2048  # 定義快取的文字圖塊（類別名稱或數字和顏色的組合）數量上限
+
+# 結果快取配置
+MIN_CONFIDENCE = 0.25  # 定義信心滑塊的最小值，快取的偵測結果都以這個閾值推論
+RESULT_CACHE_SIZE = 64  # 定義全進程共享的圖像偵測結果快取的數量上限
+
+# 視頻導出配置
+EXPORT_VIDEO_DIR = ROOT / 'cache' / 'exports'  # 定義標註視頻的導出目錄
+EXPORT_VIDEO_QUEUE_SIZE = 64  # 定義等待寫入的最大幀數，佇列已滿時丟棄幀而不是讓流水線等待
+EXPORT_VIDEO_CODECS = ('avc1', 'mp4v')  # 定義依序嘗試的 MP4 編碼器（avc1 可以直接在瀏覽器中播放）
+EXPORT_VIDEO_QUOTA_MB = 2048  # 定義導出目錄的總大小上限（MB），超過時刪除最舊的文件
+EXPORT_VIDEO_CLOSE_TIMEOUT = 5.0  # 定義提供下載前等待寫入線程完成的最長秒數
+EXPORT_VIDEO_RATE_FRAMES = 30  # 定義即時來源以最初多少幀量測實際的輸出幀率（量測完成前這些幀暫存在記憶體中）
+
+# 偵測索引配置
+DETECTION_INDEX_DIR = ROOT / 'cache' / 'index'  # 定義已分析視頻的欄式偵測索引的存放目錄
+DETECTION_INDEX_QUOTA_MB = 1024  # 定義偵測索引的總大小上限（MB），超過時刪除最久沒有使用的索引
+
+# 偵測統計配置
+STATS_HISTORY_MINUTES = 60  # 定義按分鐘直方圖保留最近多少分鐘
+
+# 軌跡統計配置
+TRACK_CAPACITY = 1024  # 定義同時保留的軌跡數上限
+TRACK_STALE_FRAMES = 90  # 定義多少幀沒有出現後結束一條軌跡
+TRACK_MIN_FRAMES = 3  # 定義軌跡被計入不重複物件數所需的最少出現幀數
+TRACK_HISTORY_LIMIT = 500  # 定義保留最近多少條已結束軌跡的停留時間
+
+# 防護裝備規則配置
+PPE_RULES = {
+    'BEST': [
+        {'name': 'No hardhat', 'person': 'Person', 'requires': ['Hardhat', 'Helmet'], 'violates': ['NO-Hardhat'], 'region': (0.0, 0.4)},
+        {'name': 'No safety vest', 'person': 'Person', 'requires': ['Safety Vest', 'Vest'], 'violates': ['NO-Safety Vest'], 'region': (0.15, 0.8)},
+    ],
+    'TBM_SAFETY': [
+        {'name': 'No helmet', 'person': 'Person', 'requires': ['Helmet', 'Hardhat'], 'violates': ['No-Helmet', 'NO-Hardhat'], 'region': (0.0, 0.4)},
+        {'name': 'No safety vest', 'person': 'Person', 'requires': ['Vest', 'Safety Vest'], 'violates': ['No-Vest', 'NO-Safety Vest'], 'region': (0.15, 0.8)},
+    ],
+}  # 定義每個模型的規則：人員類別、必須配戴的裝備（任一即可）、代表違規的類別、裝備應在人員框的哪一段高度（比例）；模型沒有的類別會被忽略
+PPE_MIN_CONTAINMENT = 0.5  # 定義裝備框至少有多少比例落在人員區域內才屬於這個人
+PPE_DEBOUNCE_FRAMES = 5  # 定義追蹤時一條軌跡連續違規多少幀才成立
+PPE_CLEAR_FRAMES = 15  # 定義追蹤時一條軌跡連續合規多少幀才解除違規
+PPE_EVENT_HISTORY = 1000  # 定義保留最近多少個違規事件
+
+# 事件記錄配置
+EVENT_LOG_ENABLED = True  # 定義是否把偵測和違規事件寫入本機 SQLite 資料庫
+EVENT_LOG_DB = ROOT / 'cache' / 'events.sqlite3'  # 定義事件資料庫的路徑
+EVENT_LOG_BUCKET_SECONDS = 1.0  # 定義事件按多少秒匯總成一行
+EVENT_LOG_QUEUE_SIZE = 1024  # 定義等待寫入的最大批數，佇列已滿時丟棄而不是讓偵測循環等待
+EVENT_LOG_BATCH_ROWS = 500  # 定義每個寫入交易的最大行數
+EVENT_LOG_FLUSH_SECONDS = 1.0  # 定義事件等待合併寫入的最長秒數
+EVENT_LOG_RETENTION_DAYS = 90  # 定義事件保留的天數，更早的事件在寫入線程啟動時刪除
+EVENT_LOG_QUERY_LIMIT = 500  # 定義歷史頁面列出的最多違規事件數
+EVENT_LOG_QUERY_TTL = 30  # 定義歷史頁面的查詢結果快取秒數
+
+# 平行分段配置
+SEGMENT_MIN_FRAMES = 300  # 定義每個分段的最少幀數，短視頻不會被切得太碎
+SEGMENT_TRACK_OVERLAP = 30  # 定義追蹤時每個分段提前開始追蹤的幀數，用於在分段邊界銜接軌跡
+SEGMENT_STITCH_IOU = 0.5  # 定義分段邊界上兩個框視為同一物件的最低 IoU
+SEGMENT_TRACK_ID_STRIDE = 1_000_000  # 定義每個分段追蹤編號的間隔，避免不同分段的編號衝突
@@ -0,0 +1,6 @@
+import sys  # 導入 sys 模組，讓測試可以導入倉庫根目錄的模組
+from pathlib import Path  # 從pathlib導入Path類，用於取得倉庫根目錄
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # 應用程序的模組都在倉庫根目錄中
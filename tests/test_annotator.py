@@ -0,0 +1,81 @@
+#annotator.Annotator 的測試：信心度和追蹤編號每一幀都不同，快取的文字圖塊數量仍必須有上限。
+
+import numpy as np  # 導入 numpy，用於產生測試幀和偵測結果
+import pytest  # 導入 pytest 測試框架
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+import annotator  # 導入被測試的標註器模組
+
+NAMES = {0: "person", 1: "helmet", 2: "vest"}
+
+
+class FakeTensor:
+    """A stand-in for a CPU tensor holding a NumPy array."""
+
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class FakeBoxes:
+    """A stand-in for ultralytics Boxes in the (x1, y1, x2, y2, [id], conf, cls) layout."""
+
+    def __init__(self, data, is_track):
+        self.data = FakeTensor(data)
+        self.is_track = is_track
+
+    def __len__(self):
+        return len(self.data.array)
+
+
+class FakeResult:
+    """A stand-in for an ultralytics Results object with boxes only."""
+
+    def __init__(self, image, data, is_track):
+        self.orig_img = image
+        self.boxes = FakeBoxes(data, is_track)
+        self.masks = None
+        self.keypoints = None
+        self.names = NAMES
+
+
+def random_result(rng, frame, is_track=True):
+    count = 20
+    x1y1 = rng.uniform(0, 500, size=(count, 2))
+    x2y2 = x1y1 + rng.uniform(10, 100, size=(count, 2))
+    columns = [x1y1, x2y2]
+    if is_track:
+        columns.append((frame * count + np.arange(count))[:, None])  # 每一幀都是新的追蹤編號
+    columns.append(rng.uniform(0.25, 1.0, size=(count, 1)))  # 每一幀都是新的信心度
+    columns.append(rng.integers(0, len(NAMES), size=(count, 1)))
+    data = np.hstack(columns).astype(np.float32)
+    return FakeResult(np.zeros((640, 640, 3), dtype=np.uint8), data, is_track)
+
+
+def test_sprite_cache_stays_bounded_over_many_frames():
+    rng = np.random.default_rng(0)
+    frame_annotator = annotator.Annotator()
+    sizes = []
+    for frame in range(300):
+        frame_annotator.draw(random_result(rng, frame))
+        sizes.append(len(frame_annotator._sprites))
+    # 只快取類別名稱、數字和符號的片段：3 個類別各一種顏色，"id:"、空格、"." 和 10 個數字
+    assert sizes[-1] <= len(NAMES) * (len(NAMES) + 13)
+    assert sizes[-1] == sizes[len(sizes) // 2]  # 前半段之後不再增長
+
+
+def test_composed_label_matches_whole_label():
+    frame_annotator = annotator.Annotator()
+    colour = (56, 56, 255)
+    whole = frame_annotator.sprite("id:12 person 0.87", colour)
+    pieces = ["id:", "1", "2", " ", "person", " ", "0", ".", "8", "7"]
+    composed = frame_annotator.compose(pieces, colour)
+    assert composed.shape[0] == whole.shape[0]
+    assert abs(composed.shape[1] - whole.shape[1]) <= len(pieces)  # 每個片段的寬度最多有一個像素的取整誤差
@@ -0,0 +1,64 @@
+#detection_stats.DetectionStats 的測試：一次向量化建立的統計必須與逐幀 update() 累積的統計相同。
+
+import numpy as np  # 導入 numpy，用於產生測試用的偵測記錄
+
+import detection_stats  # 導入被測試的統計模組
+
+NAMES = {0: "person", 1: "helmet", 2: "vest"}
+
+
+def replay(frames, classes, frame_count, fps, history_minutes):
+    """Feeds columnar detections to update() frame by frame."""
+    stats = detection_stats.DetectionStats(NAMES, fps=fps, history_minutes=history_minutes)
+    for frame in range(frame_count):
+        stats.update(classes[frames == frame])
+    return stats
+
+
+def assert_same(vectorized, incremental):
+    np.testing.assert_array_equal(vectorized.counts, incremental.counts)
+    np.testing.assert_array_equal(vectorized.frames_with, incremental.frames_with)
+    np.testing.assert_array_equal(vectorized.max_simultaneous, incremental.max_simultaneous)
+    assert vectorized.frames == incremental.frames
+    minutes, counts = vectorized.minute_histogram()
+    expected_minutes, expected_counts = incremental.minute_histogram()
+    np.testing.assert_array_equal(minutes, expected_minutes)
+    np.testing.assert_array_equal(counts, expected_counts)
+
+
+def test_from_detections_matches_update():
+    rng = np.random.default_rng(0)
+    frames = np.sort(rng.integers(0, 600, size=400))
+    classes = rng.integers(0, 3, size=400)
+    vectorized = detection_stats.DetectionStats.from_detections(NAMES, frames, classes, 600, fps=1.0, history_minutes=4)
+    assert_same(vectorized, replay(frames, classes, 600, 1.0, 4))
+
+
+def test_trailing_minutes_without_detections():
+    # 10 分鐘的視頻只有前 4 分鐘有偵測；最近 3 分鐘（7、8、9）應該是空的，而不是第 1 到 3 分鐘
+    frames = np.arange(0, 240, 10)
+    classes = frames % 3
+    vectorized = detection_stats.DetectionStats.from_detections(NAMES, frames, classes, 600, fps=1.0, history_minutes=3)
+    minutes, counts = vectorized.minute_histogram()
+    np.testing.assert_array_equal(minutes, [7, 8, 9])
+    assert not counts.any()
+    assert vectorized.counts.sum() == len(frames)
+    assert_same(vectorized, replay(frames, classes, 600, 1.0, 3))
+
+
+def test_no_detections():
+    empty = np.array([], dtype=np.int64)
+    vectorized = detection_stats.DetectionStats.from_detections(NAMES, empty, empty, 120, fps=1.0, history_minutes=3)
+    assert vectorized.summary() == []
+    assert_same(vectorized, replay(empty, empty, 120, 1.0, 3))
+
+
+def test_start_frame_uses_video_time():
+    # 從第 3 分鐘開始重播的範圍，直方圖應該從第 3 分鐘開始，而不是第 0 分鐘
+    stats = detection_stats.DetectionStats(NAMES, fps=1.0, history_minutes=3, start_frame=180)
+    for _ in range(90):
+        stats.update([0])
+    minutes, counts = stats.minute_histogram()
+    np.testing.assert_array_equal(minutes, [3, 4])
+    np.testing.assert_array_equal(counts[:, 0], [60, 30])
+    assert stats.frames == 90
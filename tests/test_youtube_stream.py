@@ -0,0 +1,107 @@
+#youtube_stream.StreamingCapture 的離線測試：以假的解碼器和本機視頻文件代替 YouTube 串流，不需要連上網路。
+
+import threading  # 導入 threading 模組，用於等待解碼線程填滿緩衝
+
+import numpy as np  # 導入 numpy，用於產生測試幀
+import pytest  # 導入 pytest 測試框架
+
+cv2 = pytest.importorskip("cv2")
+
+import youtube_stream  # 導入被測試的串流讀取模組
+
+
+class FakeCapture:
+    """A stand-in for cv2.VideoCapture that yields numbered frames."""
+
+    def __init__(self, source, api=None, frames=10):
+        self.source = source
+        self.remaining = frames
+        self.index = 0
+        self.released = threading.Event()
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FPS: 25.0, cv2.CAP_PROP_FRAME_COUNT: 10.0}.get(prop, 0.0)
+
+    def read(self):
+        if self.remaining == 0:
+            return False, None
+        self.remaining -= 1
+        frame = np.full((4, 4, 3), self.index, dtype=np.uint8)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        self.released.set()
+
+
+@pytest.fixture
+def fake_capture(monkeypatch):
+    captures = []
+
+    def factory(source, api=None):
+        captures.append(FakeCapture(source, api))
+        return captures[-1]
+
+    monkeypatch.setattr(youtube_stream.cv2, "VideoCapture", factory)
+    return captures
+
+
+def read_all(capture):
+    frames = []
+    while True:
+        success, frame = capture.read()
+        if not success:
+            return frames
+        frames.append(frame)
+
+
+def test_local_sources_are_not_resolved():
+    assert not youtube_stream.is_youtube_url("videos/video_1.mp4")
+    assert not youtube_stream.is_youtube_url("http://127.0.0.1:8000/video.mp4")
+    assert youtube_stream.is_youtube_url("https://www.youtube.com/watch?v=abc")
+    assert youtube_stream.resolve_stream("videos/video_1.mp4") == "videos/video_1.mp4"
+
+
+def test_frames_arrive_in_order_then_end(fake_capture):
+    capture = youtube_stream.StreamingCapture("clip.mp4", readahead=3).start()
+    assert capture.get(cv2.CAP_PROP_FPS) == 25.0
+    frames = read_all(capture)
+    assert [int(frame[0, 0, 0]) for frame in frames] == list(range(10))
+    assert not capture.isOpened()
+    assert capture.frames_decoded == 10
+    assert fake_capture[0].released.wait(2)  # 解碼線程結束時釋放串流
+    capture.release()
+
+
+def test_readahead_buffer_is_bounded(fake_capture):
+    capture = youtube_stream.StreamingCapture("clip.mp4", readahead=2).start()
+    for _ in range(100):
+        if capture.buffered() == 2:
+            break
+        threading.Event().wait(0.01)
+    assert capture.buffered() == 2  # 讀取者沒有取用時解碼線程暫停
+    assert capture.frames_decoded <= 3
+    capture.release()
+    assert not capture.isOpened()
+    assert capture.read() == (False, None)  # 釋放後不再返回緩衝中的幀，也不會重新打開串流
+    assert len(fake_capture) == 1
+
+
+def test_local_video_file(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (32, 24))
+    if not writer.isOpened():
+        pytest.skip("OpenCV was built without a usable video writer")
+    for index in range(5):
+        writer.write(np.full((24, 32, 3), index * 40, dtype=np.uint8))
+    writer.release()
+
+    capture = youtube_stream.StreamingCapture(str(path), readahead=2).start()
+    frames = read_all(capture)
+    capture.release()
+    assert len(frames) == 5
+    assert frames[0].shape == (24, 32, 3)
+    assert capture.first_frame_seconds is not None
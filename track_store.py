@@ -0,0 +1,173 @@
+#這段代碼實現了以追蹤編號為基礎的物件計數和停留時間統計（Track Store）。
+#啟用追蹤器（bytetrack.yaml / botsort.yaml）時，每個來源自己的 session_tracker.SessionTracker 會為每個物件分配編號，
+#但原本應用程序把這些編號丟掉了，匯總只能說出出現過哪些類別，無法說出經過了多少個不同的工人或安全帽。
+#這個模組的主要功能如下：
+
+#逐軌跡的增量記錄：
+
+#每條軌跡記錄第一次和最後一次出現的幀、出現的幀數、每個類別的投票數，以及第一次和最後一次出現的時間。
+#軌跡資料存放在固定容量的 NumPy 陣列中，每一幀以向量化的索引一次更新該幀所有的軌跡。
+
+#不重複物件計數和停留時間：
+
+#每條軌跡的類別由投票數最多的類別決定，出現幀數少於 settings.TRACK_MIN_FRAMES 的軌跡視為雜訊不計入。
+#視頻文件使用視頻時間（幀序號 / 幀率），即時來源使用實際經過的時間。
+
+#有上限的記憶體：
+
+#超過 settings.TRACK_STALE_FRAMES 幀沒有再出現的軌跡會被結束：計入各類別的總數後釋放槽位，
+#只保留最近 settings.TRACK_HISTORY_LIMIT 條已結束軌跡的停留時間。
+
+
+import collections  # 導入 collections 模組，用於保存最近結束的軌跡
+import time  # 導入 time 模組，用於即時來源的計時
+
+import numpy as np  # 導入 numpy，用於固定容量的軌跡陣列
+
+import settings  # 導入 settings 模組，包含軌跡相關的配置
+from detection_stats import as_index_array  # 導入索引陣列的轉換函數，與偵測統計共用
+
+
+class TrackStore:
+    """
+    Bounded per-track statistics built from tracker IDs.
+    #以追蹤編號建立的、記憶體有上限的逐軌跡統計。
+
+    Parameters:
+        names (dict): The model's class index -> name mapping (model.names). #模型的類別索引到名稱的對應。
+        fps (float): Frame rate of a video file; None or 0 uses wall-clock time (live sources).
+        #視頻文件的幀率；None 或 0 表示使用實際時間（即時來源）。
+        capacity (int): Maximum number of simultaneously open tracks. #同時保留的軌跡數上限。
+        stale_frames (int): Frames without a sighting after which a track is closed. #多少幀沒有出現後結束軌跡。
+        min_frames (int): Minimum sightings for a track to be counted. #軌跡被計入所需的最少出現幀數。
+        start_frame (int): Video frame index of the first update, e.g. the start of a replayed range.
+        #第一次 update 對應的視頻幀序號，例如重播範圍的起始幀。
+    """
+
+    def __init__(self, names, fps=None, capacity=None, stale_frames=None, min_frames=None, start_frame=0):
+        self.names = dict(names)
+        self.fps = fps or None
+        self.start_frame = start_frame
+        self.capacity = capacity or settings.TRACK_CAPACITY
+        self.stale_frames = stale_frames or settings.TRACK_STALE_FRAMES
+        self.min_frames = min_frames or settings.TRACK_MIN_FRAMES
+        num_classes = max(self.names) + 1 if self.names else 0
+
+        self.track_ids = np.full(self.capacity, -1, dtype=np.int64)  # 每個槽位的追蹤編號，-1 表示空槽
+        self.first_frame = np.zeros(self.capacity, dtype=np.int64)  # 第一次出現的幀
+        self.last_frame = np.zeros(self.capacity, dtype=np.int64)  # 最後一次出現的幀
+        self.first_time = np.zeros(self.capacity, dtype=np.float64)  # 第一次出現的時間（秒）
+        self.last_time = np.zeros(self.capacity, dtype=np.float64)  # 最後一次出現的時間（秒）
+        self.sightings = np.zeros(self.capacity, dtype=np.int64)  # 出現的幀數
+        self.class_votes = np.zeros((self.capacity, num_classes), dtype=np.int64)  # 每個類別的投票數
+        self._slots = {}  # 追蹤編號 -> 槽位
+
+        self.closed_counts = np.zeros(num_classes, dtype=np.int64)  # 已結束並計入的軌跡在各類別的數量
+        self.closed_tracks = collections.deque(maxlen=settings.TRACK_HISTORY_LIMIT)  # 最近結束的軌跡
+        self.frames = 0  # 已處理的幀數
+        self._start = time.monotonic()
+
+    def _now(self):
+        if self.fps:
+            return (self.start_frame + self.frames) / self.fps  # 視頻時間
+        return time.monotonic() - self._start  # 實際經過的時間
+
+    def update(self, track_ids, classes):
+        """
+        Adds one frame's tracked detections.
+        #加入一幀的追蹤結果。
+
+        Parameters:
+            track_ids: The frame's tracker IDs, e.g. res[0].boxes.id (None when nothing is tracked). Negative IDs
+                mark boxes the tracker did not follow and are skipped. #這一幀的追蹤編號；負數表示沒有被追蹤的框，會被略過。
+            classes: The matching class indices, e.g. res[0].boxes.cls. #對應的類別索引。
+        """
+        frame, now = self.start_frame + self.frames, self._now()
+        if track_ids is not None:
+            track_ids = as_index_array(track_ids)
+            classes = as_index_array(classes)
+            tracked = track_ids >= 0  # 重播低於追蹤閾值的框時編號為 -1
+            track_ids, classes = track_ids[tracked], classes[tracked]
+            slots = np.fromiter((self._slot_for(track_id, frame, now) for track_id in track_ids.tolist()),
+                                dtype=np.int64, count=len(track_ids))
+            self.last_frame[slots] = frame
+            self.last_time[slots] = now
+            self.sightings[slots] += 1  # 同一幀中的追蹤編號不會重複
+            np.add.at(self.class_votes, (slots, classes), 1)
+        self.frames += 1
+        if self.frames % self.stale_frames == 0:
+            self._close(np.flatnonzero((self.track_ids >= 0) & (self.last_frame < frame - self.stale_frames)))
+
+    def update_from_result(self, result):
+        """
+        Adds one frame's tracked detections from an ultralytics Results object.
+        #從 ultralytics 的 Results 物件加入一幀的追蹤結果。
+        """
+        boxes = result.boxes
+        if boxes is None or boxes.id is None:
+            self.update(None, None)
+        else:
+            self.update(boxes.id, boxes.cls)
+
+    def _slot_for(self, track_id, frame, now):
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            self.last_frame[slot] = frame  # 先標記為這一幀出現過，同一幀中建立新軌跡時不會把它當成最久沒有出現的軌跡結束
+            return slot
+        free = np.flatnonzero(self.track_ids < 0)
+        if len(free):
+            slot = int(free[0])
+        else:
+            slot = int(np.argmin(self.last_frame))  # 沒有空槽時結束最久沒有出現的軌跡
+            self._close(np.array([slot]))
+        self.track_ids[slot] = track_id
+        self.first_frame[slot] = self.last_frame[slot] = frame
+        self.first_time[slot] = self.last_time[slot] = now
+        self.sightings[slot] = 0
+        self.class_votes[slot] = 0
+        self._slots[track_id] = slot
+        return slot
+
+    def _close(self, slots):
+        if not len(slots):
+            return
+        counted = slots[self.sightings[slots] >= self.min_frames]
+        labels = self.class_votes[counted].argmax(axis=1)
+        self.closed_counts += np.bincount(labels, minlength=len(self.closed_counts))
+        self.closed_tracks.extend(self._rows(counted, labels))
+        for track_id in self.track_ids[slots].tolist():
+            del self._slots[track_id]
+        self.track_ids[slots] = -1
+
+    def _rows(self, slots, labels):
+        return [
+            {
+                "track_id": int(self.track_ids[slot]),
+                "name": self.names.get(int(label), str(label)),
+                "first_frame": int(self.first_frame[slot]),
+                "last_frame": int(self.last_frame[slot]),
+                "dwell_seconds": round(float(self.last_time[slot] - self.first_time[slot]), 2),
+            }
+            for slot, label in zip(slots.tolist(), labels.tolist())
+        ]
+
+    def _open_counted(self):
+        slots = np.flatnonzero((self.track_ids >= 0) & (self.sightings >= self.min_frames))
+        return slots, self.class_votes[slots].argmax(axis=1)
+
+    def unique_counts(self):
+        """
+        Returns the number of distinct tracked objects per class name, closed and still open.
+        #返回每個類別不重複物件的數量，包含已結束和仍在追蹤中的軌跡。
+        """
+        slots, labels = self._open_counted()
+        counts = self.closed_counts + np.bincount(labels, minlength=len(self.closed_counts))
+        return {self.names.get(int(index), str(index)): int(counts[index]) for index in np.flatnonzero(counts)}
+
+    def tracks(self):
+        """
+        Returns per-track rows (recently closed tracks first, then open ones) with dwell times.
+        #返回每條軌跡的資料和停留時間（先列出最近結束的軌跡，再列出仍在追蹤中的軌跡）。
+        """
+        slots, labels = self._open_counted()
+        return list(self.closed_tracks) + self._rows(slots, labels)
@@ -0,0 +1,121 @@
+#這段代碼實現了上傳文件的暫存區（Upload Spool）。
+#原本 VideoDetector.detect 在每一次 Streamlit 重跑（包括每一次拖動滑塊）都會以 source_vid.read() 把整個上傳文件讀進記憶體，
+#再寫到 videos/<文件名>；大文件會讓記憶體用量加倍並不斷重寫磁碟，而且不同會話上傳同名文件時會互相覆蓋。
+#這個模組的主要功能如下：
+
+#分塊複製、內容雜湊命名：
+
+#上傳文件以 settings.UPLOAD_CHUNK_SIZE 為單位分塊複製到暫存區，同時計算 SHA-256，
+#完成後以 os.replace 原子地改名為 <雜湊><副檔名>，相同內容的文件只會保存一份，不同內容永遠不會互相覆蓋。
+
+#在重跑之間重用：
+
+#同一次上傳（Streamlit 的 file_id）只會複製一次，之後的重跑直接返回同一個文件路徑。
+#播放和偵測都直接使用這個文件路徑，不需要把內容讀成位元組。
+
+#按時間和總大小清理：
+
+#超過 settings.UPLOAD_SPOOL_MAX_AGE_HOURS 沒有使用的文件會被刪除，
+#總大小超過 settings.UPLOAD_SPOOL_QUOTA_MB 時再從最久沒有使用的文件開始刪除。
+
+#這個模組不依賴 Streamlit（上傳文件只需要提供 read()、seek()、name 和 file_id）。
+
+
+import hashlib  # 導入 hashlib 模組，用於計算內容雜湊
+import os  # 導入 os 模組，用於原子改名和更新文件時間
+import tempfile  # 導入 tempfile 模組，用於建立複製中的暫存文件
+import threading  # 導入 threading 模組，保護上傳記錄
+import time  # 導入 time 模組，用於按時間清理
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import settings  # 導入 settings 模組，包含暫存區相關的配置
+import disk_quota  # 導入容量淘汰模組，與其他快取目錄使用相同的淘汰方式
+
+_PARTIAL_SUFFIX = ".partial"  # 複製中的暫存文件副檔名
+_spooled = {}  # Streamlit 上傳的 file_id -> 暫存文件路徑
+_lock = threading.Lock()
+
+
+def spool_dir():
+    """
+    Returns the spool directory, creating it when needed.
+    #返回暫存區目錄，需要時建立。
+    """
+    directory = Path(settings.UPLOAD_SPOOL_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def spool(uploaded_file):
+    """
+    Copies an uploaded file into the spool once and returns its content-addressed path.
+    #把上傳文件複製到暫存區（只複製一次），並返回以內容雜湊命名的路徑。
+
+    Parameters:
+        uploaded_file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded file. #上傳的文件。
+
+    Returns:
+        pathlib.Path: The spooled file, named <sha256><suffix>. #暫存文件，以 <SHA-256><副檔名> 命名。
+    """
+    upload_id = getattr(uploaded_file, "file_id", None) or id(uploaded_file)
+    with _lock:
+        path = _spooled.get(upload_id)
+    if path is not None and path.exists():
+        os.utime(path)  # 更新使用時間，避免被清理
+        return path
+
+    directory = spool_dir()
+    suffix = Path(uploaded_file.name).suffix.lower()
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    fd, partial = tempfile.mkstemp(suffix=_PARTIAL_SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for chunk in iter(lambda: uploaded_file.read(settings.UPLOAD_CHUNK_SIZE), b""):  # 分塊複製，不把整個文件讀進記憶體
+                digest.update(chunk)
+                output.write(chunk)
+        path = directory / f"{digest.hexdigest()}{suffix}"
+        if path.exists():
+            os.remove(partial)  # 相同內容已經在暫存區中
+            os.utime(path)
+        else:
+            os.replace(partial, path)  # 原子改名，其他會話不會看到複製了一半的文件
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        uploaded_file.seek(0)
+
+    with _lock:
+        _spooled[upload_id] = path
+    cleanup(keep=path)
+    return path
+
+
+def cleanup(keep=None, max_age_hours=None, quota_mb=None):
+    """
+    Deletes spooled files that are too old, then the least recently used ones until the spool fits its quota.
+    #刪除太久沒有使用的暫存文件，再從最久沒有使用的文件開始刪除，直到暫存區不超過容量上限。
+
+    Parameters:
+        keep (pathlib.Path): A file that must not be deleted, e.g. the one just spooled. #不能刪除的文件。
+        max_age_hours (float): Maximum hours since last use, defaults to settings.UPLOAD_SPOOL_MAX_AGE_HOURS. #最長保留時間。
+        quota_mb (float): Maximum total size, defaults to settings.UPLOAD_SPOOL_QUOTA_MB. #總大小上限（MB）。
+
+    Returns:
+        list: The deleted files. #被刪除的文件。
+    """
+    max_age = (max_age_hours or settings.UPLOAD_SPOOL_MAX_AGE_HOURS) * 3600
+    quota = (quota_mb or settings.UPLOAD_SPOOL_QUOTA_MB) * 1024 * 1024
+    now = time.time()
+    files = [
+        path for path in spool_dir().iterdir()
+        if path.is_file() and not (path.suffix == _PARTIAL_SUFFIX and now - path.stat().st_mtime < max_age)
+    ]  # 略過其他會話可能正在複製的文件
+    deleted = disk_quota.evict_oldest(files, quota, keep=[keep] if keep else (), max_age_seconds=max_age)
+    with _lock:
+        for upload_id, path in list(_spooled.items()):
+            if path in deleted:
+                del _spooled[upload_id]
+    return deleted
@@ -0,0 +1,192 @@
+#這段代碼實現了在背景寫入的標註視頻導出（Annotated Video Export）。
+#原本視頻分析的唯一輸出是逐幀推送到 st_frame 的圖像，會話結束後標註過的結果就消失了。
+#這個模組的主要功能如下：
+
+#背景寫入：
+
+#標註好的幀放入容量為 settings.EXPORT_VIDEO_QUEUE_SIZE 的佇列，由背景線程以 cv2.VideoWriter 寫成 MP4，
+#編碼和磁碟寫入不佔用推論和標註的時間。
+
+#永不阻塞：
+
+#write() 只以 put_nowait 放入佇列，佇列已滿（例如磁碟太慢）時丟棄這一幀並計數，
+#流水線永遠不會因為導出而等待；丟棄的幀數會顯示給使用者。
+
+#編碼器選擇：
+
+#依序嘗試 settings.EXPORT_VIDEO_CODECS 中的 FourCC（瀏覽器可以直接播放的 avc1 優先，沒有時使用 mp4v），
+#視頻大小在收到第一幀時才決定，與實際標註的幀一致。
+
+#即時來源的幀率：
+
+#RTSP 的幀以流水線實際處理的速度到達，而不是攝像頭或目標顯示的幀率。
+#指定 measure_frames 時，寫入線程先暫存最初幾幀並以它們的到達時間量測實際幀率，再以這個幀率打開文件，
+#播放速度與實際時間一致。
+
+#導出的文件存放在 settings.EXPORT_VIDEO_DIR 中，總大小超過 settings.EXPORT_VIDEO_QUOTA_MB 時從最舊的文件開始刪除。
+
+
+import queue  # 導入 queue 模組，用於寫入線程的佇列
+import threading  # 導入 threading 模組，用於背景寫入
+import time  # 導入 time 模組，用於產生導出文件名
+import uuid  # 導入 uuid 模組，讓不同會話同時導出的文件名不會衝突
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import cv2  # 導入 OpenCV 模組，用於寫入 MP4
+
+import settings  # 導入 settings 模組，包含導出相關的配置
+import disk_quota  # 導入容量淘汰模組，與其他快取目錄使用相同的淘汰方式
+
+_END = object()  # 導出結束的標記
+
+
+def export_dir():
+    """
+    Returns the export directory, creating it when needed.
+    #返回導出目錄，需要時建立。
+    """
+    directory = Path(settings.EXPORT_VIDEO_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def export_path(name):
+    """
+    Returns a new, unique MP4 path in the export directory for a source name.
+    #為來源名稱返回導出目錄中一個新的、不重複的 MP4 路徑。
+    """
+    stem = "".join(char if char.isalnum() or char in "-_" else "_" for char in Path(str(name)).stem)[:40] or "video"
+    return export_dir() / f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.mp4"
+
+
+def open_writer(path, fps, size, codecs=None):
+    """
+    Opens a cv2.VideoWriter with the first FourCC that works.
+    #以第一個可用的 FourCC 打開 cv2.VideoWriter。
+
+    Raises:
+        ValueError: When none of the codecs can be opened. #所有編碼器都無法打開時。
+    """
+    for codec in codecs or settings.EXPORT_VIDEO_CODECS:
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*codec), fps, size)
+        if writer.isOpened():
+            return writer
+        writer.release()
+    raise ValueError(f"No usable video codec for {path}")
+
+
+class VideoExporter:
+    """
+    Writes annotated frames to an MP4 file on a background thread, dropping frames instead of blocking.
+    #在背景線程中把標註好的幀寫入 MP4 文件，佇列已滿時丟棄幀而不是阻塞。
+
+    Parameters:
+        path (str): The output file. #輸出文件。
+        fps (float): The frame rate written to the file; falls back to 25 when the source reports none.
+        #寫入文件的幀率，來源沒有提供時使用 25。
+        queue_size (int): Maximum number of frames waiting to be written. #等待寫入的最大幀數。
+        measure_frames (int): Live sources: hold this many frames and open the file at their measured arrival rate
+            instead of fps. #即時來源：先暫存這麼多幀，以量測到的到達幀率（而不是 fps）打開文件。
+    """
+
+    def __init__(self, path, fps=None, queue_size=None, measure_frames=None):
+        self.path = Path(path)
+        self.fps = fps if fps and fps > 0 else 25.0
+        self.measure_frames = measure_frames or 0
+        self._queue = queue.Queue(maxsize=queue_size or settings.EXPORT_VIDEO_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._closed = False
+        self.error = None  # 寫入線程中發生的錯誤
+        self.frames_written = 0  # 已寫入的幀數
+        self.frames_dropped = 0  # 佇列已滿時丟棄的幀數
+        self._thread.start()
+
+    def _run(self):
+        writer = None
+        pending = []  # 量測幀率期間暫存的 (到達時間, 幀)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is not _END and writer is None and len(pending) + 1 < self.measure_frames:
+                    pending.append(item)  # 還在量測實際的到達幀率
+                    continue
+                if item is not _END:
+                    pending.append(item)
+                if writer is None and pending:
+                    if self.measure_frames and len(pending) > 1:
+                        elapsed = pending[-1][0] - pending[0][0]
+                        if elapsed > 0:
+                            self.fps = (len(pending) - 1) / elapsed  # 流水線實際輸出的幀率
+                    height, width = pending[0][1].shape[:2]
+                    writer = open_writer(self.path, self.fps, (width, height))  # 以第一幀的大小打開
+                for _, frame in pending:
+                    writer.write(frame)
+                    self.frames_written += 1
+                pending = []
+                if item is _END:
+                    break
+        except Exception as ex:
+            self.error = ex
+            while self._queue.get() is not _END:  # 繼續取出剩餘的幀，讓 write() 和 close() 不會卡住
+                pass
+        finally:
+            if writer is not None:
+                writer.release()  # 寫入 MP4 的索引，文件到這時才完整
+
+    def write(self, frame):
+        """
+        Queues a BGR frame for writing without waiting. Returns False when the frame was dropped.
+        #不等待地把一個 BGR 幀放入寫入佇列；這一幀被丟棄時返回 False。
+        """
+        if self._closed or self.error is not None:
+            return False
+        try:
+            self._queue.put_nowait((time.monotonic(), frame))  # 記錄到達時間，用於量測即時來源的幀率
+            return True
+        except queue.Full:
+            self.frames_dropped += 1  # 寫入跟不上時丟棄，而不是讓流水線等待
+            return False
+
+    def close(self, timeout=None):
+        """
+        Finishes writing the queued frames and closes the file.
+        #寫完佇列中的幀並關閉文件。
+
+        Parameters:
+            timeout (float): Maximum seconds to wait for the writer; None waits until it is done.
+            #等待寫入線程的最長秒數；None 表示一直等到完成。
+
+        Returns:
+            bool: True when the file is complete. #文件已完整時返回 True。
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_END)  # 寫入線程持續取出幀，這裡只會短暫等待
+        self._thread.join(timeout)
+        return self.finished()
+
+    def finished(self):
+        """
+        Returns True when the writer has closed a non-empty file.
+        #寫入線程已經關閉一個非空文件時返回 True。
+        """
+        return not self._thread.is_alive() and self.error is None and self.frames_written > 0
+
+    def status_text(self):
+        """
+        Returns a one-line summary of written and dropped frames.
+        #返回已寫入和丟棄幀數的一行摘要。
+        """
+        return f"{self.frames_written} frames exported, {self.frames_dropped} dropped"
+
+
+def cleanup(keep=None, quota_mb=None):
+    """
+    Deletes the oldest exports until the export directory fits its quota.
+    #從最舊的導出文件開始刪除，直到導出目錄不超過容量上限。
+
+    Returns:
+        list: The deleted files. #被刪除的文件。
+    """
+    quota = (quota_mb or settings.EXPORT_VIDEO_QUOTA_MB) * 1024 * 1024
+    return disk_quota.evict_oldest(export_dir().glob("*.mp4"), quota, keep=[keep] if keep else ())
@@ -0,0 +1,291 @@
+#這段代碼實現了長視頻的平行分段處理（Parallel Segment Processing）。
+#單進程的 VideoDetector 循環在多核心伺服器上只用到一小部分的 CPU，一小時的錄影要處理很久。
+#這個模組的主要功能如下：
+
+#按時間分段：
+
+#根據視頻的總幀數把視頻切成數個連續的分段，每個分段由工作進程以 cv2.CAP_PROP_POS_FRAMES 直接跳到起始幀開始讀取。
+#部分編碼格式無法精確跳轉，跳轉後會檢查實際位置，不一致時改為從頭逐幀略過（grab）到起始幀。
+
+#多進程推論：
+
+#每個工作進程各自從模型註冊表載入一份模型，並把 PyTorch 和 OpenCV 限制為單線程，
+#多個進程之間不會互相搶佔核心，只做偵測時處理速度接近隨核心數線性增長。
+
+#按順序合併：
+
+#分段的結果按幀的順序合併成一條偵測時間軸（與 cli.py 相同的逐框輸出行），再以 DetectionStats 和 TrackStore 匯總。
+
+#分段邊界的追蹤編號：
+
+#啟用追蹤器時，每個分段使用自己全新的追蹤器，追蹤編號在分段之間互不相干。處理方式如下：
+#1. 除了第一個分段，每個分段都從起始幀之前 settings.SEGMENT_TRACK_OVERLAP 幀開始追蹤，讓追蹤器在重疊區內建立軌跡；
+#   重疊區的結果不會輸出，只用於銜接。
+#2. 在重疊區的最後一幀（上一個分段的最後一幀），以相同類別、IoU 不低於 settings.SEGMENT_STITCH_IOU 的框
+#   把新分段的軌跡對應到上一個分段的軌跡，沿用上一個分段的編號。
+#3. 沒有對應上的軌跡使用 分段序號 * settings.SEGMENT_TRACK_ID_STRIDE + 原編號，保證不會和其他分段的編號衝突。
+#因此一個物件跨越分段邊界時通常保持同一個編號；若在邊界附近被遮擋而沒有對應上，會被計為兩個不同的物件。
+
+#工作進程會重新導入這個模組，因此這裡不導入 Streamlit。
+
+#用法範例：
+#python video_segments.py videos/video_7.mp4 --workers 8 --output timeline.jsonl
+
+
+import argparse  # 導入 argparse 模組，用於解析命令列參數
+import concurrent.futures  # 導入 concurrent.futures 模組，用於多進程處理
+import json  # 導入 json 模組，用於寫出時間軸
+import os  # 導入 os 模組，用於取得核心數
+import sys  # 導入 sys 模組，用於輸出進度
+
+import cv2  # 導入 OpenCV 模組，用於讀取和跳轉視頻
+import numpy as np  # 導入 numpy，用於銜接追蹤編號時的 IoU 計算
+
+import settings  # 導入 settings 模組，包含分段相關的配置
+import cli  # 導入命令列工具模組，使用相同的逐框輸出行格式
+import detection_stats  # 導入偵測統計模組，用於合併後的匯總
+import track_store  # 導入軌跡統計模組，用於合併後的不重複物件數
+from model_export import box_iou  # 導入 IoU 計算函數，用於銜接分段邊界的軌跡
+
+_model = None  # 每個工作進程各自持有的模型
+
+
+def plan_segments(frame_count, workers, min_frames=None):
+    """
+    Splits [0, frame_count) into contiguous segments of roughly equal length.
+    #把 [0, 幀數) 切成長度大致相等的連續分段。
+
+    Parameters:
+        frame_count (int): Total frames in the video. #視頻的總幀數。
+        workers (int): Number of worker processes. #工作進程數。
+        min_frames (int): Minimum frames per segment, so short videos are not over-split. #每個分段的最少幀數。
+
+    Returns:
+        list of tuple (int, int): (start frame, end frame) pairs. #(起始幀, 結束幀) 列表。
+    """
+    min_frames = min_frames or settings.SEGMENT_MIN_FRAMES
+    count = max(1, min(workers, frame_count // min_frames))
+    bounds = np.linspace(0, frame_count, count + 1).astype(int)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _init_worker(model_path, backend):
+    global _model
+    import torch  # 在工作進程中才導入
+    import model_registry
+
+    torch.set_num_threads(1)  # 每個進程只使用一個核心，並行由多進程提供
+    cv2.setNumThreads(1)
+    _model = model_registry.get_registry().get(model_path, backend=backend).model
+
+
+def _seek(vid_cap, frame_index):
+    """Positions a capture at frame_index, falling back to sequential grabs when the codec cannot seek exactly."""
+    vid_cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    if int(vid_cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return
+    vid_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_index):
+        if not vid_cap.grab():
+            break
+
+
+def _process_segment(video_path, start, end, read_from, conf, tracker, batch_size, size):
+    """
+    Runs detection over frames [read_from, end) of a video in a worker process.
+    #在工作進程中對視頻的 [read_from, end) 幀進行偵測。
+
+    Returns:
+        tuple (dict, list): The model's class names and the output rows of every frame, in order, starting at read_from.
+        #模型的類別名稱，以及從 read_from 開始每一幀的輸出行。
+    """
+    import batch_inference  # 在工作進程中才導入
+    import preprocess
+    import session_tracker
+
+    source = str(video_path)
+    vid_cap = cv2.VideoCapture(source)
+    if not vid_cap.isOpened():
+        raise ValueError(f"Unable to open video: {source}")
+    frames = []
+    preprocessor = preprocess.FramePreprocessor()  # 每一幀只縮放一次到模型輸入大小，框再映射回讀取的幀
+    frame_tracker = session_tracker.SessionTracker(tracker) if tracker else None  # 每個分段使用全新的追蹤器
+    try:
+        _seek(vid_cap, read_from)
+        frame_index = read_from
+        while frame_index < end:
+            batch = batch_inference.read_batch(vid_cap, min(batch_size, end - frame_index), size=size)
+            if not batch:
+                break
+            inputs = preprocessor.prepare(batch)
+            results = _model.predict(inputs, conf=conf, imgsz=preprocessor.size, verbose=False)
+            if frame_tracker is not None:
+                results = [frame_tracker.update(result, image) for result, image in zip(results, inputs)]  # 按幀的順序更新軌跡
+            for result in preprocessor.restore(results, batch):
+                frames.append(cli.result_rows(source, frame_index, result))
+                frame_index += 1
+    finally:
+        vid_cap.release()
+    return dict(_model.names), frames
+
+
+def stitch_track_ids(previous_rows, current_rows, iou_threshold=None):
+    """
+    Maps a new segment's track IDs to the previous segment's IDs on a frame both segments tracked.
+    #在兩個分段都追蹤過的同一幀上，把新分段的追蹤編號對應到上一個分段的編號。
+
+    Parameters:
+        previous_rows (list): The previous segment's rows for the frame, with final IDs. #上一個分段在該幀的輸出行。
+        current_rows (list): The new segment's rows for the same frame, with local IDs. #新分段在同一幀的輸出行。
+        iou_threshold (float): Minimum IoU for two boxes of the same class to be the same object. #視為同一物件的最低 IoU。
+
+    Returns:
+        dict: New segment local ID -> previous segment ID. #新分段的編號到上一個分段編號的對應。
+    """
+    iou_threshold = settings.SEGMENT_STITCH_IOU if iou_threshold is None else iou_threshold
+    previous_rows = [row for row in previous_rows if row["track_id"] is not None]
+    current_rows = [row for row in current_rows if row["track_id"] is not None]
+    if not previous_rows or not current_rows:
+        return {}
+
+    def boxes(rows):
+        return np.array([[row["x1"], row["y1"], row["x2"], row["y2"]] for row in rows], dtype=np.float64)
+
+    iou = box_iou(boxes(current_rows), boxes(previous_rows))
+    same_class = np.array([row["class_id"] for row in current_rows])[:, None] == \
+        np.array([row["class_id"] for row in previous_rows])[None, :]
+    iou[~same_class] = 0
+    mapping = {}
+    for flat in np.argsort(-iou, axis=None):  # 由 IoU 最高的配對開始貪婪匹配
+        current, previous = np.unravel_index(flat, iou.shape)
+        if iou[current, previous] < iou_threshold:
+            break
+        local_id, previous_id = current_rows[current]["track_id"], previous_rows[previous]["track_id"]
+        if local_id not in mapping and previous_id not in mapping.values():
+            mapping[local_id] = previous_id
+    return mapping
+
+
+def iter_timeline(video_path, model_path, conf, tracker=None, workers=None, backend=None, batch_size=8,
+                  size=None, on_segment=None, names_out=None):
+    """
+    Processes a video in parallel segments and yields each frame's rows in frame order.
+    #以平行分段處理一個視頻，並按幀的順序產生每一幀的輸出行。
+
+    Parameters:
+        video_path (str): The video file. #視頻文件。
+        model_path (str): The weights path from settings.MODELS. #模型權重路徑。
+        conf (float): The model's confidence threshold. #模型的信心閾值。
+        tracker (str): Tracker configuration; None runs detection only. #追蹤器配置；None 表示只做偵測。
+        workers (int): Worker processes; defaults to the number of CPU cores. #工作進程數，預設為核心數。
+        backend (str): The runtime backend, defaults to settings.MODEL_BACKENDS. #執行後端。
+        batch_size (int): Frames per predict call. #每次 predict 的幀數。
+        size (tuple): (width, height) to resize to, or None to keep the original resolution. #縮放大小。
+        on_segment (callable): Called with (segments done, total segments) as segments are merged. #分段合併時的進度回呼。
+        names_out (dict): Filled with the model's class names when the first segment arrives, for callers that do
+            not load the model themselves. #第一個分段完成時填入模型的類別名稱，供沒有自行載入模型的呼叫者使用。
+
+    Yields:
+        tuple (int, list): (frame index, output rows) with track IDs made unique across segments.
+        #(幀序號, 輸出行)，追蹤編號在分段之間保持唯一。
+    """
+    vid_cap = cv2.VideoCapture(str(video_path))
+    frame_count = int(vid_cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    vid_cap.release()
+    if frame_count <= 0:
+        raise ValueError(f"Unable to read the frame count of: {video_path}")
+    workers = workers or os.cpu_count() or 1
+    segments = plan_segments(frame_count, workers)
+    overlap = settings.SEGMENT_TRACK_OVERLAP if tracker else 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(segments), initializer=_init_worker, initargs=(str(model_path), backend)
+    ) as executor:
+        futures = [
+            executor.submit(_process_segment, video_path, start, end, max(0, start - overlap), conf, tracker,
+                            batch_size, size)
+            for start, end in segments
+        ]
+        previous_last_rows = []  # 上一個分段最後一幀的輸出行（已是最終編號）
+        for index, ((start, end), future) in enumerate(zip(segments, futures)):
+            names, frames = future.result()  # 按分段順序等待，後面的分段可能已經先完成
+            if names_out is not None:
+                names_out.update(names)
+            read_from = max(0, start - overlap)
+            mapping = {}
+            if tracker and index > 0 and start - read_from > 0 and len(frames) >= start - read_from:
+                mapping = stitch_track_ids(previous_last_rows, frames[start - read_from - 1])
+            offset = index * settings.SEGMENT_TRACK_ID_STRIDE
+            for frame_rows in frames[start - read_from:]:
+                for row in frame_rows:
+                    if row["track_id"] is not None:
+                        row["track_id"] = mapping.get(row["track_id"], offset + row["track_id"])
+            owned = frames[start - read_from:]
+            for frame_index, frame_rows in enumerate(owned, start=start):
+                yield frame_index, frame_rows
+            previous_last_rows = owned[-1] if owned else []
+            if on_segment is not None:
+                on_segment(index + 1, len(segments))
+
+
+def record_rows(stats, tracks, rows):
+    """
+    Adds one timeline frame to the per-class and per-track summaries.
+    #把時間軸上的一幀加入按類別和逐軌跡的匯總。
+
+    Parameters:
+        stats (DetectionStats): Per-class statistics. #按類別的統計。
+        tracks (TrackStore): Per-track statistics, or None without a tracker. #逐軌跡的統計，不追蹤時為 None。
+        rows (list): The frame's output rows from iter_timeline. #iter_timeline 產生的這一幀的輸出行。
+    """
+    stats.update([row["class_id"] for row in rows])
+    if tracks is not None:
+        tracked = [row for row in rows if row["track_id"] is not None]
+        tracks.update([row["track_id"] for row in tracked] if tracked else None, [row["class_id"] for row in tracked])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run detection over one long video in parallel segments.")
+    parser.add_argument("video", help="The video file to process.")
+    parser.add_argument("--model", choices=sorted(settings.MODELS), default="BEST", help="Model from settings.MODELS.")
+    parser.add_argument("--conf", type=float, default=0.4, help="Confidence threshold.")
+    parser.add_argument("--tracker", choices=("none",) + settings.TRACKERS, default="none", help="Tracker to use.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per predict call.")
+    parser.add_argument("--output", default="timeline.jsonl", help="Where to write the merged detection timeline.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tracker = None if args.tracker == "none" else args.tracker
+    vid_cap = cv2.VideoCapture(args.video)
+    fps = vid_cap.get(cv2.CAP_PROP_FPS)
+    vid_cap.release()
+
+    def progress(done, total):
+        print(f"[{done}/{total}] segments merged", file=sys.stderr)
+
+    names = {}  # 主進程不載入模型，類別名稱由第一個分段帶回
+    stats = tracks = None
+    with open(args.output, "w", encoding="utf-8") as output:
+        for _, rows in iter_timeline(args.video, settings.MODELS[args.model], args.conf, tracker, args.workers,
+                                     batch_size=args.batch_size, on_segment=progress, names_out=names):
+            if stats is None:
+                stats = detection_stats.DetectionStats(names, fps=fps)
+                tracks = track_store.TrackStore(names, fps=fps) if tracker else None
+            for row in rows:
+                output.write(json.dumps(row, ensure_ascii=False) + "\n")
+            record_rows(stats, tracks, rows)
+    if stats is None:
+        return 1  # 沒有讀到任何幀
+    for row in stats.summary():
+        print(f"{row['name']}: {row['detections']} detections in {row['frames']} frames", file=sys.stderr)
+    if tracks is not None:
+        for name, count in tracks.unique_counts().items():
+            print(f"{name}: {count} unique tracks", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
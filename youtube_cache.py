@@ -0,0 +1,172 @@
+#這段代碼實現了 YouTube 下載的本機快取（YouTube Download Cache）。
+#原本 YouTubeDetector.download_video 每次點擊 "Detect Objects" 都會重新下載整部影片，
+#而且寫入固定的 C:/Users/lab612/... 路徑，下載過的影片既不會被重用，也不會被清理。
+#這個模組的主要功能如下：
+
+#以影片 ID 和格式作為鍵：
+
+#快取文件名稱由 YouTube 影片 ID 和下載格式的雜湊組成，存放在 settings.YOUTUBE_CACHE_DIR 中，
+#重新分析已下載過的影片時直接使用快取文件，不需要等待下載。
+
+#原子下載：
+
+#下載先寫入暫存目錄，完成後才以 os.replace 移到快取目錄，快取目錄中不會出現下載了一半的文件。
+#同一個進程中（Streamlit 的所有會話）同時請求同一部影片時，只有一個會話下載，其他會話等待並取用同一個文件。
+
+#容量上限和最近最少使用淘汰：
+
+#每次命中都會更新文件的修改時間，快取總大小超過 settings.YOUTUBE_CACHE_QUOTA_MB 時，
+#從最久沒有使用的文件開始刪除，正在下載或剛剛取用的文件不會被刪除。
+
+
+import hashlib  # 導入 hashlib 模組，用於計算下載格式的雜湊
+import os  # 導入 os 模組，用於原子移動和更新文件時間
+import re  # 導入 re 模組，用於從網址中取出影片 ID
+import shutil  # 導入 shutil 模組，用於刪除暫存目錄
+import tempfile  # 導入 tempfile 模組，用於建立下載用的暫存目錄
+import threading  # 導入 threading 模組，讓同一部影片只下載一次
+from pathlib import Path  # 從pathlib導入Path類，用於處理系統路徑
+
+import yt_dlp as youtube_dl  # 導入 yt_dlp，用於解析和下載 YouTube 影片
+
+import settings  # 導入 settings 模組，包含快取相關的配置
+import disk_quota  # 導入容量淘汰模組，與其他快取目錄使用相同的淘汰方式
+
+_VIDEO_ID_PATTERN = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})")  # 常見的 YouTube 網址格式
+_STAGING_PREFIX = ".download-"  # 下載中的暫存目錄前綴
+
+
+def video_id(url):
+    """
+    Returns the YouTube video ID of a URL, asking yt_dlp only when the URL format is not recognised.
+    #返回網址的 YouTube 影片 ID，只有無法辨識網址格式時才向 yt_dlp 查詢。
+    """
+    match = _VIDEO_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    with youtube_dl.YoutubeDL({"quiet": True}) as ydl:
+        return ydl.extract_info(url, download=False)["id"]
+
+
+class YouTubeCache:
+    """
+    Content-addressed cache of downloaded YouTube videos with a size quota and LRU eviction.
+    #以影片 ID 和格式為鍵、有容量上限並按最近最少使用淘汰的 YouTube 影片快取。
+
+    Parameters:
+        directory (str): Where cached videos are stored, defaults to settings.YOUTUBE_CACHE_DIR. #快取目錄。
+        quota_mb (float): Maximum total size of the cache in megabytes. #快取的總大小上限（MB）。
+        video_format (str): The yt_dlp format selector, defaults to settings.YOUTUBE_FORMAT. #yt_dlp 的格式選擇。
+    """
+
+    def __init__(self, directory=None, quota_mb=None, video_format=None):
+        self.directory = Path(directory or settings.YOUTUBE_CACHE_DIR)
+        self.quota_bytes = int((quota_mb or settings.YOUTUBE_CACHE_QUOTA_MB) * 1024 * 1024)
+        self.video_format = video_format or settings.YOUTUBE_FORMAT
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # 保護下面的字典
+        self._key_locks = {}  # 每個鍵一把鎖，同一部影片只下載一次
+        self._busy = set()  # 正在下載的鍵，不會被淘汰
+
+    def key(self, url):
+        """
+        Returns the cache key for a URL: "<video id>-<format hash>".
+        #返回網址的快取鍵："<影片 ID>-<格式雜湊>"。
+        """
+        format_hash = hashlib.sha1(self.video_format.encode("utf-8")).hexdigest()[:8]
+        return f"{video_id(url)}-{format_hash}"
+
+    def lookup(self, key):
+        """
+        Returns the cached file for a key, or None.
+        #返回鍵對應的快取文件，沒有則返回 None。
+        """
+        for path in self.directory.glob(f"{key}.*"):
+            if path.is_file():
+                return path
+        return None
+
+    def get(self, url):
+        """
+        Returns a local file for a YouTube URL, downloading it only when it is not cached.
+        #返回 YouTube 網址對應的本機文件，只有沒有快取時才下載。
+
+        Parameters:
+            url (str): The YouTube video URL. #YouTube 影片網址。
+
+        Returns:
+            pathlib.Path: The cached video file. #快取的影片文件。
+
+        Raises:
+            ValueError: When the download produced no file. #下載沒有產生文件時。
+        """
+        key = self.key(url)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # 同一個鍵只允許一個會話下載，其他會話等待下載完成後直接取用
+        with key_lock:
+            path = self.lookup(key)
+            if path is None:
+                with self._lock:
+                    self._busy.add(key)
+                try:
+                    path = self._download(url, key)
+                finally:
+                    with self._lock:
+                        self._busy.discard(key)
+            os.utime(path)  # 更新使用時間，用於最近最少使用淘汰
+        self.evict(keep=path)
+        return path
+
+    def _download(self, url, key):
+        staging = Path(tempfile.mkdtemp(prefix=_STAGING_PREFIX, dir=self.directory))
+        try:
+            ydl_opts = {
+                "format": self.video_format,
+                "quiet": True,
+                "outtmpl": str(staging / f"{key}.%(ext)s"),  # 先下載到暫存目錄
+                "retries": 3,  # Retry if there are temporary issues
+            }
+            with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+                info_dict = ydl.extract_info(url, download=True)
+                downloaded = Path(ydl.prepare_filename(info_dict))
+            if not downloaded.exists():
+                raise ValueError("Failed to download video.")
+            target = self.directory / downloaded.name
+            os.replace(downloaded, target)  # 原子移動，快取目錄中不會出現下載了一半的文件
+            return target
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self, keep=None):
+        """
+        Deletes least recently used videos until the cache fits its quota.
+        #從最久沒有使用的影片開始刪除，直到快取大小不超過上限。
+
+        Parameters:
+            keep (pathlib.Path): A file that must not be deleted, e.g. the one just returned. #不能刪除的文件。
+
+        Returns:
+            list: The deleted files. #被刪除的文件。
+        """
+        with self._lock:
+            busy = set(self._busy)
+        files = [path for path in self.directory.iterdir() if path.is_file()]
+        in_use = [path for path in files if path == keep or path.name.split(".")[0] in busy]  # 其他會話正在下載或使用
+        return disk_quota.evict_oldest(files, self.quota_bytes, keep=in_use)
+
+
+_cache = None  # 全進程共享的快取實例
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide YouTube cache, shared by every Streamlit session.
+    #返回全進程共享的 YouTube 快取，所有 Streamlit 會話共用。
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = YouTubeCache()
+        return _cache
@@ -0,0 +1,191 @@
+#這段代碼實現了邊下載邊分析的 YouTube 串流讀取（Progressive YouTube Streaming）。
+#即使有了下載快取，第一次分析一部長影片時仍要等 ydl.extract_info(url, download=True) 下載完整部影片才開始解碼。
+#這個模組的主要功能如下：
+
+#解析串流網址：
+
+#透過 yt_dlp 只解析（不下載）影片，取得同時包含畫面的直接媒體網址，交給 OpenCV（FFMPEG）邊接收邊解碼，
+#第一次偵測只需要等待幾秒，而不是整部影片的下載時間。
+
+#有上限的預讀緩衝：
+
+#背景線程持續解碼並把幀放入容量為 settings.YOUTUBE_READAHEAD_FRAMES 的佇列，
+#吸收網路速度的波動；佇列滿時解碼線程暫停，記憶體用量不會隨影片長度增長。
+
+#可離線測試：
+
+#本機文件路徑或非 YouTube 的 HTTP 網址（例如用 python -m http.server 提供的文件）會直接作為串流來源，
+#不需要連上 YouTube 也能測試整條路徑。
+
+#讀取器提供與 cv2.VideoCapture 相容的 read()、get()、isOpened() 和 release()，可以直接交給 helper.run_frame_pipeline。
+
+
+import queue  # 導入 queue 模組，用於預讀緩衝
+import threading  # 導入 threading 模組，用於背景解碼
+import time  # 導入 time 模組，用於計算第一幀的等待時間
+from urllib.parse import urlparse  # 導入 urlparse，用於判斷來源是否為 YouTube 網址
+
+import cv2  # 導入 OpenCV 模組，用於解碼串流
+
+import settings  # 導入 settings 模組，包含串流相關的配置
+
+_YOUTUBE_HOSTS = ("youtube.com", "youtu.be")  # 需要經過 yt_dlp 解析的網域
+_END = object()  # 串流結束的標記
+_CACHED_PROPERTIES = (
+    cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT, cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT,
+)  # 打開串流時記錄的屬性
+
+
+def is_youtube_url(source):
+    """
+    Returns True when a source is a YouTube page URL that yt_dlp must resolve.
+    #來源是需要 yt_dlp 解析的 YouTube 網址時返回 True。
+    """
+    host = urlparse(str(source)).netloc.lower()
+    return any(host == name or host.endswith("." + name) for name in _YOUTUBE_HOSTS)
+
+
+def resolve_stream(source, video_format=None):
+    """
+    Resolves a YouTube URL to a direct media URL; local files and other URLs are returned unchanged.
+    #把 YouTube 網址解析成直接的媒體網址；本機文件和其他網址原樣返回。
+
+    Parameters:
+        source (str): A YouTube URL, an HTTP media URL or a local file path. #YouTube 網址、HTTP 媒體網址或本機文件路徑。
+        video_format (str): The yt_dlp format selector, defaults to settings.YOUTUBE_STREAM_FORMAT. #yt_dlp 的格式選擇。
+
+    Returns:
+        str: A source OpenCV can open. #OpenCV 可以打開的來源。
+    """
+    if not is_youtube_url(source):
+        return str(source)
+    import yt_dlp as youtube_dl  # 只有解析 YouTube 網址時才需要
+
+    with youtube_dl.YoutubeDL({"format": video_format or settings.YOUTUBE_STREAM_FORMAT, "quiet": True}) as ydl:
+        info = ydl.extract_info(source, download=False)  # 只解析，不下載
+    if info.get("url"):
+        return info["url"]
+    formats = info.get("requested_formats") or []
+    video = next((fmt for fmt in formats if fmt.get("vcodec") not in (None, "none")), None)  # 分開的影音格式只取畫面
+    if video is None:
+        raise ValueError("No streamable video format found.")
+    return video["url"]
+
+
+class StreamingCapture:
+    """
+    Decodes a (remote) media stream on a background thread into a bounded read-ahead buffer.
+    #在背景線程中解碼（遠端）媒體串流，並放入有上限的預讀緩衝。
+
+    Parameters:
+        source (str): A YouTube URL, an HTTP media URL or a local file path. #YouTube 網址、HTTP 媒體網址或本機文件路徑。
+        readahead (int): Maximum number of decoded frames buffered ahead of the reader. #預讀緩衝的最大幀數。
+    """
+
+    def __init__(self, source, readahead=None):
+        self.source = source
+        self.readahead = readahead or settings.YOUTUBE_READAHEAD_FRAMES
+        self._queue = queue.Queue(maxsize=self.readahead)
+        self._stop = threading.Event()
+        self._capture = None
+        self._properties = {}  # 打開時讀取的串流屬性，解碼線程釋放串流後仍可查詢
+        self._thread = None
+        self._error = None  # 背景線程中發生的錯誤，在 read() 時重新拋出
+        self._finished = False
+        self.started_at = None  # 開始解析的時間
+        self.first_frame_seconds = None  # 從開始到第一幀解碼完成的秒數
+        self.frames_decoded = 0  # 已解碼的幀數
+
+    def start(self):
+        """
+        Resolves and opens the stream, then starts the decoding thread. Returns self.
+        #解析並打開串流，然後啟動解碼線程，並返回自身。
+        """
+        if self._thread is None and not self._stop.is_set():  # 已釋放的讀取器不會重新打開
+            self.started_at = time.monotonic()
+            self._capture = cv2.VideoCapture(resolve_stream(self.source), cv2.CAP_FFMPEG)
+            if not self._capture.isOpened():
+                raise ValueError(f"Unable to open stream: {self.source}")
+            for prop in _CACHED_PROPERTIES:
+                self._properties[prop] = self._capture.get(prop)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                success, image = self._capture.read()
+                if not success:
+                    break
+                if self.first_frame_seconds is None:
+                    self.first_frame_seconds = time.monotonic() - self.started_at
+                self.frames_decoded += 1
+                self._put(image)
+        except Exception as ex:
+            self._error = ex
+        finally:
+            self._capture.release()  # 只在解碼線程中釋放，避免與進行中的 read() 競爭
+            self._put(_END)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)  # 緩衝已滿時等待讀取者取用
+                return
+            except queue.Full:
+                continue
+
+    def read(self):
+        """
+        Returns the next frame like cv2.VideoCapture.read, waiting for the stream when the buffer is empty.
+        #與 cv2.VideoCapture.read 相同地返回下一幀，緩衝為空時等待串流。
+        """
+        if self._finished or self._stop.is_set():
+            return False, None
+        self.start()
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    return False, None  # 已被釋放
+        if item is _END:
+            self._finished = True
+            if self._error is not None:
+                raise self._error
+            return False, None
+        return True, item
+
+    def get(self, prop):
+        """
+        Returns a property of the underlying stream recorded when it was opened (FPS, frame count or size).
+        #返回打開串流時記錄的屬性（幀率、總幀數或大小）。
+        """
+        self.start()
+        return self._properties.get(prop, 0.0)
+
+    def isOpened(self):
+        """
+        Returns True until the stream has ended and the buffer has been drained.
+        #在串流結束並且緩衝被讀完之前返回 True。
+        """
+        return not self._finished and not self._stop.is_set()
+
+    def buffered(self):
+        """
+        Returns the number of decoded frames waiting in the read-ahead buffer.
+        #返回預讀緩衝中等待讀取的幀數。
+        """
+        return self._queue.qsize()
+
+    def release(self):
+        """
+        Stops the decoding thread and closes the stream.
+        #停止解碼線程並關閉串流。
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)  # 網路讀取卡住時不無限等待，解碼線程結束時會自行釋放串流
+            self._thread = None